@@ -4,15 +4,618 @@
 ## @brief File containing every functions related to ai.
 
 import socket
+import asyncio
 import argparse
 import sys
 import select
+import collections
+import array
+import enum
+import math
 import random
+import re
+import struct
 import time
 
+## Every resource of the game, in the order the server lists them in the inventory.
+RESOURCES = ("food", "linemate", "deraumere", "sibur", "mendiane", "phiras", "thystame")
+
+## The stones, in the order of the elevation requirements.
+STONES = RESOURCES[1:]
+
+## Requirements of one elevation: players on the tile, stones (aligned on STONES)
+## and the food the player wants to have left before starting it.
+Elevation = collections.namedtuple("Elevation", ["players", "stones", "food"])
+
+## Requirements of the elevation starting from each level (index 0 is unused).
+ELEVATION = (
+    None,
+    Elevation(1, (1, 0, 0, 0, 0, 0), 0),
+    Elevation(2, (1, 1, 1, 0, 0, 0), 16),
+    Elevation(2, (2, 0, 1, 0, 2, 0), 18),
+    Elevation(4, (1, 1, 2, 0, 1, 0), 25),
+    Elevation(4, (1, 2, 1, 3, 0, 0), 25),
+    Elevation(6, (1, 2, 3, 0, 1, 0), 30),
+    Elevation(6, (2, 2, 2, 2, 2, 1), 30),
+)
+
+## Index of every resource in the arrays of a Player and in the tiles of a View.
+class Resource(enum.IntEnum):
+    FOOD = 0
+    LINEMATE = 1
+    DERAUMERE = 2
+    SIBUR = 3
+    MENDIANE = 4
+    PHIRAS = 5
+    THYSTAME = 6
+
+## Resource of each name listed by the server.
+RESOURCE_INDEX = {name: Resource(index) for index, name in enumerate(RESOURCES)}
+
+## The stones as Resource, aligned on STONES.
+STONE_INDEXES = tuple(Resource(index) for index in range(1, len(RESOURCES)))
+
+## Time units spent by the server to execute each command.
+COMMAND_COSTS = {
+    "Forward": 7, "Right": 7, "Left": 7, "Look": 7, "Inventory": 1, "Broadcast": 7,
+    "Connect_nbr": 0, "Fork": 42, "Eject": 7, "Take": 7, "Set": 7, "Incantation": 300,
+}
+
+## Time units a food keeps a player alive.
+FOOD_TIME_UNITS = 126
+
+## Food a player hatches with.
+START_FOOD = 10
+
+## Time units without news from the player being followed after which the rally is given up.
+RALLY_TIMEOUT = 35
+
+## Number of answered commands after which the food ledger is checked against the server.
+RECONCILE_EVERY = 40
+
+## Time units after which a player frozen by an incantation of another player stops
+## waiting for its ko: the incantation lasts 300, the rest covers the clock error.
+ELEVATION_TIMEOUT = 350
+
+## Text of every command the AI sends, indexed by its Command code.
+COMMAND_TEXTS = tuple(
+    ["Forward\n", "Right\n", "Left\n", "Look\n", "Inventory\n", "Connect_nbr\n",
+    "Fork\n", "Eject\n", "Incantation\n"]
+    + [f"Take {resource}\n" for resource in RESOURCES]
+    + [f"Set {resource}\n" for resource in RESOURCES]
+    + [f"Broadcast \"Level {level} {state}\"\n" for level in range(1, 9) for state in "rc"]
+)
+
+## Small integer code of every command, stored in player.queue instead of the command string.
+## Named after the text: FORWARD, TAKE_LINEMATE, SET_SIBUR, BROADCAST_2_R...
+Command = enum.IntEnum("Command", [
+    text.replace("\"", "").replace("Level ", "").split("\n")[0].replace(" ", "_").upper()
+    for text in COMMAND_TEXTS
+], start=0)
+
+## Pre-encoded form of every command, indexed by its Command code, so that sending one costs no encoding.
+COMMAND_BYTES = tuple(text.encode() for text in COMMAND_TEXTS)
+
+## Time units spent by every command, indexed by its Command code.
+COMMAND_COST = tuple(COMMAND_COSTS[text.split()[0]] for text in COMMAND_TEXTS)
+
+## Take command of each resource, indexed by Resource.
+TAKE_COMMANDS = tuple(Command[f"TAKE_{resource.upper()}"] for resource in RESOURCES)
+
+## Set command of each resource, indexed by Resource.
+SET_COMMANDS = tuple(Command[f"SET_{resource.upper()}"] for resource in RESOURCES)
+
+## Commands changing the position or the heading of the player.
+MOVE_COMMANDS = (Command.FORWARD, Command.RIGHT, Command.LEFT)
+
+## Commands changing what the player sees around it: a view recalled while one is pending is stale.
+TILE_COMMANDS = frozenset(MOVE_COMMANDS + TAKE_COMMANDS + SET_COMMANDS)
+
+## @brief Returns the code of a level broadcast.
+## @param level Level announced, 1 to 8.
+## @param state "r" when ready to incant, "c" when coming.
+## @return The Command code of the broadcast.
+def broadcast_command(level, state):
+    return Command(Command.BROADCAST_1_R + 2 * (level - 1) + (state == "c"))
+
+## Plain int values of the codes tested on every reply: reading a member of an IntEnum
+## costs several times the comparison itself.
+FORWARD_CODE = int(Command.FORWARD)
+RIGHT_CODE = int(Command.RIGHT)
+LEFT_CODE = int(Command.LEFT)
+TAKE_FOOD_CODE = int(Command.TAKE_FOOD)
+SET_FOOD_CODE = int(Command.SET_FOOD)
+
+## Resource moved by every command, indexed by its Command code: (TAKE_FOOD_CODE or
+## SET_FOOD_CODE, Resource index) as plain ints, (None, None) for any other command.
+COMMAND_RESOURCE = tuple(
+    (TAKE_FOOD_CODE, code - TAKE_FOOD_CODE) if code in TAKE_COMMANDS
+    else (SET_FOOD_CODE, code - SET_FOOD_CODE) if code in SET_COMMANDS
+    else (None, None)
+    for code in range(len(COMMAND_TEXTS))
+)
+
+## Indicates, for every Command code, if the command is answered by data instead of "ok".
+DATA_REPLIES = tuple(code in (Command.LOOK, Command.INVENTORY, Command.CONNECT_NBR) for code in Command)
+
+## @brief Returns the resource moved by a Take or a Set.
+## @param code Command code.
+## @return Tuple (Take or Set code of food, Resource index), or (None, None) for any other command.
+def command_resource(code):
+    return COMMAND_RESOURCE[code]
+
+## A command sent to the server and still waiting for its reply.
+class Pending:
+
+    __slots__ = ("code", "cost", "callback")
+
+    ## Class constructor of Pending.
+    ## @param code Command code of the sent command.
+    ## @param callback Function called with the Pending and the decoded reply once answered, or None.
+    def __init__(self, code, callback=None):
+        ## Command code of the sent command.
+        self.code = code
+        ## Time units the command spends.
+        self.cost = COMMAND_COST[code]
+        ## Function called with the Pending and the decoded reply once answered, or None.
+        self.callback = callback
+
+    ## @brief Hands the reply to the callback.
+    ## @param reply Decoded reply answering the command.
+    def resolve(self, reply):
+        if self.callback != None :
+            self.callback(self, reply)
+
+## @brief Builds a queue of pending commands.
+## @param codes Command codes, oldest first.
+## @return A deque of Pending without callbacks.
+def pending_queue(codes=()):
+    return collections.deque(Pending(code) for code in codes)
+
+## @brief Lists the codes of the pending commands.
+## @param queue Deque of Pending, oldest first.
+## @return List of Command codes.
+def pending_codes(queue):
+    return [entry.code for entry in queue]
+
+## @brief Sends a command and adds it to the player's queue.
+## @param client_socket The socket (or CommandScheduler) where to send the command.
+## @param player Player class containing queue.
+## @param code Command code to send.
+## @param callback Function called with the Pending and the decoded reply once answered, or None.
+def send_command(client_socket, player, code, callback=None):
+    # print(f"Sending : {COMMAND_TEXTS[code]}", end="")
+    client_socket.send(COMMAND_BYTES[code])
+    player.queue.append(Pending(code, callback))
+
+## @brief Builds a Player attribute stored in one of its arrays.
+## @param table Name of the array, "inventory" or "needs".
+## @param resource Resource indexing the array.
+## @return The property reading and writing the array cell.
+##
+##       The accessors read the slot of the array and index it with a plain int,
+##       without any getattr or IntEnum lookup on the way.
+def resource_property(table, resource):
+    resource = int(resource)
+    if table == "needs" :
+        def get_cell(player):
+            return player.needs[resource]
+        def set_cell(player, value):
+            player.needs[resource] = value
+    else :
+        def get_cell(player):
+            return player.inventory[resource]
+        def set_cell(player, value):
+            player.inventory[resource] = value
+    return property(get_cell, set_cell)
+
+## Offset of one step forward for each heading: north, east, south, west.
+HEADINGS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+## Turns, relative to the heading, of the push an "eject: K" message reports.
+##
+##        K is the tile the ejecting player stands on, seen from the receiver: coming
+##        from the front (1) pushes back, from the left (3) pushes right, from the back
+##        (5) pushes forward and from the right (7) pushes left.
+EJECT_TURNS = {1: 2, 3: 1, 5: 0, 7: 3}
+
+## Highest level of a player, setting the size of the largest vision cone.
+MAX_LEVEL = 8
+
+## Number of tiles of the vision cone at each level (index 0 is unused).
+CONE_SIZES = tuple((level + 1) * (level + 1) for level in range(MAX_LEVEL + 1))
+
+## Position of every tile of the vision cone relative to the player, up to level 8:
+## (distance in front of the player, offset to the right).
+## Row d of the cone holds the indexes d * d to d * d + 2 * d, from left to right.
+CONE_OFFSETS = tuple(
+    (math.isqrt(index), index - math.isqrt(index) * (math.isqrt(index) + 1))
+    for index in range(CONE_SIZES[MAX_LEVEL])
+)
+
+## Offset (dx, dy) on the map of every tile of the vision cone, indexed by heading then tile.
+CONE_DELTAS = tuple(
+    tuple(
+        (distance * HEADINGS[heading][0] + side * HEADINGS[(heading + 1) % 4][0],
+        distance * HEADINGS[heading][1] + side * HEADINGS[(heading + 1) % 4][1])
+        for distance, side in CONE_OFFSETS
+    )
+    for heading in range(4)
+)
+
+## Turns from a heading to another, indexed by (goal - heading) % 4.
+TURNS = ((), (Command.RIGHT,), (Command.RIGHT, Command.RIGHT), (Command.LEFT,))
+
+## @brief Brings a distance along an axis of the map to its shortest toroidal form.
+## @param delta Distance along the axis.
+## @param size Size of the map along the axis, None when unknown.
+## @return The distance, between -size / 2 and size / 2 when the size is known.
+def toroidal_delta(delta, size):
+    if size :
+        delta = (delta + size // 2) % size - size // 2
+    return delta
+
+## @brief Time units spent by a sequence of commands.
+## @param commands Command codes.
+## @return Sum of the costs.
+def route_cost(commands):
+    return sum(COMMAND_COST[code] for code in commands)
+
+## @brief Computes the cheapest commands moving the player by an offset.
+## @param heading Index in HEADINGS the player faces.
+## @param dx Columns to move, growing eastward.
+## @param dy Rows to move, growing southward.
+## @return List of Command codes: the two legs are tried in both orders and the cheapest is kept.
+def route(heading, dx, dy):
+    legs = []
+    if dx :
+        legs.append((1 if dx > 0 else 3, abs(dx)))
+    if dy :
+        legs.append((2 if dy > 0 else 0, abs(dy)))
+    best = None
+    for order in (legs, legs[::-1]):
+        commands = []
+        facing = heading
+        for goal, steps in order:
+            commands += TURNS[(goal - facing) % 4]
+            commands += [Command.FORWARD] * steps
+            facing = goal
+        if best == None or route_cost(commands) < route_cost(best) :
+            best = commands
+    return best
+
+## Cheapest commands reaching every tile of the vision cone, when the map does not wrap.
+CONE_ROUTES = tuple(tuple(route(0, side, -distance)) for distance, side in CONE_OFFSETS)
+
+## Time units spent by every route of CONE_ROUTES.
+CONE_COSTS = tuple(route_cost(commands) for commands in CONE_ROUTES)
+
+## Dead-reckoning position and heading of the player, relative to where it spawned.
+##
+##        Only the moves the server answered "ok" are applied, so the estimate never
+##        drifts on refused commands. Coordinates wrap around the map once its size is known.
+class Tracker:
+
+    __slots__ = ("x", "y", "heading", "width", "height")
+
+    ## Class constructor of Tracker.
+    ## @param width Width of the map, None while unknown.
+    ## @param height Height of the map, None while unknown.
+    def __init__(self, width=None, height=None):
+        ## Column of the player, relative to the spawn tile.
+        self.x = 0
+        ## Row of the player, relative to the spawn tile, growing southward.
+        self.y = 0
+        ## Index in HEADINGS the player faces, 0 (north) at spawn.
+        self.heading = 0
+        ## Width of the map, None while unknown.
+        self.width = width
+        ## Height of the map, None while unknown.
+        self.height = height
+
+    ## @brief Moves the position one tile in a direction, wrapping around the map.
+    ## @param heading Index in HEADINGS of the direction of the move.
+    def step(self, heading):
+        dx, dy = HEADINGS[heading]
+        self.x += dx
+        self.y += dy
+        if self.width :
+            self.x %= self.width
+        if self.height :
+            self.y %= self.height
+
+    ## @brief Applies a command the server answered "ok".
+    ## @param code Command code of the answered command.
+    def confirm(self, code):
+        if code == FORWARD_CODE :
+            self.step(self.heading)
+        elif code == RIGHT_CODE :
+            self.heading = (self.heading + 1) % 4
+        elif code == LEFT_CODE :
+            self.heading = (self.heading + 3) % 4
+
+    ## @brief Predicts the tracker once queued commands are executed.
+    ## @param codes Command codes, the moves among them are applied in order.
+    ## @return A new Tracker, this one is left unchanged.
+    def predict(self, codes):
+        tracker = Tracker(self.width, self.height)
+        tracker.x, tracker.y, tracker.heading = self.x, self.y, self.heading
+        for code in codes:
+            tracker.confirm(code)
+        return tracker
+
+    ## @brief Gives the tile a Look sees at an index of the vision cone.
+    ## @param index Index of the tile in the Look reply.
+    ## @return Tuple (x, y) of the tile, wrapped around the map when its size is known.
+    def cone_tile(self, index):
+        dx, dy = CONE_DELTAS[self.heading][index]
+        x = self.x + dx
+        y = self.y + dy
+        if self.width :
+            x %= self.width
+        if self.height :
+            y %= self.height
+        return x, y
+
+    ## @brief Applies the push of an ejection.
+    ## @param direction K of the "eject: K" message.
+    def ejected(self, direction):
+        turn = EJECT_TURNS.get(direction)
+        if turn is not None :
+            self.step((self.heading + turn) % 4)
+
+## Direction of the K of a broadcast, as (forward, left) tiles relative to the heading.
+## Index 0 is the tile of the player itself, then K turns counterclockwise from the front.
+BROADCAST_DIRECTIONS = ((0, 0), (1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+## Steps taken toward a broadcast without any distance estimate before waiting for the next one.
+STEER_STEPS = 2
+
+## @brief Gives the map direction of a broadcast.
+## @param heading Index in HEADINGS the player faces.
+## @param direction K of the broadcast message.
+## @return Tuple (dx, dy) of the source direction, each in -1, 0 or 1.
+def broadcast_delta(heading, direction):
+    forward, left = BROADCAST_DIRECTIONS[direction]
+    fx, fy = HEADINGS[heading]
+    lx, ly = HEADINGS[(heading + 3) % 4]
+    return forward * fx + left * lx, forward * fy + left * ly
+
+## Steering toward the player calling a rally, from the directions of its broadcasts.
+##
+##        Every broadcast is a fix: the position of the player and the direction the
+##        sound came from. Two fixes with different directions are crossed to estimate
+##        where the caller stands; until then the player keeps walking along the
+##        latest direction for STEER_STEPS steps.
+class Steering:
+
+    __slots__ = ("x", "y", "dx", "dy", "tick", "target", "steps")
+
+    ## Class constructor of Steering.
+    def __init__(self):
+        self.reset()
+
+    ## @brief Forgets every fix, when the rally is over.
+    def reset(self):
+        ## Position of the last fix, None before any.
+        self.x = None
+        self.y = None
+        ## Direction of the source at the last fix.
+        self.dx = 0
+        self.dy = 0
+        ## Tick of the last fix.
+        self.tick = 0
+        ## Estimated (x, y) of the source, None until two fixes crossed.
+        self.target = None
+        ## Steps left along the latest direction while no target is estimated.
+        self.steps = 0
+
+    ## @brief Records the direction of a broadcast heard at the current position.
+    ## @param tracker Tracker of the player when the broadcast was heard.
+    ## @param direction K of the broadcast message.
+    ## @param tick Tick the broadcast was heard at.
+    def fix(self, tracker, direction, tick=0):
+        dx, dy = broadcast_delta(tracker.heading, direction)
+        if self.x == None or tick - self.tick > RALLY_TIMEOUT :
+            self.target = None
+        elif (dx, dy) != (self.dx, self.dy) and (dx, dy) != (0, 0) :
+            self.target = self.cross(tracker, dx, dy)
+        if (dx, dy) == (0, 0) :
+            self.target = (tracker.x, tracker.y)
+        self.x, self.y, self.dx, self.dy, self.tick = tracker.x, tracker.y, dx, dy, tick
+        self.steps = STEER_STEPS
+
+    ## @brief Crosses the last fix with a new one.
+    ## @param tracker Tracker of the player at the new fix.
+    ## @param dx Columns of the new direction.
+    ## @param dy Rows of the new direction.
+    ## @return Estimated (x, y) of the source, None when the two lines do not meet ahead of both fixes.
+    def cross(self, tracker, dx, dy):
+        det = self.dx * dy - self.dy * dx
+        if det == 0 :
+            return None
+        ox = toroidal_delta(tracker.x - self.x, tracker.width)
+        oy = toroidal_delta(tracker.y - self.y, tracker.height)
+        first = (ox * dy - oy * dx) / det
+        second = (ox * self.dy - oy * self.dx) / det
+        if first <= 0 or second <= 0 :
+            return None
+        x = self.x + round(first * self.dx)
+        y = self.y + round(first * self.dy)
+        if tracker.width :
+            x %= tracker.width
+        if tracker.height :
+            y %= tracker.height
+        return x, y
+
+    ## @brief Estimates how far the source is.
+    ## @param tracker Tracker of the player.
+    ## @return Number of Forward to reach the estimated source, None without an estimate.
+    def distance(self, tracker):
+        if self.target == None :
+            return None
+        return (abs(toroidal_delta(self.target[0] - tracker.x, tracker.width))
+                + abs(toroidal_delta(self.target[1] - tracker.y, tracker.height)))
+
+    ## @brief Gives the next move toward the source.
+    ## @param tracker Tracker of the player.
+    ## @return List of Command codes turning as little as possible then moving one tile,
+    ##         empty when the player should wait for the next broadcast.
+    def step(self, tracker):
+        if self.target != None :
+            dx = toroidal_delta(self.target[0] - tracker.x, tracker.width)
+            dy = toroidal_delta(self.target[1] - tracker.y, tracker.height)
+            dx = (dx > 0) - (dx < 0)
+            dy = (dy > 0) - (dy < 0)
+        elif self.steps > 0 :
+            dx, dy = self.dx, self.dy
+            self.steps -= 1
+        else :
+            return []
+        commands = route(tracker.heading, dx, dy)
+        if Command.FORWARD in commands :
+            return commands[:commands.index(Command.FORWARD) + 1]
+        return commands
+
+## Information the server gives when the team name is accepted.
+##
+##        After WELCOME and the team name, the server answers the number of slots
+##        left in the team on one line, then the size of the map as "X Y".
+class Session:
+
+    __slots__ = ("slots", "width", "height")
+
+    ## Class constructor of Session.
+    def __init__(self):
+        ## Number of players the team can still connect, None until received.
+        self.slots = None
+        ## Width of the map, None until received.
+        self.width = None
+        ## Height of the map, None until received.
+        self.height = None
+
+    ## @brief Parses one line of the handshake.
+    ## @param line Decoded line received before joining the game.
+    ## @return True once the map size was received.
+    ##
+    ##       WELCOME and the "team is full" notice are ignored, only the numbers count.
+    def feed(self, line):
+        words = line.split()
+        if not all(word.isdigit() for word in words) :
+            return False
+        if len(words) == 1 and self.slots is None :
+            self.slots = int(words[0])
+        elif len(words) == 2 and self.slots is not None :
+            self.width, self.height = int(words[0]), int(words[1])
+        return self.complete()
+
+    ## @brief Tells if the whole handshake was received.
+    ## @return True when the map size is known.
+    def complete(self):
+        return self.width is not None
+
+## Weight of a new sample in the estimate of the server's time unit.
+CLOCK_SMOOTHING = 0.2
+
+## Factor a sample may be off the estimate by before it is rejected as an outlier.
+CLOCK_OUTLIER = 3.0
+
+## Outliers in a row after which they are taken as the new unit, the estimate being wrong.
+CLOCK_REJECTIONS = 3
+
+## Estimate of the server's time unit, turning command costs into wall-clock time.
+##
+##        The server executes the commands of a player one after the other, so when a
+##        command was already queued as the previous reply arrived, the time between the
+##        two replies is its execution time: cost * time unit. Each such reply gives a
+##        sample, smoothed by an exponential moving average. Commands sent to an idle
+##        server are not sampled, their delay includes the network round trip, and
+##        neither is the reply following an incantation, which froze the player.
+##        A sample more than CLOCK_OUTLIER times off the estimate is dropped.
+class ServerClock:
+
+    __slots__ = ("timer", "unit", "chained", "anchor_ticks", "anchor_time", "rejected")
+
+    ## Class constructor of ServerClock.
+    ## @param timer Function returning the current time in seconds.
+    def __init__(self, timer=time.monotonic):
+        ## Function returning the current time in seconds.
+        self.timer = timer
+        ## Estimated duration of a time unit in seconds (1 / frequency), None until sampled.
+        self.unit = None
+        ## Indicates if the next reply's command was queued when the last reply arrived.
+        self.chained = False
+        ## Ticks of the player at the last reply.
+        self.anchor_ticks = 0
+        ## Time of the last reply, None before the first one.
+        self.anchor_time = None
+        ## Number of outliers dropped in a row.
+        self.rejected = 0
+
+    ## @brief Accounts a reply to a command.
+    ## @param cost Time units of the answered command.
+    ## @param ticks Ticks of the player once the command is accounted.
+    ## @param pending Number of commands still queued after this one.
+    def reply(self, cost, ticks, pending):
+        now = self.timer()
+        if self.chained and cost > 0 :
+            self.sample((now - self.anchor_time) / cost)
+        self.chained = pending > 0
+        self.anchor_ticks = ticks
+        self.anchor_time = now
+
+    ## @brief Adds a sample of the time unit to the estimate.
+    ## @param sample Duration of a time unit measured on a reply, in seconds.
+    def sample(self, sample):
+        unit = self.unit
+        if unit == None :
+            self.unit = sample
+        elif unit / CLOCK_OUTLIER <= sample <= unit * CLOCK_OUTLIER :
+            self.unit = unit + CLOCK_SMOOTHING * (sample - unit)
+            self.rejected = 0
+        else :
+            self.rejected += 1
+            if self.rejected >= CLOCK_REJECTIONS :
+                self.unit = sample
+                self.rejected = 0
+
+    ## @brief Stops sampling until the next reply: the player is frozen by an incantation.
+    def freeze(self):
+        self.chained = False
+
+    ## @brief Anchors the clock on an event, without sampling the next reply.
+    ## @param ticks Ticks of the player at the event.
+    def resync(self, ticks):
+        self.chained = False
+        self.anchor_ticks = ticks
+        self.anchor_time = self.timer()
+
+    ## @brief Gives the current time in server ticks.
+    ## @return Ticks of the last reply plus the time units elapsed since, once the unit is known.
+    def now(self):
+        if self.unit == None or self.anchor_time == None :
+            return self.anchor_ticks
+        return self.anchor_ticks + (self.timer() - self.anchor_time) / self.unit
+
+    ## @brief Converts time units into seconds.
+    ## @param units Number of time units.
+    ## @return Duration in seconds, None until the unit is known.
+    def seconds(self, units):
+        if self.unit == None :
+            return None
+        return units * self.unit
+
 ## Player class containing every player related information.
+##
+##        Slotted: an agent is a fixed set of fields, the resource counters being two
+##        small arrays indexed by Resource, so hundreds of agents fit in one process.
 class Player:
 
+    __slots__ = ("level", "incanting", "elevating", "frozen_entry", "wants_incanting", "need_to_go", "nb_r", "view", "look",
+                 "queue", "inventory", "needs", "starve", "elapsed", "ledger_age", "reconcile", "should_stop",
+                 "follow", "just_inc", "plant", "inventory_b", "tracker", "session", "ticks", "world", "recall", "clock",
+                 "tile_players", "steering", "random")
+
     ## Class constructor of Player.
     #
     ##        Initializes a new player with default values for all attributes.
@@ -24,6 +627,12 @@ class Player:
         ## To know if the player is currently incanting.
         ## Can be True or False.
         self.incanting = False
+        ## Tick the player was frozen at by an incantation another player started, None otherwise:
+        ## a ko then ends the incantation and answers none of its commands.
+        self.elevating = None
+        ## Pending command the server was running when the player was frozen, None if none:
+        ## its own reply still comes before the end of the incantation.
+        self.frozen_entry = None
         ## Indicates if the player is ready to evolve.
         ## Can be True or False.
         self.wants_incanting = False
@@ -33,53 +642,36 @@ class Player:
         ## Number of players of the same level ready to evolve.
         ## No maximum, but go back to 0 when the number of player ready to evolve reach the requisites.
         self.nb_r = 0
-        ## Contains the information the player can see when they look.
-        ## Gets more information scaling with level.
+        ## Contains the information the player can see when they look, as a View.
+        ## Gets more information scaling with level. [] until the next Look reply.
         self.view = []
         ## Indicates if the player asked the server what they see.
         ## True if he did else False
         self.look = False
-        ## The queue of actions the player sent to the server.
-        ## You have to take care not to fill it more than 10 because it doesn't allow queue bigger than 10.
-        self.queue = []
-        ## The number of linemates the player has.
-        self.linemate = 0
-        ## The number of deraumere the player has.
-        self.deraumere = 0
-        ## The number of sibur the player has.
-        self.sibur = 0
-        ## The number of mendiane the player has.
-        self.mendiane = 0
-        ## The number of phiras the player has.
-        self.phiras = 0
-        ## The number of thystame the player has.
-        self.thystame = 0
-        ## The number of linemate the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_linemate = 9
-        ## The number of deraumer the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_deraumere = 8
-        ## The number of sibur the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_sibur = 10
-        ## The number of mendiane the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_mendiane = 5
-        ## The number of phiras the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_phiras = 6
-        ## The number of thystame the player needs to level up to 8.
-        ## This maximum is modified when leveling up.
-        self.max_thystame = 1
+        ## The Pending commands the player sent to the server, oldest first.
+        ## The server doesn't allow more than 10 pending commands: CommandScheduler holds
+        ## back the commands past the 10th until a reply frees a slot.
+        self.queue = collections.deque()
+        ## The number of stones the player has, indexed by Resource (the food is in starve).
+        self.inventory = array.array('h', bytes(2 * len(RESOURCES)))
+        ## The number of stones the player needs to level up to 8, indexed by Resource.
+        ## These maximums are modified when leveling up.
+        self.needs = array.array('h', [0, 9, 8, 10, 5, 6, 1])
         ## The remaining food of the player.
-        ## Set to a number after asking for Inventory to the server, reseted after used.
-        self.starve = None
+        ## Starts from the food a player hatches with, then kept up to date by the ledger
+        ## (see spend_time) and corrected by an Inventory every RECONCILE_EVERY commands.
+        self.starve = START_FOOD
+        ## Time units spent since the ledger last removed a food.
+        self.elapsed = 0
+        ## Number of commands answered since the last Inventory.
+        self.ledger_age = 0
+        ## Indicates if the ledger is due for a check: the next decision sends an Inventory.
+        self.reconcile = False
         ## Indicates if the player should stop broadcasting.
         ## None if no indication, 1 if should stop, 2 if should continue.
         self.should_stop = None
-        ## The time since the person the player is following last gave news.
-        ## Increment each time you execute a command in the server.
+        ## The tick the person the player is following last gave news at.
+        ## Compared to clock.now() against RALLY_TIMEOUT.
         self.follow = 0
         ## Indicates if the player was the originator of the incantation.
         self.just_inc = False
@@ -88,6 +680,244 @@ class Player:
         ## Indicates if the player asked for an Inventory check at Level 8.
         ## False if he asked, True if not.
         self.inventory_b = True
+        ## Dead-reckoning position and heading of the player.
+        self.tracker = Tracker()
+        ## The Session received during the handshake, None before joining.
+        self.session = None
+        ## Time units spent by the answered commands since the player joined.
+        self.ticks = 0
+        ## The WorldMap of the tiles the player saw, None until the map size is known.
+        self.world = None
+        ## Indicates if the next view is rebuilt from the WorldMap instead of a Look.
+        self.recall = False
+        ## Players the last real Look counted on tile 0, the player included: the WorldMap
+        ## remembers no player, so a recalled view gets this count back.
+        self.tile_players = 1
+        ## The ServerClock estimating the server's time unit.
+        self.clock = ServerClock()
+        ## The Steering toward the player calling a rally.
+        self.steering = Steering()
+        ## The generator of the random moves: the random module, or a seeded
+        ## random.Random when the session is recorded (see Agent.record).
+        self.random = random
+
+    ## @brief Stores the session of the game the player joined.
+    ## @param session Complete Session of the handshake.
+    ##
+    ##       The map size makes the tracker wrap around the map and sizes the WorldMap.
+    def join(self, session):
+        self.session = session
+        self.tracker.width = session.width
+        self.tracker.height = session.height
+        self.world = WorldMap(session.width, session.height)
+
+    ## The number of linemates the player has.
+    linemate = resource_property("inventory", Resource.LINEMATE)
+    ## The number of deraumere the player has.
+    deraumere = resource_property("inventory", Resource.DERAUMERE)
+    ## The number of sibur the player has.
+    sibur = resource_property("inventory", Resource.SIBUR)
+    ## The number of mendiane the player has.
+    mendiane = resource_property("inventory", Resource.MENDIANE)
+    ## The number of phiras the player has.
+    phiras = resource_property("inventory", Resource.PHIRAS)
+    ## The number of thystame the player has.
+    thystame = resource_property("inventory", Resource.THYSTAME)
+    ## The number of linemate the player needs to level up to 8.
+    max_linemate = resource_property("needs", Resource.LINEMATE)
+    ## The number of deraumere the player needs to level up to 8.
+    max_deraumere = resource_property("needs", Resource.DERAUMERE)
+    ## The number of sibur the player needs to level up to 8.
+    max_sibur = resource_property("needs", Resource.SIBUR)
+    ## The number of mendiane the player needs to level up to 8.
+    max_mendiane = resource_property("needs", Resource.MENDIANE)
+    ## The number of phiras the player needs to level up to 8.
+    max_phiras = resource_property("needs", Resource.PHIRAS)
+    ## The number of thystame the player needs to level up to 8.
+    max_thystame = resource_property("needs", Resource.THYSTAME)
+
+## Column of each item in a View tile: the resources, then the players.
+VIEW_COLUMNS = {**{resource: column for column, resource in enumerate(RESOURCES)}, "player": len(RESOURCES)}
+## Number of counters stored for each tile of a View.
+VIEW_WIDTH = len(VIEW_COLUMNS)
+
+## Parsed result of a Look, stored as a tiles x items matrix of counters.
+##
+##        The reply is parsed once in received_look; every query afterwards is a
+##        lookup in a flat array('H') (tile index * VIEW_WIDTH + item column).
+##        Words are matched exactly, so "player" never matches inside another word,
+##        and "egg" or unknown words are ignored.
+class View:
+
+    ## Class constructor of View.
+    ## @param size Number of tiles of the view.
+    def __init__(self, size=0):
+        ## Number of tiles of the view.
+        self.size = size
+        ## Counter of every item on every tile.
+        self.counts = array.array('H', bytes(2 * VIEW_WIDTH * size))
+
+    ## @brief Parses the reply of a Look.
+    ## @param data_rec String of the reply, like "[player food, linemate, ]".
+    ## @return The parsed View.
+    @classmethod
+    def parse(cls, data_rec):
+        return cls.from_tiles(data_rec.strip().strip("[]").split(","))
+
+    ## @brief Builds a view from the content of every tile.
+    ## @param tiles List of strings, one per tile, items separated by spaces.
+    ## @return The parsed View.
+    @classmethod
+    def from_tiles(cls, tiles):
+        view = cls(len(tiles))
+        counts = view.counts
+        columns = VIEW_COLUMNS
+        base = 0
+        for tile in tiles:
+            for word in tile.split():
+                column = columns.get(word)
+                if column is not None :
+                    counts[base + column] += 1
+            base += VIEW_WIDTH
+        return view
+
+    ## @brief Number of tiles of the view.
+    def __len__(self):
+        return self.size
+
+    ## @brief Counts an item on a tile.
+    ## @param index Index of the tile.
+    ## @param item Name of a resource or "player".
+    ## @return Number of this item on the tile, 0 if the tile is out of the view.
+    def count(self, index, item):
+        if 0 <= index < self.size :
+            return self.counts[index * VIEW_WIDTH + VIEW_COLUMNS[item]]
+        return 0
+
+    ## @brief Counts the resources (food and stones) on a tile.
+    ## @param index Index of the tile.
+    ## @return Number of resources on the tile, 0 if the tile is out of the view.
+    def resources(self, index):
+        if 0 <= index < self.size :
+            base = index * VIEW_WIDTH
+            return sum(self.counts[base:base + len(RESOURCES)])
+        return 0
+
+    ## @brief Finds the tiles holding an item.
+    ## @param item Name of a resource or "player".
+    ## @return List of the indexes of the tiles holding at least one.
+    def find(self, item):
+        counts = self.counts
+        column = VIEW_COLUMNS[item]
+        return [index for index in range(self.size) if counts[index * VIEW_WIDTH + column]]
+
+    ## @brief Removes one item from a tile, after it was taken.
+    ## @param index Index of the tile.
+    ## @param item Name of a resource or "player".
+    def take(self, index, item):
+        if 0 <= index < self.size and item in VIEW_COLUMNS :
+            position = index * VIEW_WIDTH + VIEW_COLUMNS[item]
+            if self.counts[position] > 0 :
+                self.counts[position] -= 1
+
+## @brief Returns the View of a player's view.
+## @param view A View, or a list of tile strings as built by split_by_commas.
+## @return The View itself, or the view parsed from the strings.
+def as_view(view):
+    if isinstance(view, View) :
+        return view
+    return View.from_tiles(view)
+
+## Number of time units after which a remembered tile is not trusted anymore.
+FRESH_TICKS = 126
+
+## Memory of the resources seen on every tile of the map.
+##
+##        Each Look is projected onto absolute tiles with the Tracker, and every tile
+##        keeps the tick it was last seen at. Players are not remembered: they move.
+class WorldMap:
+
+    __slots__ = ("width", "height", "counts", "seen")
+
+    ## Class constructor of WorldMap.
+    ## @param width Width of the map.
+    ## @param height Height of the map.
+    def __init__(self, width, height):
+        ## Width of the map.
+        self.width = width
+        ## Height of the map.
+        self.height = height
+        ## Counter of every resource on every tile (tile * len(RESOURCES) + Resource).
+        self.counts = array.array('H', bytes(2 * len(RESOURCES) * width * height))
+        ## Tick every tile was last seen at, -1 if never.
+        self.seen = array.array('i', [-1]) * (width * height)
+
+    ## @brief Index of a tile in the arrays.
+    ## @param x Column of the tile, wrapped around the map.
+    ## @param y Row of the tile, wrapped around the map.
+    ## @return Index of the tile.
+    def tile(self, x, y):
+        return (y % self.height) * self.width + (x % self.width)
+
+    ## @brief Stores the content of a Look.
+    ## @param tracker Tracker of the player when the Look was executed.
+    ## @param view View parsed from the reply.
+    ## @param tick Tick of the reply.
+    ##
+    ##       The cone offsets are applied inline rather than through cone_tile: this runs
+    ##       for every tile of every Look.
+    def record(self, tracker, view, tick):
+        width = len(RESOURCES)
+        counts, seen, source = self.counts, self.seen, view.counts
+        deltas = CONE_DELTAS[tracker.heading]
+        for index in range(len(view)):
+            dx, dy = deltas[index]
+            tile = ((tracker.y + dy) % self.height) * self.width + (tracker.x + dx) % self.width
+            counts[tile * width:(tile + 1) * width] = source[index * VIEW_WIDTH:index * VIEW_WIDTH + width]
+            seen[tile] = tick
+
+    ## @brief Tells if the whole vision cone from a position was seen recently.
+    ## @param tracker Tracker of the position to check.
+    ## @param level Level of the player, setting the size of the cone.
+    ## @param tick Current tick.
+    ## @return True if every tile of the cone was seen less than FRESH_TICKS ago.
+    def fresh(self, tracker, level, tick):
+        for index in range(CONE_SIZES[level]):
+            seen = self.seen[self.tile(*tracker.cone_tile(index))]
+            if seen < 0 or tick - seen > FRESH_TICKS :
+                return False
+        return True
+
+    ## @brief Rebuilds the View a Look would give from the remembered tiles.
+    ## @param tracker Tracker of the player.
+    ## @param level Level of the player, setting the size of the cone.
+    ## @return The View, without any player in it.
+    def view(self, tracker, level):
+        width = len(RESOURCES)
+        view = View(CONE_SIZES[level])
+        for index in range(view.size):
+            tile = self.tile(*tracker.cone_tile(index))
+            view.counts[index * VIEW_WIDTH:index * VIEW_WIDTH + width] = self.counts[tile * width:(tile + 1) * width]
+        return view
+
+    ## @brief Applies a Take or a Set answered by the server on the player's tile.
+    ## @param tracker Tracker of the player.
+    ## @param code Command code of the answered command.
+    ## @param data_rec Decoded reply.
+    ##
+    ##       A refused Take means the resource is gone from the tile.
+    def update(self, tracker, code, data_rec):
+        action, resource = COMMAND_RESOURCE[code]
+        if action == None :
+            return
+        position = self.tile(tracker.x, tracker.y) * len(RESOURCES) + resource
+        if action == TAKE_FOOD_CODE :
+            if data_rec == "ok\n" and self.counts[position] > 0 :
+                self.counts[position] -= 1
+            elif data_rec == "ko\n" :
+                self.counts[position] = 0
+        elif data_rec == "ok\n" :
+            self.counts[position] += 1
 
 ## Splits the string received into a list.
 ## @param input_string String to split.
@@ -102,27 +932,31 @@ def split_by_commas(input_string):
     return cleaned_items
 
 ## Finds the index of every keyword in the list.
-## @param strings List of words.
+## @param strings List of words, or a View.
 ## @param keyword Word to find in the list.
 ## @return A list of indexes where the keyword is found in the list.
 ##
 ##       This function searches through a list of strings and returns a list
-##       of all the indices where the keyword appears.
+##       of all the indices where the keyword appears as a whole word.
 def find_keyword_in_list(strings, keyword):
+    if isinstance(strings, View) :
+        return strings.find(keyword)
     indices = []
     for index, string in enumerate(strings):
-        if keyword in string:
+        if keyword in string.split():
             indices.append(index)
     return indices
 
 ## Counts the number of words in a list at a certain index, excluding "egg" and "player".
-## @param strings List of strings.
+## @param strings List of strings, or a View.
 ## @param index Index where to count the words in the list.
 ## @return Number of words in the list at the given index.
 ##
 ##        This function counts the number of words at a specified index in a list of strings,
 ##        excluding the words "egg" and "player". If the index is out of range, it returns 0.
 def count_words_at_index(strings, index):
+    if isinstance(strings, View) :
+        return strings.resources(index)
     if 0 <= index < len(strings):
         words = strings[index].split()
         words = [word for word in words if word != "egg" and word != "player"]
@@ -131,7 +965,7 @@ def count_words_at_index(strings, index):
         return 0
 
 ## Removes a word in a list at a given index.
-## @param strings List of strings.
+## @param strings List of strings, or a View.
 ## @param index Index where to delete the word.
 ## @param element Word to delete in the list.
 ## 
@@ -139,7 +973,9 @@ def count_words_at_index(strings, index):
 ##        from the string at the given index of the list. If the index is out of
 ##        range, it prints an error message.
 def remove_element(strings, index, element):
-    if 0 <= index < len(strings):
+    if isinstance(strings, View) :
+        strings.take(index, element)
+    elif 0 <= index < len(strings):
         strings[index] = strings[index].replace(element, "", 1)
     else:
         print("Index out of range (remove_element).")
@@ -154,11 +990,8 @@ def remove_element(strings, index, element):
 ##       removes the element from the player's view at the given index using 
 ##       remove_element, and appends the sent data to the player's action queue.
 def send_and_remove(client_socket, player, index, element):
-    data_send = f"Take {element}\n"
-    # print(f"Sending: {data_send}", end="")
-    client_socket.send(data_send.encode())
+    send_command(client_socket, player, TAKE_COMMANDS[RESOURCE_INDEX[element]])
     remove_element(player.view, index, element)
-    player.queue.append(data_send)
 
 ## Sends the command "Forward" to the socket, resets player's look and view, and adds the command to the player's queue.
 ## 
@@ -167,10 +1000,7 @@ def send_and_remove(client_socket, player, index, element):
 ## 
 ##       This function sends the "Forward" command to the specified client socket and appends the command to player.queue.
 def going_forward(client_socket, player):
-    data_send = "Forward\n"
-    # print(f"Sending : {data_send}", end="")
-    client_socket.send(data_send.encode())
-    player.queue.append(data_send)
+    send_command(client_socket, player, Command.FORWARD)
 
 ## Sends the command "Right" to the socket and adds the command to the player's queue.
 ## @param client_socket Socket to which the command is sent.
@@ -178,10 +1008,7 @@ def going_forward(client_socket, player):
 ##
 ##       This function sends the "Right" command to the specified client socket and appends the command to player.queue.
 def turning_right(client_socket, player):
-    data_send = "Right\n"
-    # print(f"Sending : {data_send}", end="")
-    client_socket.send(data_send.encode())
-    player.queue.append(data_send)
+    send_command(client_socket, player, Command.RIGHT)
 
 ## Sends the command "Left" to the socket and adds the command to the player's queue.
 ## @param client_socket Socket to which the command is sent.
@@ -189,10 +1016,7 @@ def turning_right(client_socket, player):
 ##
 ##        This function sends the "Left" command to the specified client socket and appends the command to player.queue.
 def turning_left(client_socket, player):
-    data_send = "Left\n"
-    # print(f"Sending : {data_send}", end="")
-    client_socket.send(data_send.encode())
-    player.queue.append(data_send)
+    send_command(client_socket, player, Command.LEFT)
 
 ## @brief Sends the command "Look" to the socket, sets player.look to True, and adds the command to the player's queue.
 ## @param client_socket Socket to which the command is sent.
@@ -200,407 +1024,111 @@ def turning_left(client_socket, player):
 ##
 ##       This function sends the "Look" command to the specified client socket, sets player.look to True, and appends the command to player.queue.
 def looking(client_socket, player):
-    data_send = "Look\n"
-    # print(f"Sending : {data_send}", end="")
-    client_socket.send(data_send.encode())
+    send_command(client_socket, player, Command.LOOK)
     player.look = True
-    player.queue.append(data_send)
+
+## @brief Asks for the next view, from memory when possible.
+## @param client_socket Socket to which the Look is sent.
+## @param player Player class containing queue, tracker, world and look.
+##
+##       When the WorldMap saw the whole vision cone of the tile the queued moves
+##       lead to less than FRESH_TICKS ago, no Look is sent: command_send rebuilds
+##       the view from memory once the moves are answered.
+def look_ahead(client_socket, player):
+    if player.world != None :
+        destination = player.tracker.predict(pending_codes(player.queue))
+        if player.world.fresh(destination, player.level, player.clock.now()) == True :
+            player.look = True
+            player.recall = True
+            return
+    looking(client_socket, player)
 
 ## @brief Checks if there is a stone still needed by the player at a given index in player.view.
 ## @param player Player class instance containing view and stone-related attributes.
 ## @param index Index in the player's view to check for needed stones.
+## @param view View to check, parsed from player.view when not given.
 ## @return The name of the needed stone if found, otherwise None.
 ##
 ##       This function checks the specified index in player.view for stones
 ##       that the player still needs. If a needed stone is found, its name 
 ##       is returned; otherwise, None is returned.
-def check_stones(player, index):
-    if 0 <= index < len(player.view):
-        items = player.view[index].split()
-        for item in items:
-            if item == "food":
-                return "food"
-            if item == "linemate" and player.linemate < player.max_linemate:
-                return "linemate"
-            elif item == "deraumere" and player.deraumere < player.max_deraumere:
-                return "deraumere"
-            elif item == "sibur" and player.sibur < player.max_sibur:
-                return "sibur"
-            elif item == "mendiane" and player.mendiane < player.max_mendiane:
-                return "mendiane"
-            elif item == "phiras" and player.phiras < player.max_phiras:
-                return "phiras"
-            elif item == "thystame" and player.thystame < player.max_thystame:
-                return "thystame"
+def check_stones(player, index, view=None):
+    if view is None :
+        view = as_view(player.view)
+    if view.count(index, "food") > 0 :
+        return "food"
+    inventory, needs = player.inventory, player.needs
+    for stone, resource in zip(STONES, STONE_INDEXES):
+        if view.count(index, stone) > 0 and inventory[resource] < needs[resource]:
+            return stone
     return None
 
-## @brief Checks if the player can evolve to level three.
-## @param player Player class instance containing view, linemate, deraumere, sibur, starve, and queue.
-## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level three, otherwise False.
-## 
-##       This function checks if the player has the necessary items to evolve to level three.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
-def check_level_two(player, client_socket) :
-    if (not 0 in find_keyword_in_list(player.view, "linemate")) and player.linemate == 0 :
-        return False
-    if (not 0 in find_keyword_in_list(player.view, "deraumere")) and player.deraumere == 0 :
-        return False
-    if (not 0 in find_keyword_in_list(player.view, "sibur")) and player.sibur == 0 :
-        return False
-    
-    if player.starve == None:
-        data_send = "Inventory\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        return False
-    elif player.starve < 16 :
-        player.just_inc = False
-        player.starve = None
-        return False
+## @brief Computes the stones missing for an elevation.
+## @param player Player class containing view and the stone attributes.
+## @param level Level the elevation starts from.
+## @param view View of the player, parsed from player.view when not given.
+## @return List aligned on STONES: required minus (tile 0 plus inventory), never negative.
+def deficit(player, level, view=None):
+    if view is None :
+        view = as_view(player.view)
+    inventory = player.inventory
+    return [max(required - view.count(0, stone) - inventory[resource], 0)
+            for stone, resource, required in zip(STONES, STONE_INDEXES, ELEVATION[level].stones)]
 
-    if (not 0 in find_keyword_in_list(player.view, "sibur")) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    if (not 0 in find_keyword_in_list(player.view, "deraumere")) :
-        player.deraumere -= 1
-        data_send = "Set deraumere\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    if (not 0 in find_keyword_in_list(player.view, "linemate")) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    return True
-
-## @brief Checks if the player can evolve to level four.
-## @param player Player class instance containing view, linemate, deraumere, sibur, phiras, starve, and queue.
+## @brief Checks if the player can start the elevation from a level, and drops the missing stones.
+## @param player Player class instance containing view, the stone attributes, starve, and queue.
 ## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level four, otherwise False.
+## @param level Level the elevation starts from, 2 to 7.
+## @return True if the player can evolve, otherwise False.
 ##
-##       This function checks if the player has the necessary items to evolve to level four.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
-def check_level_three(player, client_socket) :
-    l = player.view[0].count("linemate")
-    if (l + player.linemate) < 2:
-        return False
-    s = player.view[0].count("sibur")
-    if (s + player.sibur) < 1 :
+##       The stones of tile 0 plus the inventory must cover the ELEVATION requirement.
+##       If the food is unknown an inventory request is sent, and if the life left once the
+##       queued commands are done (time_left) is below the requirement the evolution is halted. Otherwise the exact Set batch completing
+##       tile 0 is sent.
+def check_level(player, client_socket, level) :
+    elevation = ELEVATION[level]
+    view = as_view(player.view)
+    if any(deficit(player, level, view)) :
         return False
-    p = player.view[0].count("phiras")
-    if (p + player.phiras) < 2:
-        return False
-    
+
     if player.starve == None:
-        data_send = "Inventory\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
+        player.inventory_b = False
+        send_command(client_socket, player, Command.INVENTORY)
         return False
-    elif player.starve < 18 :
+    elif time_left(player) < elevation.food * FOOD_TIME_UNITS :
         player.just_inc = False
-        player.starve = None
         return False
 
-    while (l < 2) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        l += 1
-    if (s < 1) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    while (p < 2) :
-        player.phiras -= 1
-        data_send = "Set phiras\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        p += 1
+    inventory = player.inventory
+    for stone, resource, required in zip(STONES, STONE_INDEXES, elevation.stones):
+        for _ in range(required - view.count(0, stone)):
+            inventory[resource] -= 1
+            send_command(client_socket, player, SET_COMMANDS[resource])
     return True
 
-## @brief Checks if the player can evolve to level five.
-## @param player Player class instance containing view, linemate, deraumere, sibur, phiras, starve, and queue.
-## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level five, otherwise False.
-##
-##       This function checks if the player has the necessary items to evolve to level five.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
+## @brief Checks if the player can evolve to level three, see check_level.
+def check_level_two(player, client_socket) :
+    return check_level(player, client_socket, 2)
+
+## @brief Checks if the player can evolve to level four, see check_level.
+def check_level_three(player, client_socket) :
+    return check_level(player, client_socket, 3)
+
+## @brief Checks if the player can evolve to level five, see check_level.
 def check_level_four(player, client_socket) :
-    l = player.view[0].count("linemate")
-    if (l + player.linemate) < 1:
-        return False
-    d = player.view[0].count("deraumere")
-    if (d + player.deraumere) < 1:
-        return False
-    s = player.view[0].count("sibur")
-    if (s + player.sibur) < 2 :
-        return False
-    p = player.view[0].count("phiras")
-    if (p + player.phiras) < 1:
-        return False
-    if player.starve == None:
-        data_send = "Inventory\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        return False
-    elif player.starve < 25 :
-        player.just_inc = False
-        player.starve = None
-        return False
-    if (l < 1) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        # l += 1
-    if (d < 1) :
-        player.deraumere -= 1
-        data_send = "Set deraumere\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    while (s < 2) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        s += 1
-    if (p < 1) :
-        player.phiras -= 1
-        data_send = "Set phiras\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        # p += 1
-    return True
+    return check_level(player, client_socket, 4)
 
-## @brief Checks if the player can evolve to level six.
-## @param player Player class instance containing view, linemate, deraumere, sibur, mendiane, starve, and queue.
-## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level six, otherwise False.
-##
-##       This function checks if the player has the necessary items to evolve to level six.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
+## @brief Checks if the player can evolve to level six, see check_level.
 def check_level_five(player, client_socket) :
-    l = player.view[0].count("linemate")
-    if (l + player.linemate) < 1:
-        return False
-    d = player.view[0].count("deraumere")
-    if (d + player.deraumere) < 2:
-        return False
-    s = player.view[0].count("sibur")
-    if (s + player.sibur) < 1 :
-        return False
-    m = player.view[0].count("mendiane")
-    if (m + player.mendiane) < 3:
-        return False
-    
-    if player.starve == None:
-        data_send = "Inventory\n"
-        # player.inventory_b = False
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        return False
-    elif player.starve < 25 :
-        player.just_inc = False
-        player.starve = None
-        return False
-    
-    if (l < 1) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    while (d < 2) :
-        player.deraumere -= 1
-        data_send = "Set deraumere\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        d += 1
-    if (s < 1) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        # s += 1
-    while (m < 3) :
-        player.mendiane -= 1
-        data_send = "Set mendiane\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        m += 1
-    return True
+    return check_level(player, client_socket, 5)
 
-## @brief Checks if the player can evolve to level seven.
-## @param player Player class instance containing view, linemate, deraumere, sibur, phiras, starve, and queue.
-## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level seven, otherwise False.
-##
-##       This function checks if the player has the necessary items to evolve to level seven.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
+## @brief Checks if the player can evolve to level seven, see check_level.
 def check_level_six(player, client_socket) :
-    l = player.view[0].count("linemate")
-    if (l + player.linemate) < 1:
-        return False
-    d = player.view[0].count("deraumere")
-    if (d + player.deraumere) < 2:
-        return False
-    s = player.view[0].count("sibur")
-    if (s + player.sibur) < 3 :
-        return False
-    p = player.view[0].count("phiras")
-    if (p + player.phiras) < 1:
-        return False
-    
-    if player.starve == None:
-        data_send = "Inventory\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        return False
-    elif player.starve < 30 :
-        player.just_inc = False
-        player.starve = None
-        return False
-    
-    if (l < 1) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        # l += 1
-    while (d < 2) :
-        player.deraumere -= 1
-        data_send = "Set deraumere\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        d += 1
-    while (s < 3) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        s += 1
-    if (p < 1) :
-        player.phiras -= 1
-        data_send = "Set phiras\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        # p += 1
-    return True
+    return check_level(player, client_socket, 6)
 
-## @brief Checks if the player can evolve to level eight.
-## @param player Player class instance containing view, linemate, deraumere, sibur, mendiane, phiras, thystame, starve, and queue.
-## @param client_socket Socket to which the commands are sent.
-## @return True if the player can evolve to level eight, otherwise False.
-##
-##       This function checks if the player has the necessary items to evolve to level eight.
-##       If the required items are not in the player's view or inventory, it sends an 
-##       inventory request. If the player has insufficient food, the evolution is halted.
+## @brief Checks if the player can evolve to level eight, see check_level.
 def check_level_seven(player, client_socket) :
-    l = player.view[0].count("linemate")
-    if (l + player.linemate) < 2:
-        return False
-    d = player.view[0].count("deraumere")
-    if (d + player.deraumere) < 2:
-        return False
-    s = player.view[0].count("sibur")
-    if (s + player.sibur) < 2 :
-        return False
-    p = player.view[0].count("phiras")
-    if (p + player.phiras) < 2:
-        return False
-    m = player.view[0].count("mendiane")
-    if (m + player.mendiane) < 2 :
-        return False
-    t = player.view[0].count("thystame")
-    if (t + player.thystame) < 1:
-        return False
-    
-    if player.starve == None:
-        data_send = "Inventory\n"
-        player.inventory_b = False
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        return False
-    elif player.starve < 30:
-        player.starve = None
-        player.just_inc = False
-        return False
-
-    while (l < 1) :
-        player.linemate -= 1
-        data_send = "Set linemate\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        l += 1
-    while (d < 2) :
-        player.deraumere -= 1
-        data_send = "Set deraumere\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        d += 1
-    while (s < 2) :
-        player.sibur -= 1
-        data_send = "Set sibur\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        s += 1
-    while (p < 2) :
-        player.phiras -= 1
-        data_send = "Set phiras\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        p += 1
-    while (m < 2) :
-        player.mendiane -= 1
-        data_send = "Set mendiane\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-        m += 1
-    if (t < 1) :
-        player.thystame -= 1
-        data_send = "Set thystame\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
-    return True
+    return check_level(player, client_socket, 7)
 
 ## @brief Checks if the conditions are met to evolve, if so set player.incanting to true and adds the request to evolve to player.queue.
 ## @param client_socket Socket where to send the string.
@@ -613,106 +1141,27 @@ def check_level_seven(player, client_socket) :
 def can_evolve(client_socket, player):
     if player.incanting == True or player.need_to_go != None or player.should_stop == 1 :
         return False
-    if player.view != [] :
+    if player.view :
+        view = as_view(player.view)
         if player.level == 1:
-            if player.view[0].count("player") >= 2:
+            if view.count(0, "player") >= 2:
                 return False
-            if player.view[0].count("linemate") >= 1:
-                data_send = "Incantation\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
+            if view.count(0, "linemate") >= 1:
+                send_command(client_socket, player, Command.INCANTATION)
                 player.incanting = True
                 return True
             else :
                 return False
-        elif player.level == 2 :
-            if player.view[0].count("player") >= 2:
+        elif player.level <= 7 :
+            crowded = view.count(0, "player") >= 2
+            if crowded and (player.level <= 4 or (player.level <= 6 and player.just_inc == False)):
                 return False
             if player.wants_incanting == True :
                 return True
-            if check_level_two(player, client_socket) :
+            if check_level(player, client_socket, player.level) :
                 player.wants_incanting = True
                 player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
-                return True
-            else :
-                return False
-        elif player.level == 3 :
-            if player.view[0].count("player") >= 2:
-                return False
-            if player.wants_incanting == True :
-                return True
-            if check_level_three(player, client_socket) :
-                player.wants_incanting = True
-                player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
-                return True
-            else :
-                return False
-        elif player.level == 4 :
-            if player.view[0].count("player") >= 2:
-                return False
-            if player.wants_incanting == True :
-                return True
-            if check_level_four(player, client_socket) :
-                player.wants_incanting = True
-                player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
-                return True
-            else :
-                return False
-        elif player.level == 5 :
-            if player.view[0].count("player") >= 2 and player.just_inc == False:
-                return False
-            # player.just_inc = False
-            if player.wants_incanting == True :
-                return True
-            if check_level_five(player, client_socket) :
-                player.wants_incanting = True
-                player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
-                return True
-            else :
-                return False
-        elif player.level == 6 :
-            if player.view[0].count("player") >= 2 and player.just_inc == False:
-                return False
-            # player.just_inc = False
-            if player.wants_incanting == True :
-                return True
-            if check_level_six(player, client_socket) :
-                player.wants_incanting = True
-                player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
-                return True
-            else :
-                return False
-        elif player.level == 7 :
-            if player.wants_incanting == True :
-                return True
-            if check_level_seven(player, client_socket) :
-                player.wants_incanting = True
-                player.nb_r = 1
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
+                send_command(client_socket, player, broadcast_command(player.level, "r"))
                 return True
             else :
                 return False
@@ -725,163 +1174,389 @@ def can_evolve(client_socket, player):
 ## @param player Player class containing look and view.
 ## @param data_rec String containing 'ko' or a long string.
 ##
-##       Sets player.look to False if data is 'ko', otherwise updates player.view with the result of split_by_commas.
+##       Sets player.look to False if data is 'ko', otherwise parses the reply once into a View
+##       stored in player.view.
 def received_look(player, data_rec):
-    if data_rec.decode() == "ko\n" :
+    reply = data_rec.decode()
+    if reply == "ko\n" :
         player.look = False
     else :
-        player.view = split_by_commas(data_rec.decode())
+        player.view = View.parse(reply)
+        player.tile_players = max(player.view.count(0, "player"), 1)
+        if player.world != None :
+            player.world.record(player.tracker, player.view, player.ticks)
 
 ## @brief Reduces the maximum number of resources required for the player to evolve to the max level based on their current level.
 ## @param player Player class containing max_* attributes.
 def reduce_max(player):
-    if player.level == 2:
-        player.max_linemate -= 1
-    elif player.level == 3:
-        player.max_linemate -= 1
-        player.max_deraumere -= 1
-        player.max_sibur -= 1
-    elif player.level == 4:
-        player.max_linemate -= 2
-        player.max_sibur -= 1
-        player.max_phiras -= 2
-    elif player.level == 5:
-        player.max_linemate -= 1
-        player.max_deraumere -= 1
-        player.max_sibur -= 2
-        player.max_phiras -= 1
-    elif player.level == 6:
-        player.max_linemate -= 1
-        player.max_deraumere -= 2
-        player.max_sibur -= 1
-        player.max_mendiane -= 3
-    elif player.level == 7:
-        player.max_linemate -= 1
-        player.max_deraumere -= 2
-        player.max_sibur -= 3
-        player.max_phiras -= 1
-    elif player.level == 8:
-        player.max_linemate -= 2
-        player.max_deraumere -= 2
-        player.max_sibur -= 2
-        player.max_mendiane -= 2
-        player.max_phiras -= 2
-        player.max_thystame -= 1
-
-## @brief Updates the player's food quantity based on the received inventory data.
-## @param player Player class containing starve attribute.
+    if 2 <= player.level <= 8 :
+        needs = player.needs
+        for resource, required in zip(STONE_INDEXES, ELEVATION[player.level - 1].stones):
+            needs[resource] -= required
+
+## @brief Updates the player's food and stones based on the received inventory data.
+## @param player Player class containing starve and the stone attributes.
 ## @param data_rec String containing inventory data.
+##
+##       The reply is the reference the ledger is reconciled against: every resource
+##       listed overwrites the local count and the ledger starts over.
 def inventory(player, data_rec):
     data = split_by_commas(data_rec)
     for item in data:
-        if item.startswith("food"):
-            _, quantity = item.split()
-            player.starve = int(quantity)
+        words = item.split()
+        if len(words) != 2 or words[0] not in RESOURCE_INDEX or not words[1].isdigit() :
+            continue
+        resource = RESOURCE_INDEX[words[0]]
+        if resource == Resource.FOOD :
+            player.starve = int(words[1])
+            player.elapsed = 0
+            player.ledger_age = 0
             # print(f"I have {player.starve} food at level {player.level}.")
+        else :
+            player.inventory[resource] = int(words[1])
+
+## @brief Accounts the time spent by an action in the food ledger.
+## @param player Player class containing starve and elapsed.
+## @param cost Time units spent.
+##
+##       A food is eaten every FOOD_TIME_UNITS time units, so the known food count is
+##       kept current between two Inventory replies.
+def spend_time(player, cost):
+    player.ticks += cost
+    player.elapsed += cost
+    while player.elapsed >= FOOD_TIME_UNITS :
+        player.elapsed -= FOOD_TIME_UNITS
+        if player.starve != None and player.starve > 0 :
+            player.starve -= 1
+
+## Time units of life kept in reserve: below it the player only gathers food.
+FOOD_RESERVE = 10 * FOOD_TIME_UNITS
+
+## Food a level 8 player wants before it spends its time laying eggs and wandering.
+LEVEL_EIGHT_FOOD = 30
+
+## @brief Computes how long the player will live once the queued commands are executed.
+## @param player Player class containing starve, elapsed and queue.
+## @return Remaining life in time units, None while the food count is unknown.
+##
+##       The ledger knows the food count and the time spent since the last food was eaten,
+##       and every queued command will spend its cost before any new decision takes effect.
+##       While nothing is queued, the time the clock saw pass since the last reply is spent too.
+def time_left(player):
+    if player.starve == None :
+        return None
+    committed = 0
+    for entry in player.queue:
+        committed += entry.cost
+    if not player.queue :
+        committed = max(player.clock.now() - player.ticks, 0)
+    return player.starve * FOOD_TIME_UNITS - player.elapsed - committed
+
+## @brief Tells if the player must gather food before anything else.
+## @param player Player class containing starve, elapsed and queue.
+## @return True if the remaining life is below FOOD_RESERVE.
+def hungry(player):
+    left = time_left(player)
+    return left != None and left < FOOD_RESERVE
+
+## @brief Drops the rally the player calls or follows.
+## @param player Player class containing the rally state.
+##
+##       A hungry player leaves the rally to gather food, it calls or joins a new one
+##       once fed.
+def leave_rally(player):
+    player.nb_r = 0
+    player.wants_incanting = False
+    player.need_to_go = None
+    player.should_stop = None
+    player.steering.reset()
+
+## @brief Updates the local ledger with the reply to the oldest queued command.
+## @param player Player class containing queue, starve and the stone attributes.
+## @param data_rec Decoded reply.
+##
+##       Take only counts when the server answered ok and a refused Set gives the stone
+##       back. The estimate is kept as it is every RECONCILE_EVERY answered commands, and
+##       the next decision asks the server for an Inventory to correct it.
+def update_ledger(player, data_rec):
+    code = player.queue[0].code
+    spend_time(player, COMMAND_COST[code])
+    action, resource = COMMAND_RESOURCE[code]
+    if action == TAKE_FOOD_CODE and data_rec == "ok\n" :
+        if resource == Resource.FOOD :
+            if player.starve != None :
+                player.starve += 1
+        else :
+            player.inventory[resource] += 1
+    elif action == SET_FOOD_CODE and data_rec == "ko\n" and resource != Resource.FOOD :
+        player.inventory[resource] += 1
+    player.ledger_age += 1
+    if player.ledger_age % RECONCILE_EVERY == 0 :
+        player.reconcile = True
+
+## @brief Sends the Inventory the ledger is due for, unless one is already pending.
+## @param client_socket Socket (or CommandScheduler) where to send the command.
+## @param player Player class containing reconcile and queue.
+##
+##       The reply resets ledger_age; if it never comes, the ledger is due again
+##       RECONCILE_EVERY replies later.
+def reconcile_ledger(client_socket, player):
+    player.reconcile = False
+    for entry in player.queue:
+        if entry.code == Command.INVENTORY :
             return
+    send_command(client_socket, player, Command.INVENTORY)
 
-## @brief Checks the received data to determine the appropriate action.
-## @param player Player class containing various attributes related to the game state.
-## @param data_rec String containing the received data which could be 'ko', 'dead', 'Elevation underway', 'Current level', or other instructions.
-## @return -1 if the player is dead, otherwise 0.
-def command_received(player, data_rec):
-    # print(f"Received: {data_rec.decode()}", end="")
+## @brief Handles an Inventory reply.
+## @param player Player class containing the stone attributes and inventory_b.
+## @param data_rec Bytes of the reply.
+def received_inventory(player, data_rec):
+    inventory(player, data_rec.decode())
+    player.inventory_b = True
 
-    if data_rec.decode() == "end\n" :
-        return -10
-    if data_rec.decode() == "dead\n" :
-        return -1
-    if data_rec.decode() == "Elevation underway\n":
-        return 0
+## @brief Handles the reply to a level broadcast.
+## @param player Player class containing should_stop.
+## @param data_rec Bytes of the reply.
+def received_broadcast(player, data_rec):
+    if player.should_stop == None :
+        player.should_stop = 2
 
-    if "message" in data_rec.decode() :
-        words = data_rec.decode().replace('"', '').replace(',', '').split()
-        if len(words) > 4 and words[0] == "message" and words[2] == "Level" :
-            player_num = words[1]
-            player_level = words[3]
-            if int(player_level) == int(player.level):
-                if words[4] == "c" :
-                    player.nb_r += 1
-                    if incant_nb(player) and (player.need_to_go != 0 and player.wants_incanting == False) :
-                        player.need_to_go = None 
-                        player.nb_r = 0
-                        player.should_stop = None
-                        return 0
-                elif words[4] == "r" :
-                    player.follow = 0
-                    if player.should_stop == None and player.wants_incanting == False :
-                        player.should_stop = 1
-                    player.need_to_go = int(player_num)
-                if player.nb_r == 0 :
-                    player.nb_r = 1
-        return 0
-    
-    if data_rec.decode() == f"Current level: {player.level + 1}\n" :
-        player.level += 1   
+## @brief Handles a Look reply, unless the view was already rebuilt.
+## @param player Player class containing look and view.
+## @param data_rec Bytes of the reply.
+def received_view(player, data_rec):
+    if player.look == True and not player.view :
+        received_look(player, data_rec)
+
+## @brief Handles an Incantation the server refused.
+## @param player Player class containing the incantation state.
+## @param data_rec Bytes of the reply.
+def received_incantation(player, data_rec):
+    if data_rec == b"ko\n" :
         player.view = []
         player.look = False
+        player.recall = False
         player.nb_r = 0
         player.wants_incanting = False
         player.incanting = False
         player.need_to_go = None
-        player.starve = None
-        reduce_max(player)
-        if len(player.queue) > 0 :
-            if player.queue[0] == "Incantation\n":
-                player.just_inc = True
-                player.queue.pop(0)
-            else :
-                player.just_inc = False
-        else :
-            player.just_inc = False
-        # print(f"Player got level : {player.level}", file=sys.stderr)
         player.should_stop = None
-        player.plant = True
+
+## Handler of the reply to every command, indexed by its Command code, None when the
+## ledger, the tracker and the WorldMap are all the reply changes.
+REPLY_HANDLERS = tuple(
+    received_inventory if code == Command.INVENTORY
+    else received_view if code == Command.LOOK
+    else received_incantation if code == Command.INCANTATION
+    else received_broadcast if code >= Command.BROADCAST_1_R
+    else None
+    for code in Command
+)
+
+## @brief Tells if a line is the reply a command waits for.
+## @param code Command code of the oldest pending command.
+## @param reply Decoded line.
+## @return True if the line answers the command.
+##
+##       Look and Inventory answer a bracketed list, Connect_nbr a number and every
+##       other command ok. Anything can be refused with ko.
+def answers(code, reply):
+    if reply == "ko\n" :
+        return True
+    if not DATA_REPLIES[code] :
+        return reply == "ok\n"
+    if code == Command.CONNECT_NBR :
+        return reply.strip().isdigit()
+    return reply.startswith("[")
+
+## @brief Resolves the oldest pending command with its reply.
+## @param player Player class containing queue.
+## @param data_rec Bytes of the reply.
+## @param reply Decoded reply.
+def resolve_reply(player, data_rec, reply):
+    entry = player.queue[0]
+    update_ledger(player, reply)
+    player.clock.reply(entry.cost, player.ticks, len(player.queue) - 1)
+    if reply == "ok\n" :
+        player.tracker.confirm(entry.code)
+    if player.world != None :
+        player.world.update(player.tracker, entry.code, reply)
+    handler = REPLY_HANDLERS[entry.code]
+    if handler != None :
+        handler(player, data_rec)
+    player.queue.popleft()
+    entry.resolve(reply)
+
+## Level broadcast of another player: direction K, level and state.
+## The server may keep the quotes of the Broadcast around the text.
+MESSAGE_PATTERN = re.compile(rb'message (\d+), "?Level (\d+) ([rc])')
+
+## Text every level broadcast of a level contains, indexed by level, searched before any parsing.
+LEVEL_TAGS = tuple(b"Level %d " % level for level in range(MAX_LEVEL + 1))
+
+## @brief Handles a broadcast of another player.
+## @param player Player class containing the rally state.
+## @param data_rec Bytes of the "message K, text" line.
+## @return 0, a broadcast never ends the game.
+##
+##       Broadcasts of other levels and of other teams are dropped by a substring
+##       search before the line is parsed.
+def received_message(player, data_rec):
+    if not 1 <= player.level <= MAX_LEVEL or LEVEL_TAGS[player.level] not in data_rec :
+        return 0
+    match = MESSAGE_PATTERN.match(data_rec)
+    if match == None or int(match[2]) != player.level :
+        return 0
+    if match[3] == b"c" :
+        player.nb_r += 1
+        if incant_nb(player) and (player.need_to_go != 0 and player.wants_incanting == False) :
+            player.need_to_go = None 
+            player.nb_r = 0
+            player.should_stop = None
+            return 0
+    else :
+        player.follow = player.clock.now()
+        if player.should_stop == None and player.wants_incanting == False :
+            player.should_stop = 1
+        player.need_to_go = int(match[1])
+        player.steering.fix(player.tracker, player.need_to_go, player.follow)
+    if player.nb_r == 0 :
+        player.nb_r = 1
+    return 0
+
+## @brief Handles the end of an incantation the player took part in.
+## @param player Player class containing level and queue.
+## @param data_rec Bytes of the "Current level: N" line.
+## @return 0, a level up never ends the game.
+##
+##       It answers the Incantation of the player who started it, and reaches the
+##       others on its own.
+def received_level(player, data_rec):
+    player.elevating = None
+    initiator = len(player.queue) > 0 and player.queue[0].code == Command.INCANTATION
+    if initiator :
+        player.queue.popleft().resolve(data_rec.decode())
+    if data_rec != b"Current level: %d\n" % (player.level + 1) :
+        player.clock.freeze()
         return 0
+    player.level += 1   
+    player.view = []
+    player.look = False
+    player.recall = False
+    player.nb_r = 0
+    player.wants_incanting = False
+    player.incanting = False
+    player.need_to_go = None
+    player.steering.reset()
+    spend_time(player, COMMAND_COST[Command.INCANTATION])
+    player.clock.resync(player.ticks)
+    reduce_max(player)
+    player.just_inc = initiator
+    # print(f"Player got level : {player.level}", file=sys.stderr)
+    player.should_stop = None
+    player.plant = True
+    return 0
+
+## @brief Handles the start of an incantation the player takes part in.
+## @param player Player class containing clock, queue, elevating and frozen_entry.
+## @param data_rec Bytes of the "Elevation underway" line.
+## @return 0, an incantation never ends the game.
+##
+##       The player is frozen until the incantation ends, so the gap before the next
+##       reply tells nothing about the time unit. A player who did not start it gets
+##       a ko if it fails, which must not resolve its own oldest command. The command
+##       the server was running still answers first, with its own ok or ko.
+def received_elevation(player, data_rec):
+    player.clock.freeze()
+    if len(player.queue) == 0 or player.queue[0].code != Command.INCANTATION :
+        player.elevating = player.clock.now()
+        player.frozen_entry = player.queue[0] if player.queue else None
+    return 0
 
-    if player.follow > 5 and player.should_stop == 1 and player.need_to_go == None :
+## @brief Tells if a ko ends an incantation the player was frozen by, instead of answering a command.
+## @param player Player class containing clock, queue, elevating and frozen_entry.
+## @param reply Decoded line.
+## @return True if the line must be dropped.
+##
+##       The wait is given up after ELEVATION_TIMEOUT, for servers that never send that ko.
+def elevation_ko(player, reply):
+    if player.clock.now() - player.elevating > ELEVATION_TIMEOUT :
+        player.elevating = None
+        return False
+    if reply != "ko\n" :
+        return False
+    if len(player.queue) > 0 and player.queue[0] is player.frozen_entry :
+        return False
+    player.elevating = None
+    return True
+
+## @brief Handles an ejection.
+## @param player Player class containing tracker.
+## @param data_rec Bytes of the "eject: K" line.
+## @return 0, an ejection never ends the game.
+def received_eject(player, data_rec):
+    direction = data_rec[7:].strip()
+    if direction.isdigit() :
+        player.tracker.ejected(int(direction))
+    return 0
+
+## Handlers of the lines the server sends on its own, indexed by the first byte of the line.
+## Each entry lists (prefix, handler) pairs; a handler returns the status command_received returns.
+UNSOLICITED = {
+    ord("m"): ((b"message ", received_message),),
+    ord("e"): ((b"eject: ", received_eject), (b"end\n", lambda player, data_rec: -10)),
+    ord("d"): ((b"dead\n", lambda player, data_rec: -1),),
+    ord("E"): ((b"Elevation underway\n", received_elevation),),
+    ord("C"): ((b"Current level: ", received_level),),
+}
+
+## @brief Handles a line the server sends on its own, answering no command.
+## @param player Player class containing various attributes related to the game state.
+## @param data_rec Bytes of the line.
+## @return -10 at the end of the game, -1 if the player is dead, 0 for any other
+##         unsolicited line and None if the line is a reply.
+##
+##       The line is dispatched on its raw bytes: replies, which start with o, k, [
+##       or a digit, cost one dictionary lookup and are never decoded here.
+def received_unsolicited(player, data_rec):
+    if not data_rec :
+        return None
+    for prefix, handler in UNSOLICITED.get(data_rec[0], ()):
+        if data_rec.startswith(prefix) :
+            return handler(player, data_rec)
+    return None
+
+## @brief Checks the received data to determine the appropriate action.
+## @param player Player class containing various attributes related to the game state.
+## @param data_rec String containing the received data which could be 'ko', 'dead', 'Elevation underway', 'Current level', or other instructions.
+## @return -1 if the player is dead, otherwise 0.
+##
+##       Lines the server sends on its own go to received_unsolicited. Any other line
+##       resolves the oldest pending command if it answers it, and is dropped otherwise
+##       so that a stray line never shifts the replies of the next commands.
+def command_received(player, data_rec):
+    # print(f"Received: {data_rec.decode()}", end="")
+    status = received_unsolicited(player, data_rec)
+    if status != None :
+        return status
+    reply = data_rec.decode()
+    if player.elevating != None and elevation_ko(player, reply) :
+        return
+
+    if player.should_stop == 1 and player.need_to_go == None and player.clock.now() - player.follow > RALLY_TIMEOUT :
         player.nb_r = 0
         player.wants_incanting = False
         player.incanting = False
         player.should_stop = None
 
-    if len(player.queue) > 0 :
-        player.follow += 1
-        if "Inventory" in player.queue[0] :
-            inventory(player, data_rec.decode())
-            player.inventory_b = True
-        if "Broadcast" in player.queue[0] :
-            if player.should_stop == None :
-                player.should_stop = 2
-            player.queue.pop(0)
-            return 0
-        if "Take" in player.queue[0]:
-            item = player.queue[0].split()[1]
-            if hasattr(player, item):
-                setattr(player, item, getattr(player, item) + 1)
-            player.queue.pop(0)
-            return 0
-        if player.look == True and player.view == [] and player.queue[0] == "Look\n":
-            received_look(player, data_rec)
-        if player.queue[0] == "Incantation\n" and data_rec.decode() == "ko\n":
-            player.view = []
-            player.look = False
-            player.nb_r = 0
-            player.wants_incanting = False
-            player.starve = None
-            player.incanting = False
-            player.need_to_go = None
-            player.should_stop = None
-        player.queue.pop(0)
+    if len(player.queue) > 0 and answers(player.queue[0].code, reply) :
+        resolve_reply(player, data_rec, reply)
     
 ## @brief Sends a command to plant an egg.
 ## @param client_socket Socket used to send the command.
 ## @param player Player class containing queue.
 def plant_egg(client_socket, player):
-    data_send = "Fork\n"
-    # print(f"Sending : {data_send}", end="")
-    client_socket.send(data_send.encode())
-    player.queue.append(data_send)
+    send_command(client_socket, player, Command.FORK)
 
 ## @brief Make a random move to avoid clustering of players.
 ## @param client_socket The socket used to communicate with the server.
@@ -903,170 +1578,172 @@ def make_random_move(client_socket, player):
     ]
 
     for _ in range(2):
-        move = random.choice(moves)
+        move = player.random.choice(moves)
         if move is not None:
             move(client_socket, player)
 
+## Food wanted by plan_gathering: there is no limit to the food worth taking.
+FOOD_WANTED = 1 << 15
+
+## Legs already computed by route_leg, keyed by (heading, dx, dy).
+ROUTE_LEGS = {}
+
+## @brief Cached route: the same legs come back on every plan.
+## @param heading Index in HEADINGS the player faces.
+## @param dx Columns to move, growing eastward.
+## @param dy Rows to move, growing southward.
+## @return Tuple of Command codes, as route gives them.
+def route_leg(heading, dx, dy):
+    key = (heading, dx, dy)
+    leg = ROUTE_LEGS.get(key)
+    if leg == None :
+        leg = ROUTE_LEGS[key] = tuple(route(heading, dx, dy))
+    return leg
+
+## @brief Plans one route picking up food and the needed stones on several tiles of the view.
+## @param player Player class containing tracker, inventory and needs.
+## @param view View of the player.
+## @param budget Number of commands the route should fit in.
+## @return List of Command codes, moves and Takes, None if no tile holds anything useful.
+##
+##       The next stop is always the cheapest one to reach from where the previous stop
+##       left the player, and every item still wanted there is taken. Stops are added while
+##       the route fits in the budget; the first one is always planned. Offsets are taken
+##       in the player's frame (facing north), and wrapped along the axes of the map when
+##       its size is known, so a cone wider than the map finds the shortest way around.
+##       A hungry player only takes food.
+##
+##       Every move costs the same, so legs are compared by their length, which is never
+##       below the Manhattan distance: a stop that far cannot beat the best one found, and a
+##       stop that far from the remaining budget cannot be reached by any later leg either.
+def plan_gathering(player, view, budget):
+    tracker = player.tracker
+    if tracker.heading % 2 == 0 :
+        side_size, forward_size = tracker.width, tracker.height
+    else :
+        side_size, forward_size = tracker.height, tracker.width
+    if hungry(player) :
+        wanted = [FOOD_WANTED] + [0] * len(STONES)
+    else :
+        wanted = [FOOD_WANTED] + [max(player.needs[resource] - player.inventory[resource], 0) for resource in STONE_INDEXES]
+    counts = view.counts
+    stops = []
+    for index in range(1, len(view)):
+        base = index * VIEW_WIDTH
+        items = [(resource, count) for resource, count in enumerate(counts[base:base + len(RESOURCES)])
+                 if count and wanted[resource]]
+        if items :
+            stops.append((index, CONE_OFFSETS[index][1], -CONE_OFFSETS[index][0], items))
+    walker = Tracker()
+    commands = []
+    exhausted = False
+    while stops :
+        best = None
+        remaining = limit = budget - len(commands) if commands else float("inf")
+        reachable = []
+        for stop in stops:
+            index, stop_x, stop_y, items = stop
+            dx = stop_x - walker.x
+            dy = stop_y - walker.y
+            if side_size :
+                dx = (dx + side_size // 2) % side_size - side_size // 2
+            if forward_size :
+                dy = (dy + forward_size // 2) % forward_size - forward_size // 2
+            distance = abs(dx) + abs(dy)
+            if distance >= remaining :
+                continue
+            if exhausted and not any(wanted[resource] for resource, _ in items) :
+                continue
+            reachable.append(stop)
+            if distance >= limit :
+                continue
+            if not commands and dx == stop_x and dy == stop_y :
+                leg = CONE_ROUTES[index]
+            else :
+                leg = route_leg(walker.heading, dx, dy)
+            if len(leg) < limit :
+                best = (len(reachable) - 1, leg)
+                limit = len(leg)
+        if best == None :
+            break
+        position, leg = best
+        stops = reachable
+        takes = []
+        for resource, count in stops[position][3]:
+            count = min(count, wanted[resource])
+            if count > 0 :
+                takes += [TAKE_COMMANDS[resource]] * count
+        takes = takes[:max(budget - len(commands) - len(leg), 1)]
+        commands += leg
+        commands += takes
+        for code in takes:
+            wanted[code - Command.TAKE_FOOD] -= 1
+        walker = walker.predict(leg)
+        del stops[position]
+        exhausted = any(wanted[code - Command.TAKE_FOOD] == 0 for code in takes)
+    return commands or None
+
 ## @brief Checks with the information in player.view where to move.
 ## @param client_socket The socket used to communicate with the server.
 ## @param player The player object containing the state and attributes of the player.
 ## 
-##       This function decides the next move for the player based on the player's level and the
-##       objects in their view. It includes checks to avoid clustering by making a random move
-##       when there are too many players in the same position. It also handles special logic
+##       This function decides the next move for the player based on the objects in their view:
+##       plan_gathering walks through the tiles holding food or needed stones and takes them. It includes checks
+##       to avoid clustering by making a random move when there are too many players in the same position. It also handles special logic
 ##       for players at level 8 to either check their inventory or make strategic moves based
 ##       on their starvation level.
 def moving_level(client_socket, player):
-    indices = find_keyword_in_list(player.view, "food")
+    view = as_view(player.view)
 
     if player.level == 8 :
         if player.starve == None:
-            data_send = "Inventory\n"
             player.inventory_b = False
-            # print(f"Sending : {data_send}", end="")
-            client_socket.send(data_send.encode())
-            player.queue.append(data_send)
+            send_command(client_socket, player, Command.INVENTORY)
             return
-        elif player.starve > 30 :
-            player.starve = None
-            r = random.random()
+        elif time_left(player) > LEVEL_EIGHT_FOOD * FOOD_TIME_UNITS :
+            r = player.random.random()
             if r > 0.4 :
                 make_random_move(client_socket, player)
             else :
                 plant_egg(client_socket, player)
             return
-        player.starve = None
-    if player.view[0].count("player") > 1 :
+    if view.count(0, "player") > 1 :
         make_random_move(client_socket, player)
-    elif count_words_at_index(player.view, 2) > 0 and (check_stones(player, 2) != None or 2 in indices):
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 6) > 0 and (check_stones(player, 6) != None or 6 in indices) and player.level >= 2 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 12) > 0 and (check_stones(player, 12) != None or 12 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 1) > 0 and (check_stones(player, 1) != None or 1 in indices):
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 3) > 0 and (check_stones(player, 3) != None or 3 in indices):
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 5) > 0 and (check_stones(player, 5) != None or 5 in indices) and player.level >= 2 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 7) > 0 and (check_stones(player, 7) != None or 7 in indices) and player.level >= 2 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 4) > 0 and (check_stones(player, 4) != None or 4 in indices) and player.level >= 2 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 8) > 0 and (check_stones(player, 8) != None or 8 in indices) and player.level >= 2 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 11) > 0 and (check_stones(player, 11) != None or 11 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 13) > 0 and (check_stones(player, 13) != None or 13 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 10) > 0 and (check_stones(player, 10) != None or 10 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 14) > 0 and (check_stones(player, 14) != None or 14 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 10) > 0 and (check_stones(player, 10) != None or 10 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-    elif count_words_at_index(player.view, 14) > 0 and (check_stones(player, 14) != None or 14 in indices) and player.level >= 3 :
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
-        going_forward(client_socket, player)
     else :
-        make_random_move(client_socket, player)
-    player.look = False
+        commands = plan_gathering(player, view, MAX_PENDING - 1 - len(player.queue))
+        if commands == None :
+            make_random_move(client_socket, player)
+        else :
+            for code in commands:
+                send_command(client_socket, player, code)
     player.view = []
+    look_ahead(client_socket, player)
 
 ## @brief Directs the player to the required location based on the value of player.need_to_go.
 ## @param client_socket Socket used to send commands.
 ## @param player Player class containing attributes like need_to_go, level, etc.
+##
+##       The Steering turns the player toward the latest broadcast and keeps it walking
+##       between two of them. No Look is sent on the way: arriving is known from a
+##       broadcast heard on the own tile, direction 0.
 def go_to_need(client_socket, player):
     if player.need_to_go == 0 :
-        data_send = f"Broadcast \"Level {player.level} c\"\n"
         player.nb_r += 1
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        player.queue.append(data_send)
+        send_command(client_socket, player, broadcast_command(player.level, "c"))
         player.wants_incanting = True
         player.should_stop = None
-    elif player.need_to_go == 1 :
-        going_forward(client_socket, player)
-    elif player.need_to_go == 2 :
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 3 :
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 4 :
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 5 :
-        turning_left(client_socket, player)
-        turning_left(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 6 :
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 7 :
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    elif player.need_to_go == 8 :
-        going_forward(client_socket, player)
-        turning_right(client_socket, player)
-        going_forward(client_socket, player)
-    player.look = False
+        return
+    if any(entry.code in MOVE_COMMANDS for entry in player.queue) :
+        return
+    if player.steering.x == None :
+        player.steering.fix(player.tracker, player.need_to_go, player.clock.now())
+    commands = player.steering.step(player.tracker)
+    for code in commands:
+        send_command(client_socket, player, code)
     player.view = []
-    player.need_to_go = None
+    if not commands :
+        player.need_to_go = None
+        look_ahead(client_socket, player)
 
 ## @brief Determines the movement of the player based on their level and state.
 ## @param client_socket Socket where to potentially send information.
@@ -1083,14 +1760,22 @@ def moving_player(client_socket, player):
 ## @param player Player class containing the level and nb_r (number of players ready for incantation).
 ## @return True if the required number of players is met, otherwise False.
 def incant_nb(player):
-    if (player.level == 2 or player.level == 3) and player.nb_r >= 2 :
-        return True
-    if (player.level == 4 or player.level == 5) and player.nb_r >= 4 :
-        return True
-    if (player.level == 6 or player.level == 7) and player.nb_r >= 6 :
-        return True
+    if player.level in range(2, 8) :
+        return player.nb_r >= ELEVATION[player.level].players
     return False
 
+## @brief Tells if a decision on a view depends on the players standing on tile 0.
+## @param player Player class containing level, inventory and needs.
+## @param view View to decide on.
+## @return True if the player could evolve or pick up a stone there.
+##
+##       A view recalled from the WorldMap does not know who stands on tile 0, so
+##       command_send asks for a real Look whenever this is True.
+def crowd_matters(player, view):
+    if 1 <= player.level <= 7 and not any(deficit(player, player.level, view)) :
+        return True
+    return check_stones(player, 0, view) not in (None, "food") and not hungry(player)
+
 ## @brief Checks information in the player class to determine the appropriate command to execute.
 ## @param client_socket Socket used to send commands.
 ## @param player Player class containing various attributes indicating the player's state and actions.
@@ -1098,6 +1783,10 @@ def command_send(client_socket, player):
     if player.plant == True :
         plant_egg(client_socket, player)
         player.plant = False
+    if player.reconcile == True :
+        reconcile_ledger(client_socket, player)
+    if (player.wants_incanting == True or player.should_stop == 1) and hungry(player) :
+        leave_rally(player)
 
     if player.wants_incanting == True :
         if player.should_stop == 1 :
@@ -1106,89 +1795,427 @@ def command_send(client_socket, player):
             return
         else :
             if incant_nb(player) :
-                data_send = "Incantation\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
+                send_command(client_socket, player, Command.INCANTATION)
                 player.incanting = True
                 player.nb_r = 0
                 player.wants_incanting = False
                 return #evolve
             elif player.should_stop == 2 :
-                data_send = f"Broadcast \"Level {player.level} r\"\n"
-                # print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-                player.queue.append(data_send)
+                send_command(client_socket, player, broadcast_command(player.level, "r"))
 
-    if player.look == False : 
-        if len(player.queue) > 0 :
+    if player.recall == True and not any(entry.code in TILE_COMMANDS for entry in player.queue) :
+        view = player.world.view(player.tracker, player.level)
+        player.recall = False
+        if crowd_matters(player, view) :
+            player.view = []
+            if not any(entry.code == Command.LOOK for entry in player.queue) :
+                looking(client_socket, player)
             return
+        view.counts[VIEW_COLUMNS["player"]] = player.tile_players
+        player.view = view
+    if player.look == True and not player.view and player.recall == False and player.need_to_go == None :
+        if not any(entry.code == Command.LOOK for entry in player.queue) :
+            player.look = False
+    if player.look == False : 
         looking(client_socket, player)
     if can_evolve(client_socket, player) or player.incanting or player.wants_incanting :
         return
     if player.inventory_b == False :
         return
-    if player.look == True and player.view != [] :
-        if count_words_at_index(player.view, 0) > 0 and 0 in find_keyword_in_list(player.view, "food") :
+    if player.look == True and player.view :
+        view = as_view(player.view)
+        if view.count(0, "food") > 0 :
             send_and_remove(client_socket, player, 0, "food")
-        elif count_words_at_index(player.view, 0) > 0 :
+        elif view.resources(0) > 0 :
             stone = check_stones(player, 0)
-            if stone != None and player.view[0].count("player") < 2 :
+            if stone != None and view.count(0, "player") < 2 and not hungry(player) :
                 send_and_remove(client_socket, player, 0, stone)
             else :
                 moving_player(client_socket, player)
         else :
             moving_player(client_socket, player)
+    elif player.need_to_go != None :
+        moving_player(client_socket, player)
+
+## Incremental receive buffer splitting the server stream into complete lines.
+##
+##        Bytes are received straight into a reusable bytearray. Only the bytes that
+##        arrived since the last call are scanned for '\n', and a line is emitted only
+##        once its terminator arrived, so a reply split across two reads is never
+##        handed to command_received in pieces.
+class LineBuffer:
+
+    ## Class constructor of LineBuffer.
+    ## @param capacity Initial size of the buffer in bytes.
+    def __init__(self, capacity=8192):
+        ## The storage the data is received into.
+        self.data = bytearray(capacity)
+        ## Offset of the first byte not yet emitted as a line.
+        self.start = 0
+        ## Offset of the end of the received data.
+        self.end = 0
+        ## Offset up to which the data is known to contain no '\n'.
+        self.scanned = 0
+
+    ## @brief Returns a writable view on the free space at the end of the buffer.
+    ## @param minimum Minimum number of free bytes wanted.
+    ## @return memoryview on the free space.
+    ##
+    ##       Pending bytes are moved to the front of the buffer when the free space is
+    ##       too small, and the buffer doubles only when the pending line itself is too big.
+    def free(self, minimum=2048):
+        if self.start == self.end :
+            self.start = self.end = self.scanned = 0
+        if len(self.data) - self.end < minimum :
+            pending = self.end - self.start
+            if self.start > 0 :
+                self.data[:pending] = self.data[self.start:self.end]
+                self.scanned = max(self.scanned - self.start, 0)
+                self.start, self.end = 0, pending
+            if len(self.data) - self.end < minimum :
+                self.data.extend(bytes(max(len(self.data), minimum)))
+        return memoryview(self.data)[self.end:]
+
+    ## @brief Marks bytes written in the view returned by free as received.
+    ## @param size Number of bytes written.
+    def commit(self, size):
+        self.end += size
+
+    ## @brief Receives data from a socket directly into the buffer.
+    ## @param client_socket Socket to read from.
+    ## @return Number of bytes received, 0 when the connection is closed.
+    def read_from(self, client_socket):
+        with self.free() as view:
+            size = client_socket.recv_into(view)
+        self.commit(size)
+        return size
+
+    ## @brief Copies received data into the buffer.
+    ## @param data Bytes received from the server.
+    ## @return List of the complete lines now available.
+    def feed(self, data):
+        with self.free(len(data)) as view:
+            view[:len(data)] = data
+        self.commit(len(data))
+        return list(self.lines())
+
+    ## @brief Yields every complete line received, terminator included.
+    ## @return Generator of bytes lines.
+    def lines(self):
+        data = self.data
+        pos = data.find(b"\n", max(self.scanned, self.start), self.end)
+        while pos != -1 :
+            line = bytes(data[self.start:pos + 1])
+            self.start = pos + 1
+            yield line
+            pos = data.find(b"\n", self.start, self.end)
+        self.scanned = self.end
+
+## Number of commands the server accepts without having answered them.
+MAX_PENDING = 10
+
+## Command pipeline keeping the server's command slots full without overflowing them.
+##
+##        It stands in for the socket given to the decision functions. Every command
+##        is appended to player.queue by its caller right after being sent, so the
+##        commands in flight are the queued ones not held in the backlog: the server
+##        gets a command as soon as one of its 10 slots is free, and the extra ones
+##        wait here instead of being rejected.
+##        Commands are not written one by one: they are gathered in an outbox that
+##        flush writes with a single call once a decision pass is over.
+class CommandScheduler:
+
+    ## Class constructor of CommandScheduler.
+    ## @param client_socket Socket (or AgentConnection) the commands are written to.
+    ## @param player Player class containing queue.
+    def __init__(self, client_socket, player):
+        ## The socket the commands are written to.
+        self.client_socket = client_socket
+        ## The player whose queue tracks the commands.
+        self.player = player
+        ## Commands queued by the player but not written yet.
+        self.backlog = collections.deque()
+        ## Commands allowed in a server slot, waiting for the next flush.
+        self.outbox = bytearray()
+
+    ## @brief Number of commands written to the server and not answered yet.
+    ## @return Number of commands in flight.
+    def in_flight(self):
+        return len(self.player.queue) - len(self.backlog)
+
+    ## @brief Puts a command in the outbox if a server slot is free, otherwise holds it back.
+    ## @param data Encoded command.
+    ## @return Number of bytes accepted.
+    def send(self, data):
+        if not self.backlog and self.in_flight() < MAX_PENDING :
+            self.outbox += data
+        else :
+            self.backlog.append(data)
+        return len(data)
+
+    ## @brief Moves held back commands to the outbox while server slots are free.
+    ##
+    ##       Called after the replies of a read were handled.
+    def pump(self):
+        while self.backlog and self.in_flight() < MAX_PENDING :
+            self.outbox += self.backlog.popleft()
+
+    ## @brief Writes the whole outbox with a single call.
+    ##
+    ##       The written buffer is handed over to the socket and a new outbox is started,
+    ##       so a transport keeping a reference to it is never affected.
+    def flush(self):
+        if self.outbox :
+            data, self.outbox = self.outbox, bytearray()
+            self.client_socket.sendall(data)
+
+## Seconds to wait for a reply before deciding again when nothing is in flight.
+IDLE_WAKEUP = 1.0
+## Seconds to wait for a reply before deciding again when commands are in flight.
+STALL_WAKEUP = 10.0
+
+## @brief Computes how long the main loop can sleep waiting for the server.
+## @param player Player class containing queue.
+## @return Delay in seconds.
+##
+##       While commands are in flight their replies wake the loop up, so the timer is
+##       only a safety net. With nothing in flight the player is waiting for broadcasts
+##       and decides again on a slower timer.
+def wakeup_delay(player):
+    if len(player.queue) > 0 :
+        return STALL_WAKEUP
+    return IDLE_WAKEUP
+
+## @brief Joins the game: sends the team name and parses the server's answer into a Session.
+## @param client_socket Socket connected to the server.
+## @param buffer LineBuffer the server stream is read into.
+## @param name Name of the team to join.
+## @param agent Agent joining the game, None for a new one playing on client_socket.
+## @return The complete Session, or None if the name was refused or the connection closed.
+##
+##       The lines received after the map size are left in the buffer for command_received.
+##       The handshake goes through the Agent, so a recorded session includes it.
+def handshake(client_socket, buffer, name, agent=None):
+    if agent == None :
+        agent = Agent(client_socket, name)
+    # print(f"Sending : {name}")
+    agent.hello()
+    while 1 :
+        if buffer.read_from(client_socket) == 0 :
+            return None
+        for line in buffer.lines():
+            d = agent.feed(line)
+            if d == 1 :
+                time.sleep(0.5)
+                print(f"Sending : {name}")
+                agent.hello()
+            elif d == -10 :
+                # print("Wrong team name. Closing...")
+                return None
+            elif agent.joined :
+                return agent.session
+
+## @brief Hands every complete line of the buffer to the agent.
+## @param agent Agent the lines are fed to.
+## @param buffer LineBuffer holding the received lines.
+## @return -1 if the player is dead, -10 if the game ended, otherwise 0.
+def receive_lines(agent, buffer):
+    for command in buffer.lines():
+        d = agent.feed(command)
+        if d == -1 or d == -10 :
+            return d
+    return 0
+
+## Kinds of the records of a wire log.
+class Wire(enum.IntEnum):
+    ## A line the server sent.
+    RECEIVED = 0
+    ## Bytes written to the server.
+    SENT = 1
+    ## A decision pass of the agent (pump then command_send), it carries no bytes.
+    DECIDED = 2
+
+## First bytes of every session of a wire log.
+WIRE_MAGIC = b"ZWR1"
+
+## Header of a session: WIRE_MAGIC, then the seed of the player's random moves.
+WIRE_HEADER = struct.Struct("<4sQ")
+
+## Header of a record: Wire kind, nanoseconds since the session started, size of the bytes following.
+WIRE_RECORD = struct.Struct("<BQI")
+
+## Opt-in recorder of the traffic of one agent, in a compact binary log.
+##
+##        It stands in for the transport of the Agent: what is written goes through it,
+##        and the Agent hands it every line received and every decision pass. Each one
+##        is appended as a WIRE_RECORD stamped with a monotonic clock, followed by its
+##        bytes. A session starts with a WIRE_HEADER holding the seed of the player's
+##        random moves, so zappy_replay can play it again deterministically.
+class WireRecorder:
+
+    __slots__ = ("transport", "file", "seed", "timer", "start")
+
+    ## Class constructor of WireRecorder.
+    ## @param path Path of the log, opened in append mode.
+    ## @param seed Seed of the player's random moves.
+    ## @param timer Function returning the current time in nanoseconds.
+    def __init__(self, path, seed, timer=time.monotonic_ns):
+        ## The transport the recorded bytes are written to, set by Agent.record.
+        self.transport = None
+        ## The file the records are appended to.
+        self.file = open(path, "ab")
+        ## Seed of the player's random moves.
+        self.seed = seed
+        ## Function returning the current time in nanoseconds.
+        self.timer = timer
+        ## Time the session started at, the records are stamped relative to it.
+        self.start = timer()
+        self.file.write(WIRE_HEADER.pack(WIRE_MAGIC, seed))
+
+    ## @brief Appends a record.
+    ## @param kind Wire kind of the record.
+    ## @param data Bytes of the record.
+    def write(self, kind, data=b""):
+        self.file.write(WIRE_RECORD.pack(kind, self.timer() - self.start, len(data)))
+        if data :
+            self.file.write(data)
+
+    ## @brief Records then forwards data, mirroring socket.send.
+    ## @param data Bytes to send.
+    ## @return Number of bytes sent by the transport.
+    def send(self, data):
+        self.write(Wire.SENT, data)
+        return self.transport.send(data)
+
+    ## @brief Records then forwards all the data, mirroring socket.sendall.
+    ## @param data Bytes to send.
+    ##
+    ##       The log is flushed along, once per decision pass writing commands, so an
+    ##       agent killed on the spot only loses what it received since its last commands.
+    def sendall(self, data):
+        self.write(Wire.SENT, data)
+        self.file.flush()
+        self.transport.sendall(data)
+
+    ## @brief Flushes and closes the log.
+    def close(self):
+        self.file.close()
+
+## Decision loop of one player, independent of the transport carrying its lines.
+##
+##        The transport only needs send(data) and sendall(data): a socket, an
+##        AgentConnection or an in-process world model all fit. The lines the server
+##        sends are handed to feed() and decide() writes the next commands.
+class Agent:
+
+    __slots__ = ("name", "transport", "player", "scheduler", "session", "joined", "recorder")
+
+    ## Class constructor of Agent.
+    ## @param transport Object with send and sendall the commands are written to.
+    ## @param name Name of the team to join.
+    def __init__(self, transport, name):
+        ## Name of the team to join.
+        self.name = name
+        ## The transport the commands are written to.
+        self.transport = transport
+        ## The player played by this agent.
+        self.player = Player()
+        ## The CommandScheduler commands are sent through.
+        self.scheduler = CommandScheduler(transport, self.player)
+        ## The Session parsed from the handshake.
+        self.session = Session()
+        ## True once the server accepted the team name.
+        self.joined = False
+        ## The WireRecorder of the agent's traffic, None when not recording.
+        self.recorder = None
+
+    ## @brief Records the agent's traffic from now on.
+    ## @param recorder WireRecorder the traffic is appended to.
+    ##
+    ##       Called before hello, so the whole session is in the log. The random moves
+    ##       of the player are drawn from the recorder's seed from then on.
+    def record(self, recorder):
+        recorder.transport = self.transport
+        self.recorder = recorder
+        self.transport = recorder
+        self.scheduler.client_socket = recorder
+        self.player.random = random.Random(recorder.seed)
+
+    ## @brief Sends the team name.
+    def hello(self):
+        self.transport.send((self.name + "\n").encode())
+
+    ## @brief Starts playing in a joined game.
+    ## @param session Complete Session of the handshake.
+    def join(self, session):
+        self.session = session
+        self.player.join(session)
+        self.joined = True
+
+    ## @brief Handles one line sent by the server.
+    ## @param line Bytes of the line, '\n' included.
+    ## @return 0 while joining or playing, 1 if the team has no free slot yet,
+    ##         -1 if the player died, -10 if the game ended or the team name was refused.
+    def feed(self, line):
+        if self.recorder != None :
+            self.recorder.write(Wire.RECEIVED, line)
+        if self.joined :
+            return command_received(self.player, line)
+        if line == b"ko\n" :
+            return 1
+        if line == b"Wrong team name, please try again\n" :
+            return -10
+        if self.session.feed(line.decode()) :
+            self.join(self.session)
+        return 0
+
+    ## @brief Frees server slots for the commands held back, after the replies were fed.
+    def pump(self):
+        self.scheduler.pump()
+
+    ## @brief Runs command_send and writes its commands.
+    def decide(self):
+        if self.joined :
+            if self.recorder != None :
+                self.recorder.write(Wire.DECIDED)
+            command_send(self.scheduler, self.player)
+            self.scheduler.flush()
 
 ## @brief Main function that creates the socket, initializes the player class, uses select for I/O multiplexing, and contains the main loop.
 ## @param host IP address of the host.
 ## @param port Port of the host.
 ## @param name Name of the team to join.
-def netcat_client(host, port, name):
+## @param recorder WireRecorder the traffic is recorded to, None to not record it.
+def netcat_client(host, port, name, recorder=None):
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     client_socket.connect((host, port))
 
-    player = Player()
+    agent = Agent(client_socket, name)
+    player = agent.player
+    if recorder != None :
+        agent.record(recorder)
 
     sockets_to_read = [client_socket]
     # print(f"Received: {client_socket.recv(1024).decode()}", end="")
     try:
-        data_send = name + "\n"
-        # print(f"Sending : {data_send}", end="")
-        client_socket.send(data_send.encode())
-        while 1 :
-            data_rec = client_socket.recv(1024)
-            if data_rec.decode() == "ko\n":
-                time.sleep(0.5)
-                data_send = name + "\n"
-                print(f"Sending : {data_send}", end="")
-                client_socket.send(data_send.encode())
-            elif data_rec.decode() == "This team is full, please wait\n" :
-                # print(f"{data_rec.decode()}")
-                data_rec = client_socket.recv(1024)
-                break
-            elif data_rec.decode() == "Wrong team name, please try again\n" :
-                # print("Wrong team name. Closing...")
-                exit(0)
-            else:
-                break
+        buffer = LineBuffer()
+        if handshake(client_socket, buffer, name, agent) == None :
+            exit(0)
 
-        d = 0
-        # print(data_rec.decode, end="")
-        while True:
+        d = receive_lines(agent, buffer)
+        if d == 0 :
+            agent.decide()
+        while d == 0:
 
-            ready_to_read, _, _ = select.select(sockets_to_read, [], [], 0.1)
-            data_rec = ""
+            ready_to_read, _, _ = select.select(sockets_to_read, [], [], wakeup_delay(player))
             if client_socket in ready_to_read:
-                data_rec = client_socket.recv(2048)
-                commands = data_rec.decode().splitlines(keepends=True)
-                for command in commands:
-                    d = command_received(player, command.encode())
-                    if d == -1 or d == -10 :
-                        break
+                if buffer.read_from(client_socket) == 0 :
+                    break
+                d = receive_lines(agent, buffer)
                 if d == -1 or d == -10 :
                     break
-            command_send(client_socket, player)
+                agent.pump()
+            agent.decide()
         if d == -1 :
             print("Player session ended", file=sys.stderr)
         else :
@@ -1198,28 +2225,212 @@ def netcat_client(host, port, name):
         print("Closing...")
     finally:
         client_socket.close()
+        if recorder != None :
+            recorder.close()
+
+## Adapter giving an asyncio transport the socket interface used by the decision functions.
+class AgentConnection:
+
+    ## Class constructor of AgentConnection.
+    ## @param writer asyncio transport (or StreamWriter) of the agent's connection.
+    def __init__(self, writer):
+        ## The transport the commands are written to.
+        self.writer = writer
+
+    ## @brief Writes data to the transport, mirroring socket.send.
+    ## @param data Bytes to send.
+    ## @return Number of bytes queued for sending.
+    def send(self, data):
+        self.writer.write(data)
+        return len(data)
+
+    ## @brief Writes all the data to the transport, mirroring socket.sendall.
+    ## @param data Bytes to send.
+    def sendall(self, data):
+        self.writer.write(data)
+
+    ## @brief Closes the underlying transport.
+    def close(self):
+        self.writer.close()
+
+## asyncio protocol playing one agent of a multi-agent process.
+##
+##        The event loop receives straight into the agent's LineBuffer. Decisions run
+##        when replies arrive, or when the wakeup_delay timer expires, so idle agents
+##        cost nothing between two server events. The Agent is reused unchanged
+##        through an AgentConnection.
+class AgentProtocol(asyncio.BufferedProtocol):
+
+    ## Class constructor of AgentProtocol.
+    ## @param name Name of the team to join.
+    ## @param done Future resolved with the agent's result when the session ends.
+    ## @param recorder WireRecorder the traffic is recorded to, None to not record it.
+    def __init__(self, name, done, recorder=None):
+        ## Name of the team to join.
+        self.name = name
+        ## The WireRecorder of the agent's traffic, None when not recording.
+        self.recorder = recorder
+        ## Future resolved with -1 (dead), -10 (end of game) or None (connection lost).
+        self.done = done
+        ## The receive buffer of the connection.
+        self.buffer = LineBuffer()
+        ## The AgentConnection of the agent.
+        self.connection = None
+        ## The Agent deciding the commands, None until connected.
+        self.agent = None
+        ## The pending wakeup timer handle.
+        self.timer = None
+
+    ## The player played by this agent.
+    @property
+    def player(self):
+        return self.agent.player
+
+    ## True once the server accepted the team name.
+    @property
+    def joined(self):
+        return self.agent.joined
+
+    ## @brief Sends the team name once connected.
+    ## @param transport asyncio transport of the connection.
+    def connection_made(self, transport):
+        self.connection = AgentConnection(transport)
+        self.agent = Agent(self.connection, self.name)
+        if self.recorder != None :
+            self.agent.record(self.recorder)
+        self.agent.hello()
+
+    ## @brief Gives the event loop the free space of the receive buffer.
+    ## @param sizehint Size suggested by the event loop.
+    ## @return memoryview on the free space.
+    def get_buffer(self, sizehint):
+        return self.buffer.free(max(sizehint, 2048))
+
+    ## @brief Handles the lines received and decides the next commands.
+    ## @param nbytes Number of bytes written in the buffer.
+    def buffer_updated(self, nbytes):
+        self.buffer.commit(nbytes)
+        joined = self.agent.joined
+        for line in self.buffer.lines():
+            d = self.agent.feed(line)
+            if d == 1 :
+                asyncio.get_running_loop().call_later(0.5, self.agent.hello)
+            elif d == -1 or d == -10 :
+                self.finish(None if not self.agent.joined else d)
+                return
+        if joined :
+            self.agent.pump()
+        if self.agent.joined :
+            self.decide()
+
+    ## @brief Runs the Agent's decision and arms the wakeup timer.
+    def decide(self):
+        if self.done.done() :
+            return
+        self.agent.decide()
+        if self.timer is not None :
+            self.timer.cancel()
+        self.timer = asyncio.get_running_loop().call_later(wakeup_delay(self.player), self.decide)
+
+    ## @brief Ends the session with the given result.
+    ## @param result Result of the session.
+    def finish(self, result):
+        if self.timer is not None :
+            self.timer.cancel()
+            self.timer = None
+        if not self.done.done() :
+            self.done.set_result(result)
+        self.connection.close()
+
+    ## @brief Ends the session when the server closes the connection.
+    ## @param exc Exception raised, if any.
+    def connection_lost(self, exc):
+        if self.timer is not None :
+            self.timer.cancel()
+            self.timer = None
+        if not self.done.done() :
+            self.done.set_result(None)
+
+## @brief Plays one agent on an asyncio connection.
+## @param host IP address of the host.
+## @param port Port of the host.
+## @param name Name of the team to join.
+## @param recorder WireRecorder the traffic is recorded to, None to not record it.
+## @return -1 if the player died, -10 if the game ended, None if the connection was lost.
+async def run_agent(host, port, name, recorder=None):
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    try:
+        await loop.create_connection(lambda: AgentProtocol(name, done, recorder), host, port)
+        return await done
+    finally:
+        if recorder != None :
+            recorder.close()
+
+## @brief Opens the WireRecorder of an agent.
+## @param path Path of the log, None to not record.
+## @param seed Seed of the random moves, None for a random one.
+## @param index Index of the agent in the process, appended to the path and the seed.
+## @return The WireRecorder, or None if path is None.
+def open_recorder(path, seed=None, index=None):
+    if path == None :
+        return None
+    if seed == None :
+        seed = random.getrandbits(63)
+    if index != None :
+        path, seed = f"{path}.{index}", seed + index
+    return WireRecorder(path, seed)
+
+## @brief Runs several agents in a single process and event loop.
+## @param host IP address of the host.
+## @param port Port of the host.
+## @param name Name of the team to join.
+## @param count Number of agents to start.
+## @param delay Seconds to wait between two connections.
+## @param record Path the traffic of agent i is recorded to with the suffix .i, None to not record it.
+## @param seed Seed of the random moves of the first agent, the next ones use the following seeds.
+## @return List with the result of run_agent for every agent.
+async def run_agents(host, port, name, count, delay=0.2, record=None, seed=None):
+    tasks = []
+    for index in range(count):
+        recorder = open_recorder(record, seed, index)
+        tasks.append(asyncio.create_task(run_agent(host, port, name, recorder)))
+        await asyncio.sleep(delay)
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    dead = sum(1 for result in results if result == -1)
+    print(f"{dead}/{count} players died", file=sys.stderr)
+    return results
 
 if __name__ == "__main__":
     if len(sys.argv) == 1 :
-        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--help]")
+        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--agents N] [--record FILE] [--seed N] [--help]")
         exit(0)
     
     required_args = ['-p', '--port', '-n', '--name']
     missing_args = [arg for arg in required_args if arg not in sys.argv]
     if '-p' not in sys.argv and '--port' not in sys.argv or '-n' not in sys.argv and '--name' not in sys.argv:
-        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--help]")
+        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--agents N] [--record FILE] [--seed N] [--help]")
         exit(0)
 
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument("-p", "--port", type=int, required=True, help="Server port")
     parser.add_argument("-n", "--name", type=str, required=True, help="Name of the team")
     parser.add_argument("-h", "--machine", type=str, default="localhost", help="Server IP address")
+    parser.add_argument("--agents", type=int, default=1, help="Number of agents to run in this process")
+    parser.add_argument("--record", type=str, default=None, help="Binary log the traffic is recorded to, see zappy_replay.py")
+    parser.add_argument("--seed", type=int, default=None, help="Seed (positive) of the random moves of a recorded session")
     parser.add_argument("--help", action="help", help="Show this help message and exit")
 
     try:
         args = parser.parse_args()
         print(args)
-        netcat_client(args.machine, args.port, args.name)
+        if args.agents > 1 :
+            try:
+                asyncio.run(run_agents(args.machine, args.port, args.name, args.agents, record=args.record, seed=args.seed))
+            except KeyboardInterrupt:
+                print("Closing...")
+        else :
+            netcat_client(args.machine, args.port, args.name, open_recorder(args.record, args.seed))
     except ValueError:
-        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--help]")
+        print("usage: zappy_ai.py -p PORT -n NAME [-h MACHINE] [--agents N] [--record FILE] [--seed N] [--help]")
         exit(0)
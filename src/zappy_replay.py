@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+
+## @file zappy_replay.py
+## @brief Plays a session recorded by zappy_ai --record again, offline and deterministically.
+##
+##        python src/zappy_replay.py game.log [--session N] [--repeat N] [--profile]
+
+import argparse
+import cProfile
+import pstats
+import random
+import sys
+import time
+
+from zappy_ai import Agent, ServerClock, Wire, WIRE_MAGIC, WIRE_HEADER, WIRE_RECORD
+
+## @brief Splits a wire log into its sessions.
+## @param data Bytes of the log.
+## @return List of (seed, records), the records being (Wire kind, nanoseconds, bytes) tuples.
+##
+##       A log opened several times in append mode holds one session per run, each one
+##       starting with its WIRE_HEADER. A record cut by a crash ends the session.
+def read_wire(data):
+    sessions = []
+    view = memoryview(data)
+    offset = 0
+    while offset + WIRE_HEADER.size <= len(data) :
+        magic, seed = WIRE_HEADER.unpack_from(view, offset)
+        if magic != WIRE_MAGIC :
+            raise ValueError(f"no session header at byte {offset}")
+        offset += WIRE_HEADER.size
+        records = []
+        while offset + WIRE_RECORD.size <= len(data) and view[offset] != WIRE_MAGIC[0] :
+            kind, stamp, size = WIRE_RECORD.unpack_from(view, offset)
+            offset += WIRE_RECORD.size
+            if offset + size > len(data) :
+                offset = len(data)
+                break
+            records.append((Wire(kind), stamp, bytes(view[offset:offset + size])))
+            offset += size
+        sessions.append((seed, records))
+    return sessions
+
+## @brief Reads the sessions of a wire log file.
+## @param path Path of the log.
+## @return List of (seed, records), as read_wire.
+def load(path):
+    with open(path, "rb") as file:
+        return read_wire(file.read())
+
+## Transport collecting what the replayed agent writes.
+class ReplayTransport:
+
+    __slots__ = ("output",)
+
+    ## Class constructor of ReplayTransport.
+    def __init__(self):
+        ## Every byte written, in order.
+        self.output = bytearray()
+
+    ## @brief Collects data, mirroring socket.send.
+    ## @param data Bytes to send.
+    ## @return Number of bytes collected.
+    def send(self, data):
+        self.output += data
+        return len(data)
+
+    ## @brief Collects data, mirroring socket.sendall.
+    ## @param data Bytes to send.
+    def sendall(self, data):
+        self.output += data
+
+## A recorded session played again through a fresh Agent.
+##
+##        The lines received are fed to the agent and the decision passes run again at
+##        their recorded place, with the player's clock reading the recorded stamps and
+##        its random moves drawn from the recorded seed. What the agent writes once
+##        joined is checked against the recorded bytes, the first difference is a
+##        divergence. The team names sent before joining are not decisions and are skipped.
+class Replay:
+
+    ## Class constructor of Replay.
+    ## @param seed Seed of the player's random moves.
+    ## @param records Records of the session, as read_wire gives them.
+    def __init__(self, seed, records):
+        ## Seed of the player's random moves.
+        self.seed = seed
+        ## Records of the session.
+        self.records = records
+        ## Recorded time of the current record, in seconds.
+        self.now = 0.0
+        ## The transport collecting what the agent writes.
+        self.transport = None
+        ## The replayed Agent.
+        self.agent = None
+        ## Index of the first record the agent did not reproduce, None if it reproduced all of them.
+        self.divergence = None
+        ## Status the agent ended the session with: -1 dead, -10 ended, None still playing.
+        self.result = None
+
+    ## @brief Plays the session from its start.
+    ## @return Index of the first diverging record, None if the whole session was reproduced.
+    def run(self):
+        self.transport = ReplayTransport()
+        self.agent = Agent(self.transport, "replay")
+        self.agent.player.random = random.Random(self.seed)
+        self.agent.player.clock = ServerClock(timer=lambda: self.now)
+        self.divergence = None
+        self.result = None
+        checked = 0
+        for index, (kind, stamp, data) in enumerate(self.records):
+            self.now = stamp / 1e9
+            if kind == Wire.RECEIVED :
+                status = self.agent.feed(data)
+                if status == -1 or status == -10 :
+                    self.result = status
+            elif kind == Wire.DECIDED :
+                self.agent.pump()
+                self.agent.decide()
+            elif self.agent.joined :
+                written = self.transport.output[checked:checked + len(data)]
+                checked += len(data)
+                if written != data and self.divergence == None :
+                    self.divergence = index
+        if self.divergence == None and len(self.transport.output) != checked :
+            self.divergence = len(self.records)
+        return self.divergence
+
+## @brief Describes a record of a session.
+## @param records Records of the session.
+## @param index Index of the record.
+## @return Text giving the kind, the time and the bytes of the record.
+def describe(records, index):
+    if index >= len(records) :
+        return "after the last record"
+    kind, stamp, data = records[index]
+    return f"record {index} ({kind.name} at {stamp / 1e9:.6f} s): {bytes(data)!r}"
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a session recorded by zappy_ai --record.")
+    parser.add_argument("log", help="Wire log to replay")
+    parser.add_argument("--session", type=int, default=None, help="Index of the session to replay, all of them by default")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of times every session is replayed")
+    parser.add_argument("--profile", action="store_true", help="Replay under cProfile and print the costliest functions")
+    args = parser.parse_args()
+
+    sessions = load(args.log)
+    if args.session != None :
+        sessions = [sessions[args.session]]
+    profiler = cProfile.Profile() if args.profile else None
+    diverged = False
+    for number, (seed, records) in enumerate(sessions):
+        replay = Replay(seed, records)
+        started = time.perf_counter()
+        if profiler != None :
+            profiler.enable()
+        for _ in range(args.repeat):
+            replay.run()
+        if profiler != None :
+            profiler.disable()
+        elapsed = (time.perf_counter() - started) / args.repeat
+        received = sum(1 for record in records if record[0] == Wire.RECEIVED)
+        decided = sum(1 for record in records if record[0] == Wire.DECIDED)
+        print(f"session {number}: seed {seed}, {len(records)} records, {received} lines received, "
+              f"{decided} decisions, {elapsed * 1000:.3f} ms per replay, "
+              f"{1e9 * elapsed / max(len(records), 1):.0f} ns per record")
+        if replay.divergence != None :
+            diverged = True
+            print(f"  diverges at {describe(records, replay.divergence)}")
+    if profiler != None :
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(25)
+    sys.exit(1 if diverged else 0)
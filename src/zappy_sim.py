@@ -0,0 +1,711 @@
+#!/usr/bin/env python3
+
+## @file zappy_sim.py
+## @brief Headless stand-in for the Zappy server, to run and measure zappy_ai agents locally.
+
+import argparse
+import asyncio
+import collections
+import heapq
+import math
+import random
+import sys
+import time
+
+from zappy_ai import RESOURCES, ELEVATION, COMMAND_COSTS, FOOD_TIME_UNITS, START_FOOD, MAX_LEVEL, Agent, ServerClock, WireRecorder
+
+## Default share of the tiles holding each resource, aligned on RESOURCES.
+DENSITIES = (0.5, 0.3, 0.15, 0.1, 0.1, 0.08, 0.05)
+
+## Default time units between two respawns of the resources.
+RESPAWN_UNITS = 20
+
+## Commands a player can queue, the next ones are dropped.
+MAX_QUEUED = 10
+
+## Players of one team at the last level needed to win.
+WINNING_PLAYERS = 6
+
+## Vector (dx, dy) of each orientation: north, east, south, west, with y growing southward.
+ORIENTATIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+## Decision rounds allowed within one time unit, in case agents keep answering immediate replies.
+MAX_ROUNDS = 100
+
+## Seconds the fast mode waits for an idle client to write before jumping to the next event.
+QUIET_DELAY = 0.005
+
+## @brief Brings a distance along an axis of the map to its shortest toroidal form.
+## @param delta Distance along the axis.
+## @param size Size of the map along the axis.
+## @return The distance, between -size / 2 and size / 2.
+def shortest(delta, size):
+    return (delta + size // 2) % size - size // 2
+
+## @brief Gives the direction K a sound or a push reaches a player from.
+## @param dx Columns from the player to the source, shortest path.
+## @param dy Rows from the player to the source, shortest path.
+## @param orientation Index in ORIENTATIONS the player faces.
+## @return 0 for the own tile, else 1 for the front then counterclockwise up to 8.
+def direction_from(dx, dy, orientation):
+    if dx == 0 and dy == 0 :
+        return 0
+    fx, fy = ORIENTATIONS[orientation]
+    lx, ly = ORIENTATIONS[(orientation + 3) % 4]
+    angle = math.atan2(dx * lx + dy * ly, dx * fx + dy * fy)
+    return round(angle / (math.pi / 4)) % 8 + 1
+
+## A connection to the simulator, and the player once it joined a team.
+class Client:
+
+    __slots__ = ("number", "send", "close", "team", "x", "y", "orientation", "level", "inventory",
+                 "commands", "busy", "frozen", "alive", "hatched")
+
+    ## Class constructor of Client.
+    ## @param number Identifier of the connection.
+    ## @param send Function writing bytes to the client.
+    ## @param close Function closing the connection, or None.
+    def __init__(self, number, send, close=None):
+        ## Identifier of the connection.
+        self.number = number
+        ## Function writing bytes to the client.
+        self.send = send
+        ## Function closing the connection, or None.
+        self.close = close
+        ## Name of the team, None until joined.
+        self.team = None
+        ## Column of the player.
+        self.x = 0
+        ## Row of the player.
+        self.y = 0
+        ## Index in ORIENTATIONS the player faces.
+        self.orientation = 0
+        ## Level of the player.
+        self.level = 1
+        ## Count of every resource carried, aligned on RESOURCES.
+        self.inventory = [START_FOOD] + [0] * (len(RESOURCES) - 1)
+        ## Command lines received and not executed yet, the one executing included.
+        self.commands = collections.deque()
+        ## Indicates if a command is executing.
+        self.busy = False
+        ## Indicates if the player takes part in an incantation and waits for its end.
+        self.frozen = False
+        ## Indicates if the player is in the game.
+        self.alive = False
+        ## Time unit the player hatched at.
+        self.hatched = 0
+
+## The rules and the state of a simulated game.
+##
+##        Time is counted in time units and only moves forward through advance(): the
+##        events due are executed in order, so the same seed and the same client lines
+##        always give the same game. The transport decides how time units relate to
+##        seconds.
+class Game:
+
+    ## Class constructor of Game.
+    ## @param width Width of the map.
+    ## @param height Height of the map.
+    ## @param teams Names of the teams.
+    ## @param slots Eggs every team starts with.
+    ## @param seed Seed of the random generator, None for a random one.
+    ## @param densities Share of the tiles holding each resource, aligned on RESOURCES.
+    ## @param respawn Time units between two respawns of the resources.
+    def __init__(self, width=10, height=10, teams=("team1", "team2"), slots=6, seed=None, densities=DENSITIES,
+                 respawn=RESPAWN_UNITS):
+        ## Width of the map.
+        self.width = width
+        ## Height of the map.
+        self.height = height
+        ## Names of the teams.
+        self.teams = tuple(teams)
+        ## Share of the tiles holding each resource.
+        self.densities = tuple(densities)
+        ## Time units between two respawns of the resources.
+        self.respawn_units = respawn
+        ## Random generator of every choice of the game.
+        self.random = random.Random(seed)
+        ## Count of every resource on every tile, index y * width + x.
+        self.tiles = [[0] * len(RESOURCES) for _ in range(width * height)]
+        ## Players standing on every tile.
+        self.occupants = [set() for _ in range(width * height)]
+        ## Eggs not hatched yet, as [team, x, y] lists.
+        self.eggs = []
+        ## Connections, joined or not.
+        self.clients = []
+        ## Players frozen by every incantation underway, keyed by the initiator.
+        self.rituals = {}
+        ## Current time unit.
+        self.now = 0
+        ## Heap of the events to come: (time unit, sequence number, function, arguments).
+        self.events = []
+        ## Number of events scheduled so far, breaks the ties of the heap.
+        self.sequence = 0
+        ## Name of the winning team, None while the game goes on.
+        self.winner = None
+        ## Time unit every level was first reached at, indexed by level.
+        self.reached = [None] * (MAX_LEVEL + 1)
+        ## Counters of the game: commands, refused (ko), dropped (queue full), elevations, starved.
+        self.stats = collections.Counter()
+        for team in self.teams:
+            for _ in range(slots):
+                self.eggs.append([team, self.random.randrange(width), self.random.randrange(height)])
+        self.respawn()
+
+    ## @brief Index of a tile in tiles and occupants.
+    ## @param x Column, wrapped around the map.
+    ## @param y Row, wrapped around the map.
+    def tile(self, x, y):
+        return (y % self.height) * self.width + (x % self.width)
+
+    ## @brief Schedules a function.
+    ## @param delay Time units from now.
+    ## @param function Function to call.
+    ## @param args Arguments of the call.
+    def schedule(self, delay, function, *args):
+        self.sequence += 1
+        heapq.heappush(self.events, (self.now + delay, self.sequence, function, args))
+
+    ## @brief Time unit of the next event, None when nothing is scheduled.
+    def next_event(self):
+        if not self.events :
+            return None
+        return self.events[0][0]
+
+    ## @brief Executes every event due up to a time unit.
+    ## @param until Last time unit to simulate.
+    def advance(self, until):
+        while self.events and self.events[0][0] <= until and self.winner == None :
+            when, _, function, args = heapq.heappop(self.events)
+            self.now = when
+            function(*args)
+        if self.winner == None and until > self.now :
+            self.now = until
+
+    ## @brief Puts back the resources missing from the map, then schedules the next respawn.
+    def respawn(self):
+        size = self.width * self.height
+        for resource, density in enumerate(self.densities):
+            wanted = max(1, int(size * density)) if density > 0 else 0
+            missing = wanted - sum(tile[resource] for tile in self.tiles)
+            for _ in range(missing):
+                self.tiles[self.random.randrange(size)][resource] += 1
+        self.schedule(self.respawn_units, self.respawn)
+
+    ## @brief Registers a new connection and greets it.
+    ## @param send Function writing bytes to the client.
+    ## @param close Function closing the connection, or None.
+    ## @return The Client.
+    def connect(self, send, close=None):
+        client = Client(len(self.clients), send, close)
+        self.clients.append(client)
+        send(b"WELCOME\n")
+        return client
+
+    ## @brief Forgets a closed connection.
+    ## @param client Client of the connection.
+    def disconnect(self, client):
+        if client.alive :
+            client.alive = False
+            self.occupants[self.tile(client.x, client.y)].discard(client)
+            self.thaw(client)
+
+    ## @brief Handles one line sent by a client.
+    ## @param client Client which sent the line.
+    ## @param line Line without its '\n'.
+    def receive(self, client, line):
+        if client.team == None :
+            self.join(client, line)
+        elif client.alive and len(client.commands) < MAX_QUEUED :
+            self.stats["commands"] += 1
+            client.commands.append(line)
+            self.start(client)
+        elif client.alive :
+            self.stats["dropped"] += 1
+
+    ## @brief Hatches an egg of a team for a client.
+    ## @param client Client which sent the team name.
+    ## @param team Name of the team.
+    def join(self, client, team):
+        egg = next((egg for egg in self.eggs if egg[0] == team), None)
+        if egg == None :
+            client.send(b"ko\n")
+            return
+        self.eggs.remove(egg)
+        client.team = team
+        client.x, client.y = egg[1], egg[2]
+        client.orientation = self.random.randrange(4)
+        client.alive = True
+        client.hatched = self.now
+        self.occupants[self.tile(client.x, client.y)].add(client)
+        client.send(b"%d\n%d %d\n" % (self.free_slots(team), self.width, self.height))
+        self.schedule(FOOD_TIME_UNITS, self.digest, client)
+
+    ## @brief Number of eggs a team can still hatch.
+    ## @param team Name of the team.
+    def free_slots(self, team):
+        return sum(1 for egg in self.eggs if egg[0] == team)
+
+    ## @brief Spends one food of a player, or kills it when none is left.
+    ## @param client Client of the player.
+    def digest(self, client):
+        if not client.alive :
+            return
+        if client.inventory[0] == 0 :
+            self.disconnect(client)
+            self.stats["starved"] += 1
+            client.send(b"dead\n")
+            if client.close != None :
+                client.close()
+            return
+        client.inventory[0] -= 1
+        self.schedule(FOOD_TIME_UNITS, self.digest, client)
+
+    ## @brief Starts the oldest command of a player if it is free to act.
+    ## @param client Client of the player.
+    def start(self, client):
+        if client.busy or client.frozen or not client.commands or not client.alive :
+            return
+        line = client.commands[0]
+        name = line.split(" ", 1)[0]
+        if name == "Incantation" and not self.begin_incantation(client) :
+            client.commands.popleft()
+            self.stats["refused"] += 1
+            client.send(b"ko\n")
+            self.start(client)
+            return
+        client.busy = True
+        self.schedule(COMMAND_COSTS.get(name, 0), self.finish, client)
+
+    ## @brief Executes the oldest command of a player once its time is spent.
+    ## @param client Client of the player.
+    def finish(self, client):
+        client.busy = False
+        if not client.alive :
+            return
+        line = client.commands.popleft()
+        name, _, argument = line.partition(" ")
+        handler = getattr(self, "command_" + name.lower(), None)
+        if handler == None :
+            reply = b"ko\n"
+        else :
+            reply = handler(client, argument)
+        if reply == b"ko\n" :
+            self.stats["refused"] += 1
+        if reply != None :
+            client.send(reply)
+        self.start(client)
+
+    ## @brief Moves the player one tile forward.
+    def command_forward(self, client, argument):
+        dx, dy = ORIENTATIONS[client.orientation]
+        self.move(client, client.x + dx, client.y + dy)
+        return b"ok\n"
+
+    ## @brief Turns the player 90 degrees right.
+    def command_right(self, client, argument):
+        client.orientation = (client.orientation + 1) % 4
+        return b"ok\n"
+
+    ## @brief Turns the player 90 degrees left.
+    def command_left(self, client, argument):
+        client.orientation = (client.orientation + 3) % 4
+        return b"ok\n"
+
+    ## @brief Lists the content of the vision cone, nearest row first and left to right.
+    def command_look(self, client, argument):
+        fx, fy = ORIENTATIONS[client.orientation]
+        rx, ry = ORIENTATIONS[(client.orientation + 1) % 4]
+        tiles = []
+        for distance in range(client.level + 1):
+            for side in range(-distance, distance + 1):
+                index = self.tile(client.x + distance * fx + side * rx, client.y + distance * fy + side * ry)
+                words = ["player"] * len(self.occupants[index])
+                for resource, count in enumerate(self.tiles[index]):
+                    words += [RESOURCES[resource]] * count
+                tiles.append(" ".join(words))
+        return ("[" + ", ".join(tiles) + "]\n").encode()
+
+    ## @brief Lists what the player carries.
+    def command_inventory(self, client, argument):
+        items = ", ".join(f"{name} {count}" for name, count in zip(RESOURCES, client.inventory))
+        return ("[" + items + "]\n").encode()
+
+    ## @brief Sends a text to every other player, with the direction it comes from.
+    def command_broadcast(self, client, argument):
+        text = argument.encode()
+        for other in self.clients:
+            if other is client or not other.alive :
+                continue
+            dx = shortest(client.x - other.x, self.width)
+            dy = shortest(client.y - other.y, self.height)
+            other.send(b"message %d, %s\n" % (direction_from(dx, dy, other.orientation), text))
+        return b"ok\n"
+
+    ## @brief Gives the number of eggs the team of the player can still hatch.
+    def command_connect_nbr(self, client, argument):
+        return b"%d\n" % self.free_slots(client.team)
+
+    ## @brief Lays an egg on the tile of the player.
+    def command_fork(self, client, argument):
+        self.eggs.append([client.team, client.x, client.y])
+        return b"ok\n"
+
+    ## @brief Pushes the other players of the tile one tile forward and destroys its eggs.
+    def command_eject(self, client, argument):
+        dx, dy = ORIENTATIONS[client.orientation]
+        pushed = [other for other in self.occupants[self.tile(client.x, client.y)] if other is not client]
+        eggs = [egg for egg in self.eggs if (egg[1], egg[2]) == (client.x, client.y)]
+        for other in pushed:
+            self.move(other, other.x + dx, other.y + dy)
+            other.send(b"eject: %d\n" % direction_from(-dx, -dy, other.orientation))
+        for egg in eggs:
+            self.eggs.remove(egg)
+        return b"ok\n" if pushed or eggs else b"ko\n"
+
+    ## @brief Picks up a resource of the tile.
+    def command_take(self, client, argument):
+        if argument not in RESOURCES :
+            return b"ko\n"
+        resource = RESOURCES.index(argument)
+        tile = self.tiles[self.tile(client.x, client.y)]
+        if tile[resource] == 0 :
+            return b"ko\n"
+        tile[resource] -= 1
+        client.inventory[resource] += 1
+        return b"ok\n"
+
+    ## @brief Drops a resource on the tile.
+    def command_set(self, client, argument):
+        if argument not in RESOURCES :
+            return b"ko\n"
+        resource = RESOURCES.index(argument)
+        if client.inventory[resource] == 0 :
+            return b"ko\n"
+        client.inventory[resource] -= 1
+        self.tiles[self.tile(client.x, client.y)][resource] += 1
+        return b"ok\n"
+
+    ## @brief Ends an incantation: levels the participants up if the tile still allows it.
+    ## @return None when the participants were answered, ko if the requirements are not met anymore.
+    def command_incantation(self, client, argument):
+        participants = self.participants(client, self.rituals.get(client.number, ()))
+        if participants == None :
+            self.thaw(client)
+            return b"ko\n"
+        tile = self.tiles[self.tile(client.x, client.y)]
+        for resource, count in enumerate(ELEVATION[client.level].stones, 1):
+            tile[resource] -= count
+        for other in participants:
+            other.level += 1
+            other.send(b"Current level: %d\n" % other.level)
+        self.thaw(client, participants)
+        self.stats["elevations"] += 1
+        if self.reached[client.level] == None :
+            self.reached[client.level] = self.now
+        if client.level == MAX_LEVEL :
+            finished = sum(1 for other in self.clients if other.alive and other.team == client.team and other.level == MAX_LEVEL)
+            if finished >= WINNING_PLAYERS :
+                self.winner = client.team
+        return None
+
+    ## @brief Releases the players frozen by the incantation of an initiator.
+    ## @param client Client of the initiator.
+    ## @param leveled Players the incantation leveled up.
+    ##
+    ##       Every other frozen player is answered ko before it resumes its own commands:
+    ##       the incantation failed, its initiator left, or the player left the tile with
+    ##       the command it was executing when frozen.
+    def thaw(self, client, leveled=()):
+        for other in self.rituals.pop(client.number, ()):
+            other.frozen = False
+            if other.alive and other not in leveled :
+                other.send(b"ko\n")
+            self.start(other)
+
+    ## @brief Checks the requirements of the elevation of a player on its tile.
+    ## @param client Client of the initiator.
+    ## @param frozen Players frozen by this incantation.
+    ## @return The players taking part, or None if the requirements are not met.
+    ##
+    ##       A player already in another incantation, frozen or leading it, never takes part.
+    def participants(self, client, frozen=()):
+        if client.level >= MAX_LEVEL :
+            return None
+        elevation = ELEVATION[client.level]
+        index = self.tile(client.x, client.y)
+        players = [other for other in self.occupants[index] if other.level == client.level and
+                   (other is client or other in frozen or not (other.frozen or other.number in self.rituals))]
+        if len(players) < elevation.players :
+            return None
+        tile = self.tiles[index]
+        if any(tile[resource] < count for resource, count in enumerate(elevation.stones, 1)) :
+            return None
+        return players
+
+    ## @brief Starts an incantation: freezes the participants and tells them.
+    ## @param client Client of the initiator.
+    ## @return False if the requirements are not met.
+    def begin_incantation(self, client):
+        participants = self.participants(client)
+        if participants == None :
+            return False
+        for other in participants:
+            other.send(b"Elevation underway\n")
+            if other is not client :
+                other.frozen = True
+        self.rituals[client.number] = [other for other in participants if other is not client]
+        return True
+
+    ## @brief Moves a player to a tile.
+    ## @param client Client of the player.
+    ## @param x Column, wrapped around the map.
+    ## @param y Row, wrapped around the map.
+    def move(self, client, x, y):
+        self.occupants[self.tile(client.x, client.y)].discard(client)
+        client.x = x % self.width
+        client.y = y % self.height
+        self.occupants[self.tile(client.x, client.y)].add(client)
+
+    ## @brief Tells if every player waits on the server: none can send anything before the next event.
+    ## @return False while nobody joined, there is nothing to simulate for yet.
+    def waiting(self):
+        players = [client for client in self.clients if client.alive]
+        return len(players) > 0 and all(client.busy or client.frozen for client in players)
+
+    ## @brief Number of players in the game.
+    def population(self):
+        return sum(1 for client in self.clients if client.alive)
+
+## Transport handing the commands of an in-process Agent straight to the Game.
+class LocalTransport:
+
+    __slots__ = ("game", "client")
+
+    ## Class constructor of LocalTransport.
+    ## @param game Game the commands are played in.
+    ## @param client Client of the agent in the game.
+    def __init__(self, game, client):
+        ## Game the commands are played in.
+        self.game = game
+        ## Client of the agent in the game.
+        self.client = client
+
+    ## @brief Hands every line of the data to the Game, mirroring socket.send.
+    ## @param data Bytes of complete lines.
+    ## @return Number of bytes handed over.
+    def send(self, data):
+        for line in data.decode().splitlines():
+            self.game.receive(self.client, line)
+        return len(data)
+
+    ## @brief Hands every line of the data to the Game, mirroring socket.sendall.
+    ## @param data Bytes of complete lines.
+    def sendall(self, data):
+        self.send(data)
+
+    ## @brief Leaves the game.
+    def close(self):
+        self.game.disconnect(self.client)
+
+## An agent played inside the simulator process.
+class Seat:
+
+    __slots__ = ("agent", "client", "inbox", "result", "waiting", "cpu")
+
+    ## Class constructor of Seat.
+    def __init__(self):
+        ## The Agent deciding the commands.
+        self.agent = None
+        ## Client of the agent in the game.
+        self.client = None
+        ## Lines the game sent and the agent did not read yet.
+        self.inbox = collections.deque()
+        ## Status the session ended with, None while playing.
+        self.result = None
+        ## Indicates if the team was full and the name must be sent again.
+        self.waiting = False
+        ## CPU seconds the agent spent reading lines and deciding.
+        self.cpu = 0.0
+
+## Agents played inside the simulator process, in lockstep with the Game.
+##
+##        No socket and no clock are involved: the lines the Game sends are handed to
+##        the agents, which decide right away, and time jumps to the next event only
+##        once no agent has anything left to read. Idle agents decide again at every
+##        event, like the wakeup timer of a real agent.
+class Simulation:
+
+    ## Class constructor of Simulation.
+    ## @param game Game the agents play in.
+    def __init__(self, game):
+        ## Game the agents play in.
+        self.game = game
+        ## Seat of every agent.
+        self.seats = []
+
+    ## @brief Adds agents to a team.
+    ## @param team Name of the team.
+    ## @param count Number of agents.
+    ## @param record Path agent i records its traffic to with the suffix .i, None to not record.
+    ##
+    ##       A recorded agent is stamped in time units of the game, read as seconds by
+    ##       zappy_replay, and draws its random moves from its own seed.
+    def spawn(self, team, count=1, record=None):
+        for _ in range(count):
+            seat = Seat()
+            seat.client = self.game.connect(seat.inbox.append)
+            seat.agent = Agent(LocalTransport(self.game, seat.client), team)
+            seat.agent.player.clock = ServerClock(timer=lambda: self.game.now)
+            if record != None :
+                path = f"{record}.{len(self.seats)}"
+                seat.agent.record(WireRecorder(path, random.getrandbits(63), timer=lambda: round(self.game.now * 1e9)))
+            seat.agent.hello()
+            self.seats.append(seat)
+
+    ## @brief Agents still playing.
+    def active(self):
+        return [seat for seat in self.seats if seat.result == None]
+
+    ## @brief Hands the lines sent by the game to the agents and lets them decide.
+    ## @return True if any agent read a line.
+    def deliver(self):
+        delivered = False
+        for seat in self.active():
+            if seat.inbox :
+                delivered = True
+                started = time.process_time()
+                self.read(seat)
+                seat.cpu += time.process_time() - started
+        return delivered
+
+    ## @brief Hands the lines of its inbox to an agent, then lets it decide.
+    ## @param seat Seat of the agent.
+    def read(self, seat):
+        joined = seat.agent.joined
+        while seat.inbox :
+            for line in seat.inbox.popleft().splitlines(keepends=True):
+                status = seat.agent.feed(line)
+                if status == 1 :
+                    seat.waiting = True
+                elif status == -1 or status == -10 :
+                    seat.result = status
+                    return
+        if joined :
+            seat.agent.pump()
+        seat.agent.decide()
+
+    ## @brief Plays until the next event of the game is done.
+    def step(self):
+        for _ in range(MAX_ROUNDS):
+            if not self.deliver() :
+                break
+        self.game.advance(self.game.next_event())
+        for seat in self.active():
+            if seat.waiting :
+                seat.waiting = False
+                seat.agent.hello()
+            elif seat.agent.joined and not seat.agent.player.queue and not seat.inbox :
+                started = time.process_time()
+                seat.agent.decide()
+                seat.cpu += time.process_time() - started
+
+    ## @brief Plays until a team wins, every agent left or a time unit is reached.
+    ## @param until Last time unit to simulate, None for no limit.
+    ## @return List with the result of every agent: -1 dead, -10 ended, None still playing.
+    def run(self, until=None):
+        while self.game.winner == None and self.active() and (until == None or self.game.now < until) :
+            self.step()
+        return [seat.result for seat in self.seats]
+
+    ## @brief Closes the logs of the recorded agents.
+    def close(self):
+        for seat in self.seats:
+            if seat.agent.recorder != None :
+                seat.agent.recorder.close()
+
+## @brief Serves a game over TCP until a team wins.
+## @param game Game to serve.
+## @param port Port to listen on.
+## @param freq Time units per second, None to run as fast as possible.
+## @param quiet Seconds the fast mode lets the clients answer between two events.
+##
+##       In real time the game follows the clock. As fast as possible, the game jumps
+##       to the next event once the clients had quiet seconds to answer what the last one
+##       told them, right away when it told nothing and every player has a command
+##       executing, and stands still while nobody plays.
+async def serve(game, port, freq=100, quiet=QUIET_DELAY):
+    received = asyncio.Event()
+
+    written = [0]
+
+    def writer_of(writer):
+        def send(data):
+            writer.write(data)
+            written[0] += 1
+        return send
+
+    async def handle(reader, writer):
+        client = game.connect(writer_of(writer), writer.close)
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line :
+                    break
+                game.receive(client, line.decode(errors="replace").rstrip("\n"))
+                received.set()
+        except ConnectionError:
+            pass
+        game.disconnect(client)
+
+    server = await asyncio.start_server(handle, port=port)
+    start = time.monotonic()
+    async with server:
+        while game.winner == None :
+            received.clear()
+            if freq == None :
+                if game.population() == 0 :
+                    await received.wait()
+                    continue
+                if written[0] or not game.waiting() :
+                    written[0] = 0
+                    try:
+                        await asyncio.wait_for(received.wait(), quiet)
+                        continue
+                    except asyncio.TimeoutError:
+                        pass
+                game.advance(game.next_event())
+                continue
+            game.advance((time.monotonic() - start) * freq)
+            upcoming = game.next_event()
+            delay = 1.0 if upcoming == None else max(upcoming / freq - (time.monotonic() - start), 0)
+            try:
+                await asyncio.wait_for(received.wait(), min(delay, 1.0))
+            except asyncio.TimeoutError:
+                pass
+    for client in game.clients:
+        if client.close != None :
+            client.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("-p", "--port", type=int, required=True, help="Port to listen on")
+    parser.add_argument("-x", "--width", type=int, default=10, help="Width of the map")
+    parser.add_argument("-y", "--height", type=int, default=10, help="Height of the map")
+    parser.add_argument("-n", "--names", nargs="+", default=["team1", "team2"], help="Names of the teams")
+    parser.add_argument("-c", "--clients", type=int, default=6, help="Eggs every team starts with")
+    parser.add_argument("-f", "--freq", type=int, default=100, help="Time units per second")
+    parser.add_argument("--fast", action="store_true", help="Jump from one event to the next instead of following the clock")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the random generator")
+    parser.add_argument("--respawn", type=int, default=RESPAWN_UNITS, help="Time units between two respawns of the resources")
+    parser.add_argument("--densities", type=float, nargs=len(RESOURCES), default=DENSITIES, metavar="SHARE",
+                        help="Share of the tiles holding each resource, food first")
+    parser.add_argument("--help", action="help", help="Show this help message and exit")
+    args = parser.parse_args()
+
+    game = Game(args.width, args.height, args.names, args.clients, args.seed, args.densities, args.respawn)
+    try:
+        asyncio.run(serve(game, args.port, None if args.fast else args.freq))
+    except KeyboardInterrupt:
+        print("Closing...")
+    print(f"winner: {game.winner}, time units: {game.now}", file=sys.stderr)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+## @file bench_game.py
+## @brief End-to-end benchmark: a team of zappy_ai agents against the in-process simulator.
+##
+##        PYTHONPATH=src python tests/benchmarks/bench_game.py --agents 6 --seeds 1 2 3 -o tests/benchmarks/bench.json
+##        PYTHONPATH=src python tests/benchmarks/bench_game.py --compare before.json after.json
+##        PYTHONPATH=src python tests/benchmarks/bench_game.py --seeds 1 --record /tmp/game
+
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+from zappy_sim import Game, Simulation, DENSITIES, RESPAWN_UNITS
+from zappy_ai import MAX_LEVEL
+
+## Metrics compared between two result files, and whether a lower value is better.
+METRICS = {
+    "ticks_to_level_8": True,
+    "wall_to_level_8": True,
+    "max_level": False,
+    "elevations_per_1000_ticks": False,
+    "wasted_commands": True,
+    "starved": True,
+    "cpu_ms_per_agent": True,
+}
+
+## @brief Plays one game and measures it.
+## @param seed Seed of the game and of the agents.
+## @param args Parsed command line.
+## @return Dictionary of the metrics of the game.
+def bench(seed, args):
+    random.seed(seed)
+    game = Game(args.width, args.height, [args.team], args.agents, seed=seed, densities=args.densities, respawn=args.respawn)
+    simulation = Simulation(game)
+    simulation.spawn(args.team, args.agents, None if args.record == None else f"{args.record}-{seed}")
+    started = time.perf_counter()
+    wall_to_level_8 = None
+    while game.winner == None and simulation.active() and game.now < args.ticks :
+        simulation.step()
+        if wall_to_level_8 == None and game.reached[MAX_LEVEL] != None :
+            wall_to_level_8 = time.perf_counter() - started
+            if args.stop :
+                break
+    wall = time.perf_counter() - started
+    simulation.close()
+    ticks = game.now
+    levels = [client.level for client in game.clients if client.team != None]
+    return {
+        "seed": seed,
+        "ticks": ticks,
+        "wall": round(wall, 4),
+        "server_seconds": round(ticks / args.freq, 2),
+        "ticks_to_level_8": game.reached[MAX_LEVEL],
+        "wall_to_level_8": None if wall_to_level_8 == None else round(wall_to_level_8, 4),
+        "reached": game.reached[2:],
+        "max_level": max(levels, default=1),
+        "elevations": game.stats["elevations"],
+        "elevations_per_1000_ticks": round(1000 * game.stats["elevations"] / max(ticks, 1), 3),
+        "commands": game.stats["commands"],
+        "wasted_commands": game.stats["refused"] + game.stats["dropped"],
+        "starved": game.stats["starved"],
+        "players": len(levels),
+        "cpu_ms_per_agent": round(1000 * sum(seat.cpu for seat in simulation.seats) / len(simulation.seats), 3),
+    }
+
+## @brief Summarizes the runs with the median of every metric.
+## @param runs List of the dictionaries returned by bench.
+## @return Dictionary of the medians, None when no run reached a value.
+def summarize(runs):
+    summary = {}
+    for metric in METRICS:
+        values = [run[metric] for run in runs if run[metric] != None]
+        summary[metric] = statistics.median(values) if values else None
+    summary["runs_reaching_level_8"] = sum(1 for run in runs if run["ticks_to_level_8"] != None)
+    return summary
+
+## @brief Gives the commit the benchmark runs on.
+## @return Short hash, or None outside of a git checkout.
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+## @brief Prints the summaries of two result files side by side.
+## @param before Path of the reference results.
+## @param after Path of the new results.
+def compare(before, after):
+    with open(before) as file:
+        old = json.load(file)
+    with open(after) as file:
+        new = json.load(file)
+    if old["config"] != new["config"] :
+        print("warning: the two files were produced with different settings", file=sys.stderr)
+    print(f"{'metric':<28}{str(old['commit']):>12}{str(new['commit']):>12}")
+    for metric, lower in METRICS.items():
+        first, second = old["summary"][metric], new["summary"][metric]
+        mark = ""
+        if first != None and second != None and first != second :
+            mark = "  better" if (second < first) == lower else "  worse"
+        print(f"{metric:<28}{str(first):>12}{str(second):>12}{mark}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time a team of zappy_ai agents against the local simulator.")
+    parser.add_argument("--agents", type=int, default=6, help="Agents of the team, also the eggs it starts with")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3], help="Seeds, one game each")
+    parser.add_argument("-x", "--width", type=int, default=10, help="Width of the map")
+    parser.add_argument("-y", "--height", type=int, default=10, help="Height of the map")
+    parser.add_argument("-f", "--freq", type=int, default=100, help="Frequency the server seconds are reported at")
+    parser.add_argument("--ticks", type=int, default=30000, help="Time units after which a game is stopped")
+    parser.add_argument("--team", default="team1", help="Name of the team")
+    parser.add_argument("--respawn", type=int, default=RESPAWN_UNITS, help="Time units between two respawns of the resources")
+    parser.add_argument("--densities", type=float, nargs=7, default=DENSITIES, metavar="SHARE",
+                        help="Share of the tiles holding each resource, food first")
+    parser.add_argument("--stop", action="store_true", help="Stop a game as soon as a player reaches level 8")
+    parser.add_argument("--record", metavar="PREFIX", help="Record the agents to PREFIX-SEED.N for zappy_replay")
+    parser.add_argument("-o", "--output", help="File the JSON results are written to")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare :
+        compare(*args.compare)
+        sys.exit(0)
+    runs = []
+    for seed in args.seeds:
+        runs.append(bench(seed, args))
+        print(json.dumps(runs[-1]), file=sys.stderr)
+    config = {key: getattr(args, key) for key in ("agents", "seeds", "width", "height", "freq", "ticks", "stop", "densities", "respawn")}
+    results = {"commit": commit(), "config": config, "runs": runs, "summary": summarize(runs)}
+    text = json.dumps(results, indent=2)
+    if args.output :
+        with open(args.output, "w") as file:
+            file.write(text + "\n")
+    else :
+        print(text)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+
+## @file bench_hotpaths.py
+## @brief Micro-benchmarks of the parsing and decision hot paths of zappy_ai.
+##
+##        PYTHONPATH=src python tests/benchmarks/bench_hotpaths.py [--number N] [--only NAME] [--json FILE]
+##
+##        Every case reports the time per call in ns, and the memory a call allocates
+##        on top of what is already live (tracemalloc peak), in bytes.
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from zappy_ai import (
+    Player, Session, View, Command, RESOURCES, CONE_SIZES, MAX_LEVEL,
+    split_by_commas, check_stones, inventory, command_received, command_send, plan_gathering,
+    pending_queue
+)
+
+## Transport swallowing every command.
+class NullTransport:
+    def send(self, data):
+        return len(data)
+
+    def sendall(self, data):
+        pass
+
+## @brief Builds a player who joined a 30x30 game.
+## @param level Level of the player.
+## @return The Player.
+def joined_player(level=1):
+    session = Session()
+    session.feed("1\n")
+    session.feed("30 30\n")
+    player = Player()
+    player.join(session)
+    player.level = level
+    player.starve = 20
+    return player
+
+## @brief Builds a realistic Look reply.
+## @param level Level the cone is seen at.
+## @param rng Random generator.
+## @return Decoded reply, with players and resources scattered on the tiles.
+def look_reply(level, rng):
+    tiles = []
+    for index in range(CONE_SIZES[level]):
+        words = ["player"] * (index == 0) + ["player"] * (rng.random() < 0.1)
+        for name in RESOURCES:
+            words += [name] * rng.choice((0, 0, 0, 1, 1, 2))
+        tiles.append(" ".join(words))
+    return "[" + ", ".join(tiles) + "]\n"
+
+## @brief Builds a broadcast storm: other teams chatting, other levels and own level calls.
+## @param count Number of lines.
+## @param rng Random generator.
+## @return List of the lines as bytes.
+def broadcast_storm(count, rng):
+    lines = []
+    for _ in range(count):
+        kind = rng.random()
+        direction = rng.randrange(9)
+        if kind < 0.6 :
+            lines.append(b'message %d, "k8Jd2 team-chat %d %d"\n' % (direction, rng.randrange(99), rng.randrange(99)))
+        elif kind < 0.9 :
+            lines.append(b'message %d, "Level %d r"\n' % (direction, rng.randrange(2, 9)))
+        else :
+            lines.append(b'message %d, "Level 1 c"\n' % direction)
+    return lines
+
+## @brief Lists the benchmark cases.
+## @return List of (name, function) pairs, the function is timed per call.
+def cases():
+    rng = random.Random(42)
+    inventory_reply = "[food 1260, linemate 9, deraumere 8, sibur 10, mendiane 5, phiras 6, thystame 1]\n"
+    long_look = look_reply(MAX_LEVEL, rng)
+    long_view = View.parse(long_look)
+    storm = broadcast_storm(1024, rng)
+    storm_player = joined_player()
+    storm_iter = [0]
+
+    def flood():
+        line = storm[storm_iter[0] & 1023]
+        storm_iter[0] += 1
+        command_received(storm_player, line)
+
+    reply_player = joined_player()
+
+    def reply_ok():
+        reply_player.queue = pending_queue((Command.FORWARD,))
+        command_received(reply_player, b"ok\n")
+
+    look_player = joined_player(MAX_LEVEL)
+    look_bytes = long_look.encode()
+
+    def reply_look():
+        look_player.queue = pending_queue((Command.LOOK,))
+        look_player.look = True
+        look_player.view = []
+        command_received(look_player, look_bytes)
+
+    stones_player = joined_player(MAX_LEVEL)
+    inventory_player = joined_player()
+    plan_player = joined_player(7)
+
+    send_player = joined_player(7)
+    transport = NullTransport()
+
+    def decide():
+        send_player.queue.clear()
+        send_player.look = True
+        send_player.view = long_view
+        send_player.wants_incanting = False
+        send_player.incanting = False
+        command_send(transport, send_player)
+
+    return [
+        ("split_by_commas/inventory", lambda: split_by_commas(inventory_reply)),
+        ("View.parse/81 tiles", lambda: View.parse(long_look)),
+        ("check_stones/81 tiles", lambda: check_stones(stones_player, 40, long_view)),
+        ("inventory/full", lambda: inventory(inventory_player, inventory_reply)),
+        ("command_received/broadcast storm", flood),
+        ("command_received/ok", reply_ok),
+        ("command_received/look 81 tiles", reply_look),
+        ("plan_gathering/81 tiles", lambda: plan_gathering(plan_player, long_view, 9)),
+        ("command_send/81 tiles", decide),
+    ]
+
+## @brief Times a function.
+## @param function Function to call.
+## @param number Calls to time.
+## @return Nanoseconds per call, best of three rounds.
+def time_per_call(function, number):
+    best = None
+    for _ in range(3):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        elapsed = (time.perf_counter_ns() - started) / number
+        best = elapsed if best == None else min(best, elapsed)
+    return best
+
+## @brief Measures the memory a call allocates on top of what is live.
+## @param function Function to call.
+## @param number Calls to measure.
+## @return Mean tracemalloc peak above the memory live before each call, in bytes.
+def bytes_per_call(function, number):
+    tracemalloc.start()
+    total = 0
+    for _ in range(number):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        function()
+        total += tracemalloc.get_traced_memory()[1] - current
+    tracemalloc.stop()
+    return total / number
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the hot paths of zappy_ai.")
+    parser.add_argument("--number", type=int, default=2000, help="Calls timed per round")
+    parser.add_argument("--only", help="Run the cases whose name contains this text")
+    parser.add_argument("--json", help="File the results are written to")
+    args = parser.parse_args()
+
+    random.seed(0)
+    results = {}
+    print(f"{'case':<36}{'ns/op':>12}{'bytes/op':>12}")
+    for name, function in cases():
+        if args.only and args.only not in name :
+            continue
+        function()
+        ns = time_per_call(function, args.number)
+        allocated = bytes_per_call(function, max(args.number // 10, 1))
+        results[name] = {"ns_per_op": round(ns, 1), "bytes_per_op": round(allocated, 1)}
+        print(f"{name:<36}{ns:>12.1f}{allocated:>12.1f}")
+    if args.json :
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+            file.write("\n")
+    sys.exit(0)
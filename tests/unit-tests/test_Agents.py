@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import unittest
+import asyncio
+from unittest.mock import Mock
+from zappy_ai import Agent, AgentConnection, AgentProtocol, run_agent, run_agents, wakeup_delay, IDLE_WAKEUP, STALL_WAKEUP, Command
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+async def fake_server(reader, writer):
+    writer.write(b"WELCOME\n")
+    await reader.readline()
+    writer.write(b"1\n10 10\n")
+    await writer.drain()
+    await reader.readline()
+    writer.write(b"dead\n")
+    await writer.drain()
+    writer.close()
+
+async def run_against_fake_server(count):
+    server = await asyncio.start_server(fake_server, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await run_agents("127.0.0.1", port, "team", count, delay=0)
+
+async def refusing_server(reader, writer):
+    writer.write(b"WELCOME\n")
+    await reader.readline()
+    writer.write(b"ko\n")
+    await writer.drain()
+    writer.close()
+
+async def run_against_refusing_server():
+    server = await asyncio.start_server(refusing_server, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        return await run_agent("127.0.0.1", port, "wrong")
+
+class TestAgentConnection(unittest.TestCase):
+
+    def test_send_writes_to_stream(self):
+        writer = Mock()
+        connection = AgentConnection(writer)
+        self.assertEqual(connection.send(b"Look\n"), 5)
+        writer.write.assert_called_once_with(b"Look\n")
+
+    def test_close(self):
+        writer = Mock()
+        AgentConnection(writer).close()
+        writer.close.assert_called_once()
+
+class TestRunAgents(unittest.TestCase):
+
+    def test_single_agent_dies(self):
+        results = asyncio.run(run_against_fake_server(1))
+        self.assertEqual(results, [-1])
+
+    def test_many_agents_share_loop(self):
+        results = asyncio.run(run_against_fake_server(5))
+        self.assertEqual(results, [-1] * 5)
+
+    def test_refused_team_loses_connection(self):
+        self.assertIsNone(asyncio.run(run_against_refusing_server()))
+
+class MockPlayer:
+    def __init__(self):
+        self.queue = []
+
+class TestWakeupDelay(unittest.TestCase):
+
+    def test_idle_player(self):
+        self.assertEqual(wakeup_delay(MockPlayer()), IDLE_WAKEUP)
+
+    def test_commands_in_flight(self):
+        player = MockPlayer()
+        player.queue.append(Command.LOOK)
+        self.assertEqual(wakeup_delay(player), STALL_WAKEUP)
+
+class TestAgent(unittest.TestCase):
+
+    def test_joins_then_plays(self):
+        transport = Mock()
+        agent = Agent(transport, "team")
+        agent.hello()
+        transport.send.assert_called_once_with(b"team\n")
+        self.assertEqual(agent.feed(b"WELCOME\n"), 0)
+        self.assertEqual(agent.feed(b"ko\n"), 1)
+        agent.feed(b"2\n")
+        agent.feed(b"8 9\n")
+        self.assertTrue(agent.joined)
+        self.assertEqual(agent.player.tracker.width, 8)
+        agent.decide()
+        transport.sendall.assert_called_once_with(b"Look\n")
+        self.assertEqual(agent.feed(b"dead\n"), -1)
+
+    def test_wrong_team(self):
+        agent = Agent(Mock(), "team")
+        self.assertEqual(agent.feed(b"Wrong team name, please try again\n"), -10)
+
+class TestAgentProtocol(unittest.TestCase):
+
+    def feed(self, protocol, data):
+        view = protocol.get_buffer(len(data))
+        view[:len(data)] = data
+        protocol.buffer_updated(len(data))
+
+    def test_decides_as_soon_as_reply_arrives(self):
+        async def scenario():
+            done = asyncio.get_running_loop().create_future()
+            protocol = AgentProtocol("team", done)
+            transport = Mock()
+            protocol.connection_made(transport)
+            transport.write.assert_called_once_with(b"team\n")
+            self.feed(protocol, b"WELCOME\n")
+            self.assertFalse(protocol.joined)
+            self.feed(protocol, b"3\n10 12\n")
+            transport.write.assert_called_with(b"Look\n")
+            self.assertEqual(protocol.player.session.slots, 3)
+            self.assertEqual(protocol.player.tracker.height, 12)
+            self.feed(protocol, b"dea")
+            self.assertFalse(done.done())
+            self.feed(protocol, b"d\n")
+            return await done
+        self.assertEqual(asyncio.run(scenario()), -1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 
 import unittest
-from zappy_ai import check_stones
+from zappy_ai import check_stones, Player
 import os
 import sys
 
 script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, script_dir)
 
-class MockPlayer:
+class MockPlayer(Player):
     def __init__(self):
+        super().__init__()
         self.view = []
         self.linemate = 0
         self.max_linemate = 5
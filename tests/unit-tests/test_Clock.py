@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import unittest
+from zappy_ai import ServerClock, Player, Command, command_received, time_left, FOOD_TIME_UNITS, RALLY_TIMEOUT, pending_queue
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class FakeTimer:
+    def __init__(self):
+        self.time = 100.0
+
+    def __call__(self):
+        return self.time
+
+class TestServerClock(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.clock = ServerClock(self.timer)
+
+    def test_unknown_until_chained_reply(self):
+        self.clock.reply(7, 7, 0)
+        self.timer.time += 0.7
+        self.clock.reply(7, 14, 0)
+        self.assertIsNone(self.clock.unit)
+        self.assertIsNone(self.clock.seconds(7))
+        self.assertEqual(self.clock.now(), 14)
+
+    def test_chained_replies_give_the_unit(self):
+        self.clock.reply(7, 7, 1)
+        self.timer.time += 0.7
+        self.clock.reply(7, 14, 0)
+        self.assertAlmostEqual(self.clock.unit, 0.1)
+        self.assertAlmostEqual(self.clock.seconds(300), 30)
+
+    def test_smoothing(self):
+        self.clock.reply(7, 7, 1)
+        self.timer.time += 0.7
+        self.clock.reply(7, 14, 1)
+        self.timer.time += 1.4
+        self.clock.reply(7, 21, 0)
+        self.assertAlmostEqual(self.clock.unit, 0.12)
+
+    def test_outliers_are_dropped(self):
+        self.clock.reply(7, 7, 1)
+        self.timer.time += 0.7
+        self.clock.reply(7, 14, 1)
+        self.timer.time += 30.0
+        self.clock.reply(7, 21, 1)
+        self.assertAlmostEqual(self.clock.unit, 0.1)
+
+    def test_outliers_in_a_row_replace_the_unit(self):
+        self.clock.unit = 1.0
+        self.clock.reply(7, 7, 1)
+        for ticks in (14, 21, 28):
+            self.timer.time += 0.07
+            self.clock.reply(7, ticks, 1)
+        self.assertAlmostEqual(self.clock.unit, 0.01)
+
+    def test_now_in_ticks(self):
+        self.clock.reply(7, 7, 1)
+        self.timer.time += 0.7
+        self.clock.reply(7, 14, 0)
+        self.timer.time += 2.0
+        self.assertAlmostEqual(self.clock.now(), 34)
+
+class TestClockedPlayer(unittest.TestCase):
+
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.player = Player()
+        self.player.clock = ServerClock(self.timer)
+
+    def test_replies_feed_the_clock(self):
+        self.player.queue = pending_queue([Command.FORWARD, Command.LOOK])
+        command_received(self.player, b"ok\n")
+        self.timer.time += 0.07
+        command_received(self.player, b"[player]\n")
+        self.assertAlmostEqual(self.player.clock.unit, 0.01)
+
+    def test_incantation_is_not_sampled(self):
+        self.player.queue = pending_queue([Command.FORWARD, Command.LOOK, Command.FORWARD])
+        command_received(self.player, b"ok\n")
+        self.timer.time += 0.07
+        command_received(self.player, b"[player]\n")
+        command_received(self.player, b"Elevation underway\n")
+        self.timer.time += 3.0
+        command_received(self.player, b"Current level: 2\n")
+        self.timer.time += 0.07
+        command_received(self.player, b"ok\n")
+        self.assertAlmostEqual(self.player.clock.unit, 0.01)
+        self.assertEqual(self.player.clock.now(), self.player.ticks)
+
+    def test_idle_time_is_spent(self):
+        self.player.clock.unit = 0.01
+        self.player.clock.anchor_time = self.timer.time
+        self.player.starve = 2
+        self.timer.time += 1.0
+        self.assertAlmostEqual(time_left(self.player), 2 * FOOD_TIME_UNITS - 100)
+
+    def test_rally_timeout(self):
+        self.player.clock.unit = 0.01
+        self.player.clock.anchor_time = self.timer.time
+        command_received(self.player, b"message 3, Level 1 r\n")
+        self.assertEqual(self.player.should_stop, 1)
+        self.player.need_to_go = None
+        command_received(self.player, b"ok\n")
+        self.assertEqual(self.player.should_stop, 1)
+        self.timer.time += (RALLY_TIMEOUT + 1) * 0.01
+        command_received(self.player, b"ok\n")
+        self.assertIsNone(self.player.should_stop)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import unittest
+from zappy_ai import CONE_SIZES, CONE_OFFSETS, CONE_DELTAS, CONE_ROUTES, CONE_COSTS, MAX_LEVEL, Tracker, Command
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+F, L, R = Command.FORWARD, Command.LEFT, Command.RIGHT
+
+class TestConeTables(unittest.TestCase):
+
+    def test_sizes(self):
+        self.assertEqual(CONE_SIZES[1:], (4, 9, 16, 25, 36, 49, 64, 81))
+        self.assertEqual(len(CONE_OFFSETS), CONE_SIZES[MAX_LEVEL])
+
+    def test_offsets(self):
+        self.assertEqual(CONE_OFFSETS[0], (0, 0))
+        self.assertEqual(CONE_OFFSETS[1:4], ((1, -1), (1, 0), (1, 1)))
+        self.assertEqual(CONE_OFFSETS[4], (2, -2))
+        self.assertEqual(CONE_OFFSETS[64], (8, -8))
+        self.assertEqual(CONE_OFFSETS[80], (8, 8))
+
+    def test_deltas_follow_heading(self):
+        self.assertEqual(CONE_DELTAS[0][3], (1, -1))
+        self.assertEqual(CONE_DELTAS[1][3], (1, 1))
+        self.assertEqual(CONE_DELTAS[2][3], (-1, 1))
+        self.assertEqual(CONE_DELTAS[3][3], (-1, -1))
+
+    def test_routes(self):
+        self.assertEqual(CONE_ROUTES[0], ())
+        self.assertEqual(CONE_ROUTES[2], (F,))
+        self.assertEqual(CONE_ROUTES[1], (F, L, F))
+        self.assertEqual(CONE_ROUTES[8], (F, F, R, F, F))
+        self.assertEqual(CONE_COSTS[8], 35)
+
+    def test_routes_reach_their_tile(self):
+        for index, commands in enumerate(CONE_ROUTES):
+            tracker = Tracker()
+            for code in commands:
+                tracker.confirm(code)
+            self.assertEqual((tracker.x, tracker.y), CONE_DELTAS[0][index])
+
+if __name__ == "__main__":
+    unittest.main()
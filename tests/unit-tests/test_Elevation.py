@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import ELEVATION, STONES, deficit, check_level, incant_nb, reduce_max, Player, Command, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestElevationTable(unittest.TestCase):
+
+    def test_total_stones_match_initial_needs(self):
+        player = Player()
+        for column, stone in enumerate(STONES):
+            total = sum(ELEVATION[level].stones[column] for level in range(1, 8))
+            self.assertEqual(total, getattr(player, "max_" + stone))
+
+    def test_reduce_max_down_to_zero(self):
+        player = Player()
+        for level in range(2, 9):
+            player.level = level
+            reduce_max(player)
+        for stone in STONES:
+            self.assertEqual(getattr(player, "max_" + stone), 0)
+
+    def test_incant_nb(self):
+        player = Player()
+        for level, needed in ((2, 2), (3, 2), (4, 4), (5, 4), (6, 6), (7, 6)):
+            player.level = level
+            player.nb_r = needed - 1
+            self.assertFalse(incant_nb(player))
+            player.nb_r = needed
+            self.assertTrue(incant_nb(player))
+        player.level = 1
+        self.assertFalse(incant_nb(player))
+        player.level = 8
+        self.assertFalse(incant_nb(player))
+
+class TestDeficit(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+
+    def test_nothing(self):
+        self.player.view = [""]
+        self.assertEqual(deficit(self.player, 7), [2, 2, 2, 2, 2, 1])
+
+    def test_tile_and_inventory_add_up(self):
+        self.player.view = ["linemate phiras"]
+        self.player.linemate = 1
+        self.player.sibur = 3
+        self.assertEqual(deficit(self.player, 3), [0, 0, 0, 0, 1, 0])
+
+class TestCheckLevel(unittest.TestCase):
+
+    def setUp(self):
+        self.client_socket = Mock()
+        self.player = Player()
+        self.player.starve = 40
+
+    def test_exact_set_batch(self):
+        self.player.view = ["linemate thystame"]
+        for stone in STONES:
+            setattr(self.player, stone, 2)
+        self.assertTrue(check_level(self.player, self.client_socket, 7))
+        self.assertEqual(pending_codes(self.player.queue), [Command.SET_LINEMATE, Command.SET_DERAUMERE, Command.SET_DERAUMERE,
+                                             Command.SET_SIBUR, Command.SET_SIBUR, Command.SET_MENDIANE,
+                                             Command.SET_MENDIANE, Command.SET_PHIRAS, Command.SET_PHIRAS])
+        self.assertEqual(self.player.linemate, 1)
+        self.assertEqual(self.player.thystame, 2)
+
+    def test_missing_stone(self):
+        self.player.view = [""]
+        self.player.linemate = 1
+        self.assertFalse(check_level(self.player, self.client_socket, 2))
+        self.assertEqual(pending_codes(self.player.queue), [])
+
+    def test_not_enough_food(self):
+        self.player.view = ["linemate deraumere sibur"]
+        self.player.starve = ELEVATION[2].food - 1
+        self.assertFalse(check_level(self.player, self.client_socket, 2))
+        self.assertEqual(pending_codes(self.player.queue), [])
+
+if __name__ == "__main__":
+    unittest.main()
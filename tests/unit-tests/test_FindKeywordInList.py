@@ -24,7 +24,7 @@ class TestFindKeywordInList(unittest.TestCase):
 
     def test_keyword_as_substring(self):
         strings = ["pineapple", "banana", "cherry", "apple pie"]
-        self.assertEqual(find_keyword_in_list(strings, "apple"), [0, 3])
+        self.assertEqual(find_keyword_in_list(strings, "apple"), [3])
 
     def test_keyword_as_whole_word(self):
         strings = ["apple", "banana", "cherry", "apple"]
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import time_left, hungry, plan_gathering, check_level, command_send, Player, View, Command, Resource, FOOD_TIME_UNITS, FOOD_RESERVE, START_FOOD, pending_queue, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestTimeLeft(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+
+    def test_starts_from_the_hatching_food(self):
+        self.assertEqual(time_left(self.player), START_FOOD * FOOD_TIME_UNITS)
+        self.player.queue = pending_queue([Command.INVENTORY])
+        self.assertTrue(hungry(self.player))
+
+    def test_counts_elapsed_and_queue(self):
+        self.player.starve = 5
+        self.player.elapsed = 20
+        self.player.queue = pending_queue([Command.FORWARD, Command.INVENTORY, Command.FORK])
+        self.assertEqual(time_left(self.player), 5 * FOOD_TIME_UNITS - 20 - 50)
+
+    def test_hungry(self):
+        self.player.starve = FOOD_RESERVE // FOOD_TIME_UNITS
+        self.assertFalse(hungry(self.player))
+        self.player.queue = pending_queue([Command.LOOK])
+        self.assertTrue(hungry(self.player))
+
+class TestHungryDecisions(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+        self.player.starve = 3
+
+    def test_gathering_only_food(self):
+        view = View.from_tiles(["", "linemate", "sibur", "food"])
+        self.assertEqual(plan_gathering(self.player, view, 9), [Command.FORWARD, Command.RIGHT, Command.FORWARD, Command.TAKE_FOOD])
+
+    def test_stone_on_tile_is_left(self):
+        self.player.view = View.from_tiles(["linemate", "", "", ""])
+        self.player.look = True
+        command_send(Mock(), self.player)
+        self.assertNotIn(Command.TAKE_LINEMATE, pending_codes(self.player.queue))
+
+    def test_hunger_ends_the_rally(self):
+        self.player.need_to_go = 3
+        self.player.should_stop = 1
+        self.player.nb_r = 1
+        self.player.look = True
+        command_send(Mock(), self.player)
+        self.assertIsNone(self.player.need_to_go)
+        self.assertIsNone(self.player.should_stop)
+        self.player.wants_incanting = True
+        self.player.should_stop = 2
+        command_send(Mock(), self.player)
+        self.assertFalse(self.player.wants_incanting)
+        self.assertNotIn(Command.BROADCAST_1_R, pending_codes(self.player.queue))
+
+    def test_elevation_waits_for_queued_commands(self):
+        self.player.starve = 16
+        self.player.inventory[Resource.LINEMATE] = 1
+        self.player.inventory[Resource.DERAUMERE] = 1
+        self.player.inventory[Resource.SIBUR] = 1
+        self.player.view = View.from_tiles(["player"])
+        self.assertTrue(check_level(self.player, Mock(), 2))
+        self.player.queue = pending_queue([Command.FORWARD])
+        self.player.inventory[Resource.LINEMATE] = 1
+        self.player.inventory[Resource.DERAUMERE] = 1
+        self.player.inventory[Resource.SIBUR] = 1
+        self.assertFalse(check_level(self.player, Mock(), 2))
+
+if __name__ == "__main__":
+    unittest.main()
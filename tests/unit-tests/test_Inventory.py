@@ -2,15 +2,16 @@
 
 import unittest
 from unittest.mock import Mock
-from zappy_ai import inventory
+from zappy_ai import inventory, Player
 import os
 import sys
 
 script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, script_dir)
 
-class MockPlayer:
+class MockPlayer(Player):
     def __init__(self):
+        super().__init__()
         self.starve = 0  # Initial value doesn't really matter for tests
         self.level = 1    # Mocking level for testing purposes
 
@@ -34,5 +35,15 @@ class TestInventory(unittest.TestCase):
         inventory(player, data_rec)
         self.assertEqual(player.starve, 0)  # Should remain unchanged
 
+    def test_stones_are_parsed(self):
+        player = MockPlayer()
+        inventory(player, "[food 5, linemate 2, deraumere 3, sibur 0, mendiane 1, phiras 4, thystame 1]")
+        self.assertEqual(player.linemate, 2)
+        self.assertEqual(player.deraumere, 3)
+        self.assertEqual(player.sibur, 0)
+        self.assertEqual(player.mendiane, 1)
+        self.assertEqual(player.phiras, 4)
+        self.assertEqual(player.thystame, 1)
+
 if __name__ == "__main__":
     unittest.main()
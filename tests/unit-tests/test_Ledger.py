@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import command_received, spend_time, reconcile_ledger, Player, FOOD_TIME_UNITS, RECONCILE_EVERY, Command, pending_queue, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestLedger(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+        self.player.starve = 10
+
+    def test_take_ok_counts(self):
+        self.player.queue = pending_queue([Command.TAKE_LINEMATE, Command.TAKE_FOOD])
+        command_received(self.player, b"ok\n")
+        command_received(self.player, b"ok\n")
+        self.assertEqual(self.player.linemate, 1)
+        self.assertEqual(self.player.starve, 11)
+        self.assertEqual(pending_codes(self.player.queue), [])
+
+    def test_take_ko_does_not_count(self):
+        self.player.queue = pending_queue([Command.TAKE_SIBUR])
+        command_received(self.player, b"ko\n")
+        self.assertEqual(self.player.sibur, 0)
+        self.assertEqual(pending_codes(self.player.queue), [])
+
+    def test_set_ko_gives_stone_back(self):
+        self.player.phiras = 0
+        self.player.queue = pending_queue([Command.SET_PHIRAS, Command.SET_PHIRAS])
+        command_received(self.player, b"ko\n")
+        command_received(self.player, b"ok\n")
+        self.assertEqual(self.player.phiras, 1)
+
+    def test_food_consumption(self):
+        spend_time(self.player, FOOD_TIME_UNITS - 1)
+        self.assertEqual(self.player.starve, 10)
+        spend_time(self.player, 2 * FOOD_TIME_UNITS + 1)
+        self.assertEqual(self.player.starve, 7)
+
+    def test_commands_cost_food(self):
+        self.player.queue = pending_queue([Command.FORWARD] * 18)
+        for _ in range(18):
+            command_received(self.player, b"ok\n")
+        self.assertEqual(self.player.starve, 9)
+
+    def test_reconcile(self):
+        self.player.queue = pending_queue([Command.INVENTORY])
+        command_received(self.player, b"[food 4, linemate 1]\n")
+        self.assertEqual(self.player.starve, 4)
+        self.assertEqual(self.player.linemate, 1)
+        self.player.queue = pending_queue([Command.RIGHT] * RECONCILE_EVERY)
+        for _ in range(RECONCILE_EVERY - 1):
+            command_received(self.player, b"ok\n")
+        self.assertFalse(self.player.reconcile)
+        command_received(self.player, b"ok\n")
+        self.assertEqual(self.player.starve, 2)
+        self.assertTrue(self.player.reconcile)
+        reconcile_ledger(Mock(), self.player)
+        self.assertFalse(self.player.reconcile)
+        reconcile_ledger(Mock(), self.player)
+        self.assertEqual(pending_codes(self.player.queue), [Command.INVENTORY])
+        command_received(self.player, b"[food 3, linemate 1]\n")
+        self.assertEqual((self.player.starve, self.player.ledger_age), (3, 0))
+
+if __name__ == "__main__":
+    unittest.main()
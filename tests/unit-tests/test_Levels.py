@@ -11,7 +11,9 @@ from zappy_ai import (
     check_level_seven,
     can_evolve,
     incant_nb,
-    Player
+    Player,
+    Command,
+    pending_codes
 )
 import os
 import sys
@@ -62,8 +64,9 @@ sys.path.insert(0, script_dir)
 #         self.assertFalse(incant_nb(MockPlayer(level=1, nb_r=2)))
 #         self.assertFalse(incant_nb(MockPlayer(level=8, nb_r=7)))
 
-class MockPlayer:
+class MockPlayer(Player):
     def __init__(self):
+        super().__init__()
         self.view = []
         self.linemate = 0
         self.deraumere = 0
@@ -93,9 +96,9 @@ class TestCheckLevelTwo(unittest.TestCase):
         result = check_level_two(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertIn("Set linemate\n", self.player.queue)
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
     def test_cannot_evolve_at_level_two_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -144,7 +147,7 @@ class TestCheckLevelTwo(unittest.TestCase):
         self.player.starve = None
         result = check_level_two(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
 
     def test_not_enough_deraumere(self):
         # Test case where the player does not have enough deraumere or sibur
@@ -178,9 +181,9 @@ class TestCheckLevelTwo(unittest.TestCase):
         result = check_level_two(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertNotIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertNotIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
 
 class TestCheckLevelThree(unittest.TestCase):
@@ -202,10 +205,10 @@ class TestCheckLevelThree(unittest.TestCase):
         result = check_level_three(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.wants_incanting)
-        self.assertIn("Set linemate\n", self.player.queue)
-        # self.assertIn("Set phiras\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
-        self.assertIn("Broadcast \"Level 3 r\"", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))
+        # self.assertIn(Command.SET_PHIRAS, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
+        self.assertIn(Command.BROADCAST_3_R, pending_codes(self.player.queue))
 
     def test_cannot_evolve_at_level_three_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -251,7 +254,7 @@ class TestCheckLevelThree(unittest.TestCase):
         result = check_level_three(self.player, self.client_socket)
         self.assertFalse(result)
         self.assertFalse(self.player.just_inc)
-        self.assertFalse(self.player.starve)
+        self.assertEqual(self.player.starve, 15)
     
     def test_send_inventory_request(self):
         # Test case where the player's starve is None and an inventory request is sent
@@ -262,7 +265,7 @@ class TestCheckLevelThree(unittest.TestCase):
         self.player.starve = None
         result = check_level_three(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
     
     def test_linemate_already_set(self):
         self.player.view = ["", "deraumere", "sibur"]
@@ -273,9 +276,9 @@ class TestCheckLevelThree(unittest.TestCase):
         result = check_level_three(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertNotIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertNotIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
     
 
@@ -298,7 +301,7 @@ class TestCheckLevelFour(unittest.TestCase):
         result = check_level_four(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.wants_incanting)
-        self.assertIn("Broadcast \"Level 4 r\"", self.player.queue)
+        self.assertIn(Command.BROADCAST_4_R, pending_codes(self.player.queue))
 
     def test_cannot_evolve_at_level_four_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -359,7 +362,7 @@ class TestCheckLevelFour(unittest.TestCase):
         result = check_level_four(self.player, self.client_socket)
         self.assertFalse(result)
         self.assertFalse(self.player.just_inc)
-        self.assertFalse(self.player.starve)
+        self.assertEqual(self.player.starve, 15)
 
     def test_send_inventory_request(self):
         # Test case where the player's starve is None and an inventory request is sent
@@ -371,7 +374,7 @@ class TestCheckLevelFour(unittest.TestCase):
         self.player.starve = None
         result = check_level_four(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
 
     def test_linemate_already_set(self):
         self.player.view = ["", "", ""]
@@ -383,9 +386,9 @@ class TestCheckLevelFour(unittest.TestCase):
         result = check_level_four(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
 class TestCheckLevelFive(unittest.TestCase):
 
@@ -406,7 +409,7 @@ class TestCheckLevelFive(unittest.TestCase):
         result = check_level_five(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.wants_incanting)
-        self.assertIn("Broadcast \"Level 5 r\"", self.player.queue)
+        self.assertIn(Command.BROADCAST_5_R, pending_codes(self.player.queue))
 
     def test_cannot_evolve_to_level_five_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -470,7 +473,7 @@ class TestCheckLevelFive(unittest.TestCase):
         result = check_level_five(self.player, self.client_socket)
         self.assertFalse(result)
         self.assertFalse(self.player.just_inc)
-        self.assertFalse(self.player.starve)
+        self.assertEqual(self.player.starve, 15)
 
     def test_send_inventory_request(self):
         # Test case where the player's starve is None and an inventory request is sent
@@ -482,7 +485,7 @@ class TestCheckLevelFive(unittest.TestCase):
         self.player.starve = None
         result = check_level_five(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
     
     def test_linemate_already_set(self):
         self.player.view = ["", "", ""]
@@ -494,9 +497,9 @@ class TestCheckLevelFive(unittest.TestCase):
         result = check_level_four(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
 class TestCheckLevelSix(unittest.TestCase):
 
@@ -517,7 +520,7 @@ class TestCheckLevelSix(unittest.TestCase):
         result = check_level_six(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.wants_incanting)
-        self.assertIn("Broadcast \"Level 6 r\"", self.player.queue)
+        self.assertIn(Command.BROADCAST_6_R, pending_codes(self.player.queue))
 
     def test_cannot_evolve_to_level_six_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -581,7 +584,7 @@ class TestCheckLevelSix(unittest.TestCase):
         result = check_level_six(self.player, self.client_socket)
         self.assertFalse(result)
         self.assertFalse(self.player.just_inc)
-        self.assertFalse(self.player.starve)
+        self.assertEqual(self.player.starve, 15)
 
     def test_send_inventory_request(self):
         # Test case where the player's starve is None and an inventory request is sent
@@ -593,7 +596,7 @@ class TestCheckLevelSix(unittest.TestCase):
         self.player.starve = None
         result = check_level_six(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
 
     def test_linemate_already_set(self):
         self.player.view = ["", "", ""]
@@ -605,9 +608,9 @@ class TestCheckLevelSix(unittest.TestCase):
         result = check_level_six(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
 class TestCheckLevelSeven(unittest.TestCase):
 
@@ -630,7 +633,7 @@ class TestCheckLevelSeven(unittest.TestCase):
         result = check_level_seven(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.wants_incanting)  # Check player state
-        self.assertIn("Broadcast \"Level 7 r\"", self.player.queue)  # Check command sent
+        self.assertIn(Command.BROADCAST_7_R, pending_codes(self.player.queue))  # Check command sent
 
     def test_cannot_evolve_to_level_seven_insufficient_resources(self):
         # Test case where player cannot evolve due to insufficient resources
@@ -742,7 +745,7 @@ class TestCheckLevelSeven(unittest.TestCase):
         self.player.starve = None
         result = check_level_seven(self.player, self.client_socket)
         self.assertFalse(result)
-        self.assertIn("Inventory\n", self.player.queue)
+        self.assertIn(Command.INVENTORY, pending_codes(self.player.queue))
 
     def test_linemate_already_set(self):
         self.player.view = ["", "", ""]
@@ -754,9 +757,9 @@ class TestCheckLevelSeven(unittest.TestCase):
         result = check_level_seven(self.player, self.client_socket)
         self.assertTrue(result)
         self.assertTrue(self.player.just_inc)
-        self.assertIn("Set linemate\n", self.player.queue)  # linemate should not be set again
-        self.assertIn("Set deraumere\n", self.player.queue)
-        self.assertIn("Set sibur\n", self.player.queue)
+        self.assertIn(Command.SET_LINEMATE, pending_codes(self.player.queue))  # linemate should not be set again
+        self.assertIn(Command.SET_DERAUMERE, pending_codes(self.player.queue))
+        self.assertIn(Command.SET_SIBUR, pending_codes(self.player.queue))
 
 class TestCanEvolve(unittest.TestCase):
 
@@ -774,7 +777,7 @@ class TestCanEvolve(unittest.TestCase):
         result = can_evolve(self.client_socket, self.player)
         self.assertTrue(result)
         self.assertTrue(self.player.incanting)  # Check player state
-        self.assertIn("Incantation\n", self.player.queue)  # Check command sent
+        self.assertIn(Command.INCANTATION, pending_codes(self.player.queue))  # Check command sent
 
     def test_cannot_evolve_already_incanting(self):
         # Test case where player is already incanting
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import unittest
+import socket
+from zappy_ai import LineBuffer
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestLineBuffer(unittest.TestCase):
+
+    def setUp(self):
+        self.buffer = LineBuffer(capacity=64)
+
+    def test_complete_lines(self):
+        self.assertEqual(self.buffer.feed(b"ok\nko\n"), [b"ok\n", b"ko\n"])
+
+    def test_partial_line_is_kept(self):
+        self.assertEqual(self.buffer.feed(b"[player food, lin"), [])
+        self.assertEqual(self.buffer.feed(b"emate]\nok"), [b"[player food, linemate]\n"])
+        self.assertEqual(self.buffer.feed(b"\n"), [b"ok\n"])
+
+    def test_empty_feed(self):
+        self.assertEqual(self.buffer.feed(b""), [])
+
+    def test_line_bigger_than_capacity(self):
+        look = b"[" + b"player food linemate, " * 40 + b"]\n"
+        lines = []
+        for i in range(0, len(look), 50):
+            lines += self.buffer.feed(look[i:i + 50])
+        self.assertEqual(lines, [look])
+
+    def test_many_reads_reuse_storage(self):
+        self.buffer.feed(b"message 3, Level 2 r\n")
+        capacity = len(self.buffer.data)
+        for _ in range(100):
+            self.assertEqual(self.buffer.feed(b"message 3, Level 2 r\n"), [b"message 3, Level 2 r\n"])
+        self.assertEqual(len(self.buffer.data), capacity)
+
+    def test_read_from_socket(self):
+        left, right = socket.socketpair()
+        try:
+            left.sendall(b"dead\nWELC")
+            self.assertEqual(self.buffer.read_from(right), 9)
+            self.assertEqual(list(self.buffer.lines()), [b"dead\n"])
+            left.close()
+            self.assertEqual(self.buffer.read_from(right), 0)
+        finally:
+            right.close()
+
+if __name__ == "__main__":
+    unittest.main()
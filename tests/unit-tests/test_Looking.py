@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock
-from zappy_ai import looking, received_look
+from zappy_ai import looking, received_look, Command, Player, pending_codes
 import os
 import sys
 
@@ -26,7 +26,7 @@ class TestLooking(unittest.TestCase):
 
     def test_looking_command_sent(self):
         looking(self.client_socket, self.player)
-        self.assertIn("Look\n", self.player.queue)
+        self.assertIn(Command.LOOK, pending_codes(self.player.queue))
 
     def test_player_look_set_to_true(self):
         looking(self.client_socket, self.player)
@@ -39,29 +39,26 @@ class TestLooking(unittest.TestCase):
 
 class TestReceivedLook(unittest.TestCase):
 
+    def setUp(self):
+        self.player = Player()
+        self.player.look = True
+
     def test_received_look_ko(self):
-        player = MockPlayer()
-        data_rec = Mock()
-        data_rec.decode.return_value = "ko\n"
-        received_look(player, data_rec)
-        self.assertFalse(player.look)
-        self.assertEqual(player.view, [])
+        received_look(self.player, b"ko\n")
+        self.assertFalse(self.player.look)
+        self.assertEqual(self.player.view, [])
 
     def test_received_look_valid_data(self):
-        player = MockPlayer()
-        data_rec = Mock()
-        data_rec.decode.return_value = "[linemate, deraumere]"
-        received_look(player, data_rec)
-        self.assertTrue(player.look)  # Should remain True if not "ko"
-        self.assertEqual(player.view, ["linemate", "deraumere"])
+        received_look(self.player, b"[linemate, deraumere]\n")
+        self.assertTrue(self.player.look)  # Should remain True if not "ko"
+        self.assertEqual(len(self.player.view), 2)
+        self.assertEqual(self.player.view.count(0, "linemate"), 1)
+        self.assertEqual(self.player.view.count(1, "deraumere"), 1)
 
     def test_received_look_empty_data(self):
-        player = MockPlayer()
-        data_rec = Mock()
-        data_rec.decode.return_value = ""
-        received_look(player, data_rec)
-        self.assertTrue(player.look)  # Should remain True if data is empty
-        self.assertEqual(player.view, [])
+        received_look(self.player, b"")
+        self.assertTrue(self.player.look)  # Should remain True if data is empty
+        self.assertEqual(self.player.view.resources(0), 0)
 
 if __name__ == "__main__":
     unittest.main()
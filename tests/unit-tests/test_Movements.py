@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock
-from zappy_ai import going_forward, turning_right, turning_left, make_random_move, moving_level, go_to_need, moving_player
+from zappy_ai import going_forward, turning_right, turning_left, make_random_move, moving_level, go_to_need, moving_player, Command, Player, pending_codes
 import os
 import sys
 
@@ -25,15 +25,15 @@ class TestMovements(unittest.TestCase):
 
     def test_going_forward(self):
         going_forward(self.client_socket, self.player)
-        self.assertEqual(self.player.queue, ["Forward\n"])
+        self.assertEqual(pending_codes(self.player.queue), [Command.FORWARD])
 
     def test_turning_right(self):
         turning_right(self.client_socket, self.player)
-        self.assertEqual(self.player.queue, ["Right\n"])
+        self.assertEqual(pending_codes(self.player.queue), [Command.RIGHT])
 
     def test_turning_left(self):
         turning_left(self.client_socket, self.player)
-        self.assertEqual(self.player.queue, ["Left\n"])
+        self.assertEqual(pending_codes(self.player.queue), [Command.LEFT])
 
     def test_socket_send_called(self):
         with unittest.mock.patch.object(self.client_socket, 'send') as mock_send:
@@ -50,9 +50,7 @@ class TestMovementFunctions(unittest.TestCase):
 
     def setUp(self):
         self.client_socket = Mock()
-        self.player = Mock()
-        self.player.view = []
-        self.player.queue = []
+        self.player = Player()
 
     def test_make_random_move(self):
         make_random_move(self.client_socket, self.player)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import route, route_cost, toroidal_delta, plan_gathering, moving_level, CONE_OFFSETS, Player, View, Command, Resource, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+F, L, R = Command.FORWARD, Command.LEFT, Command.RIGHT
+
+def cone(size, tiles):
+    return View.from_tiles([tiles.get(index, "") for index in range(size)])
+
+class TestRoute(unittest.TestCase):
+
+    def test_straight(self):
+        self.assertEqual(route(0, 0, -2), [F, F])
+
+    def test_forward_first_when_cheaper(self):
+        self.assertEqual(route(0, -1, -1), [F, L, F])
+        self.assertEqual(route(0, 2, -1), [F, R, F, F])
+
+    def test_behind(self):
+        self.assertEqual(route(0, 0, 1), [R, R, F])
+
+    def test_other_heading(self):
+        self.assertEqual(route(1, 1, 0), [F])
+        self.assertEqual(route(1, 0, -1), [L, F])
+
+    def test_no_move(self):
+        self.assertEqual(route(0, 0, 0), [])
+
+    def test_cost(self):
+        self.assertEqual(route_cost([F, L, F]), 21)
+
+    def test_toroidal_delta(self):
+        self.assertEqual(toroidal_delta(3, 5), -2)
+        self.assertEqual(toroidal_delta(-3, 5), 2)
+        self.assertEqual(toroidal_delta(2, 5), 2)
+        self.assertEqual(toroidal_delta(7, None), 7)
+
+class TestPlanGathering(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+
+    def test_nothing_useful(self):
+        self.assertIsNone(plan_gathering(self.player, cone(4, {1: "player"}), 9))
+
+    def test_nearest_tile_first(self):
+        view = cone(9, {6: "linemate"})
+        self.assertEqual(plan_gathering(self.player, view, 9), [F, F, Command.TAKE_LINEMATE])
+
+    def test_several_stops(self):
+        view = cone(9, {1: "food", 6: "linemate"})
+        self.assertEqual(plan_gathering(self.player, view, 9),
+                         [F, F, Command.TAKE_LINEMATE, L, F, L, F, Command.TAKE_FOOD])
+
+    def test_every_item_wanted_on_a_tile(self):
+        self.player.needs[Resource.SIBUR] = 1
+        view = cone(4, {2: "food food sibur sibur player"})
+        self.assertEqual(plan_gathering(self.player, view, 9),
+                         [F, Command.TAKE_FOOD, Command.TAKE_FOOD, Command.TAKE_SIBUR])
+
+    def test_budget(self):
+        view = cone(9, {2: "food", 6: "food", 8: "food"})
+        self.assertEqual(plan_gathering(self.player, view, 4), [F, Command.TAKE_FOOD, F, Command.TAKE_FOOD])
+        self.assertEqual(plan_gathering(self.player, view, 0), [F, Command.TAKE_FOOD])
+
+    def test_unneeded_stone_is_skipped(self):
+        self.player.needs[Resource.LINEMATE] = 0
+        view = cone(9, {2: "linemate", 8: "food"})
+        self.assertEqual(plan_gathering(self.player, view, 9), [F, F, R, F, F, Command.TAKE_FOOD])
+
+    def test_every_tile_of_level_eight(self):
+        for index in range(1, 81):
+            distance, side = CONE_OFFSETS[index]
+            commands = plan_gathering(self.player, cone(81, {index: "food"}), 9)
+            self.assertEqual(commands[-1], Command.TAKE_FOOD)
+            self.assertEqual(commands.count(F), distance + abs(side))
+            self.assertLessEqual(len(commands) - commands.count(F), 2)
+
+    def test_wraps_around_small_map(self):
+        self.player.tracker.width = 5
+        self.player.tracker.height = 10
+        view = cone(16, {15: "food"})
+        self.assertEqual(plan_gathering(self.player, view, 9), [F, F, F, L, F, F, Command.TAKE_FOOD])
+
+class TestMovingLevelPlanner(unittest.TestCase):
+
+    def test_far_tile_is_targeted(self):
+        player = Player()
+        player.level = 4
+        player.view = cone(25, {0: "player", 18: "sibur"})
+        moving_level(Mock(), player)
+        self.assertEqual(pending_codes(player.queue), [F, F, F, F, L, F, F, Command.TAKE_SIBUR, Command.LOOK])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock
-from zappy_ai import plant_egg
+from zappy_ai import plant_egg, Command, Player, pending_codes
 import os
 import sys
 
@@ -13,10 +13,10 @@ class TestPlantEgg(unittest.TestCase):
 
     def test_plant_egg(self):
         client_socket = Mock()
-        player = Mock()
+        player = Player()
         plant_egg(client_socket, player)
         client_socket.send.assert_called_once_with(b"Fork\n")
-        self.assertEqual(player.queue, ["Fork\n"])
+        self.assertEqual(pending_codes(player.queue), [Command.FORK])
 
     def test_invalid_client_socket(self):
         client_socket = None
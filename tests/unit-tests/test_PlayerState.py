@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+
+import unittest
+from zappy_ai import Player, Resource, RESOURCE_INDEX, Command, command_resource, update_ledger, pending_queue
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestPlayerState(unittest.TestCase):
+
+    def test_player_is_slotted(self):
+        player = Player()
+        self.assertFalse(hasattr(player, "__dict__"))
+        with self.assertRaises(AttributeError):
+            player.unknown = 1
+
+    def test_stones_are_array_cells(self):
+        player = Player()
+        player.sibur = 3
+        self.assertEqual(player.inventory[Resource.SIBUR], 3)
+        player.needs[Resource.THYSTAME] = 0
+        self.assertEqual(player.max_thystame, 0)
+
+    def test_default_needs(self):
+        player = Player()
+        self.assertEqual(list(player.needs[1:]), [9, 8, 10, 5, 6, 1])
+
+    def test_resource_index(self):
+        self.assertEqual(RESOURCE_INDEX["phiras"], Resource.PHIRAS)
+
+    def test_command_resource(self):
+        self.assertEqual(command_resource(Command.TAKE_MENDIANE), (Command.TAKE_FOOD, Resource.MENDIANE))
+        self.assertEqual(command_resource(Command.SET_LINEMATE), (Command.SET_FOOD, Resource.LINEMATE))
+        self.assertEqual(command_resource(Command.LOOK), (None, None))
+
+    def test_ledger_updates_array(self):
+        player = Player()
+        player.queue = pending_queue([Command.TAKE_DERAUMERE])
+        update_ledger(player, "ok\n")
+        self.assertEqual(player.inventory[Resource.DERAUMERE], 1)
+
+if __name__ == "__main__":
+    unittest.main()
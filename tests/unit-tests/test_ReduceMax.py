@@ -1,15 +1,16 @@
 #!/usr/bin/env python3
 
 import unittest
-from zappy_ai import reduce_max
+from zappy_ai import reduce_max, Player
 import os
 import sys
 
 script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 sys.path.insert(0, script_dir)
 
-class MockPlayer:
+class MockPlayer(Player):
     def __init__(self, level, max_linemate, max_deraumere, max_sibur, max_phiras, max_mendiane, max_thystame):
+        super().__init__()
         self.level = level
         self.max_linemate = max_linemate
         self.max_deraumere = max_deraumere
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import Player, Pending, ServerClock, ELEVATION_TIMEOUT, FOOD_TIME_UNITS, Command, COMMAND_COST, answers, command_received, send_command, pending_queue, pending_codes, received_unsolicited, MESSAGE_PATTERN
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestPending(unittest.TestCase):
+
+    def test_entry(self):
+        entry = Pending(Command.FORK)
+        self.assertEqual(entry.code, Command.FORK)
+        self.assertEqual(entry.cost, COMMAND_COST[Command.FORK])
+        self.assertIsNone(entry.callback)
+
+    def test_answers(self):
+        self.assertTrue(answers(Command.FORWARD, "ok\n"))
+        self.assertTrue(answers(Command.LOOK, "ko\n"))
+        self.assertTrue(answers(Command.LOOK, "[player, food]\n"))
+        self.assertFalse(answers(Command.LOOK, "ok\n"))
+        self.assertFalse(answers(Command.FORWARD, "[food 3]\n"))
+        self.assertTrue(answers(Command.CONNECT_NBR, "2\n"))
+        self.assertFalse(answers(Command.TAKE_FOOD, "Elevation underway\n"))
+
+class TestRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+
+    def test_callback_gets_the_reply(self):
+        replies = []
+        send_command(Mock(), self.player, Command.TAKE_FOOD, lambda entry, reply: replies.append((entry.code, reply)))
+        command_received(self.player, b"ko\n")
+        self.assertEqual(replies, [(Command.TAKE_FOOD, "ko\n")])
+        self.assertEqual(len(self.player.queue), 0)
+
+    def test_stray_line_keeps_the_queue(self):
+        self.player.queue = pending_queue([Command.LOOK, Command.FORWARD])
+        command_received(self.player, b"ok\n")
+        self.assertEqual(pending_codes(self.player.queue), [Command.LOOK, Command.FORWARD])
+        command_received(self.player, b"[player, food]\n")
+        self.assertEqual(pending_codes(self.player.queue), [Command.FORWARD])
+
+    def test_unsolicited_lines_keep_the_queue(self):
+        self.player.queue = pending_queue([Command.RIGHT])
+        for line in (b"Elevation underway\n", b"eject: 3\n", b'message 2, "hello"\n', b"Current level: 5\n"):
+            self.assertEqual(command_received(self.player, line), 0)
+        self.assertEqual(pending_codes(self.player.queue), [Command.RIGHT])
+        self.assertEqual(self.player.level, 1)
+
+    def test_level_up_of_a_participant(self):
+        self.player.queue = pending_queue([Command.FORWARD])
+        command_received(self.player, b"Current level: 2\n")
+        self.assertEqual(self.player.level, 2)
+        self.assertFalse(self.player.just_inc)
+        self.assertEqual(pending_codes(self.player.queue), [Command.FORWARD])
+
+    def test_failed_incantation_of_a_participant(self):
+        self.player.queue = pending_queue([Command.FORWARD, Command.RIGHT])
+        command_received(self.player, b"Elevation underway\n")
+        command_received(self.player, b"ok\n")
+        command_received(self.player, b"ko\n")
+        self.assertEqual(pending_codes(self.player.queue), [Command.RIGHT])
+        command_received(self.player, b"ok\n")
+        self.assertEqual(len(self.player.queue), 0)
+
+    def test_participant_keeps_the_ko_of_its_running_command(self):
+        self.player.level = 2
+        self.player.queue = pending_queue([Command.TAKE_FOOD, Command.LOOK, Command.FORWARD])
+        starve = self.player.starve
+        for line in (b"Elevation underway\n", b"ko\n", b"Current level: 3\n", b"[player food]\n", b"ok\n"):
+            command_received(self.player, line)
+        self.assertEqual(len(self.player.queue), 0)
+        self.assertEqual(self.player.level, 3)
+        self.assertEqual(self.player.starve, starve - (3 * 7 + 300) // FOOD_TIME_UNITS)
+        self.assertIsNone(self.player.elevating)
+
+    def test_participant_stops_waiting_for_the_ko(self):
+        now = [0.0]
+        self.player.clock = ServerClock(timer=lambda: now[0])
+        self.player.clock.unit = 0.01
+        self.player.queue = pending_queue([Command.FORWARD])
+        command_received(self.player, b"Elevation underway\n")
+        command_received(self.player, b"ok\n")
+        now[0] += ELEVATION_TIMEOUT * 0.01 + 0.1
+        send_command(Mock(), self.player, Command.TAKE_FOOD)
+        command_received(self.player, b"ko\n")
+        self.assertEqual(len(self.player.queue), 0)
+        self.assertIsNone(self.player.elevating)
+
+    def test_level_up_of_the_initiator(self):
+        replies = []
+        send_command(Mock(), self.player, Command.INCANTATION, lambda entry, reply: replies.append(reply))
+        command_received(self.player, b"Elevation underway\n")
+        self.assertEqual(replies, [])
+        command_received(self.player, b"Current level: 2\n")
+        self.assertEqual(replies, ["Current level: 2\n"])
+        self.assertTrue(self.player.just_inc)
+        self.assertEqual(len(self.player.queue), 0)
+
+class TestUnsolicitedDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Player()
+        self.player.level = 3
+
+    def test_replies_are_not_dispatched(self):
+        for line in (b"ok\n", b"ko\n", b"[player]\n", b"4\n", b""):
+            self.assertIsNone(received_unsolicited(self.player, line))
+
+    def test_statuses(self):
+        self.assertEqual(received_unsolicited(self.player, b"dead\n"), -1)
+        self.assertEqual(received_unsolicited(self.player, b"end\n"), -10)
+        self.assertEqual(received_unsolicited(self.player, b"eject: 1\n"), 0)
+
+    def test_pattern(self):
+        self.assertEqual(MESSAGE_PATTERN.match(b'message 4, "Level 3 r"\n').groups(), (b"4", b"3", b"r"))
+        self.assertEqual(MESSAGE_PATTERN.match(b"message 0, Level 7 c\n").groups(), (b"0", b"7", b"c"))
+
+    def test_rally_call(self):
+        command_received(self.player, b'message 6, "Level 3 r"\n')
+        self.assertEqual(self.player.need_to_go, 6)
+        self.assertEqual(self.player.should_stop, 1)
+
+    def test_irrelevant_broadcasts_are_dropped(self):
+        for line in (b'message 6, "Level 4 r"\n', b'message 2, "gather at 3 3"\n', b"message 1, Level 3 x\n"):
+            self.assertEqual(command_received(self.player, line), 0)
+        self.assertIsNone(self.player.need_to_go)
+        self.assertEqual(self.player.nb_r, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import CommandScheduler, MAX_PENDING, COMMAND_BYTES, COMMAND_TEXTS, Command, broadcast_command, send_command, going_forward, turning_left, moving_level, Player, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class MockPlayer:
+    def __init__(self):
+        self.queue = []
+
+class TestCommandScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.client_socket = Mock()
+        self.player = MockPlayer()
+        self.scheduler = CommandScheduler(self.client_socket, self.player)
+
+    def test_sends_while_slots_are_free(self):
+        going_forward(self.scheduler, self.player)
+        self.client_socket.sendall.assert_not_called()
+        self.scheduler.flush()
+        self.client_socket.sendall.assert_called_once_with(b"Forward\n")
+        self.assertEqual(self.scheduler.in_flight(), 1)
+
+    def test_one_write_per_decision_pass(self):
+        going_forward(self.scheduler, self.player)
+        turning_left(self.scheduler, self.player)
+        going_forward(self.scheduler, self.player)
+        self.scheduler.flush()
+        self.client_socket.sendall.assert_called_once_with(b"Forward\nLeft\nForward\n")
+        self.scheduler.flush()
+        self.assertEqual(self.client_socket.sendall.call_count, 1)
+
+    def test_never_exceeds_server_slots(self):
+        for _ in range(MAX_PENDING + 3):
+            going_forward(self.scheduler, self.player)
+        self.scheduler.flush()
+        self.client_socket.sendall.assert_called_once_with(b"Forward\n" * MAX_PENDING)
+        self.assertEqual(len(self.scheduler.backlog), 3)
+        self.assertEqual(len(self.player.queue), MAX_PENDING + 3)
+
+    def test_pump_releases_freed_slots(self):
+        for _ in range(MAX_PENDING + 3):
+            going_forward(self.scheduler, self.player)
+        self.scheduler.flush()
+        self.player.queue.pop(0)
+        self.player.queue.pop(0)
+        self.scheduler.pump()
+        self.scheduler.flush()
+        self.client_socket.sendall.assert_called_with(b"Forward\n" * 2)
+        self.assertEqual(self.scheduler.in_flight(), MAX_PENDING)
+        self.assertEqual(len(self.scheduler.backlog), 1)
+
+class TestLookPipelining(unittest.TestCase):
+
+    def test_look_queued_behind_moves(self):
+        client_socket = Mock()
+        player = Player()
+        player.view = ["", "", "food", ""]
+        moving_level(client_socket, player)
+        self.assertEqual(pending_codes(player.queue), [Command.FORWARD, Command.TAKE_FOOD, Command.LOOK])
+        self.assertTrue(player.look)
+        self.assertEqual(player.view, [])
+
+class TestCommandCodes(unittest.TestCase):
+
+    def test_codes_are_pre_encoded(self):
+        self.assertEqual(COMMAND_BYTES[Command.TAKE_LINEMATE], b"Take linemate\n")
+        self.assertEqual(COMMAND_TEXTS[Command.SET_THYSTAME], "Set thystame\n")
+
+    def test_broadcast_command(self):
+        self.assertIs(broadcast_command(4, "r"), Command.BROADCAST_4_R)
+        self.assertIs(broadcast_command(8, "c"), Command.BROADCAST_8_C)
+        self.assertEqual(COMMAND_BYTES[broadcast_command(4, "r")], b'Broadcast "Level 4 r"\n')
+
+    def test_send_command_queues_the_code(self):
+        client_socket = Mock()
+        player = MockPlayer()
+        send_command(client_socket, player, Command.INCANTATION)
+        client_socket.send.assert_called_once_with(b"Incantation\n")
+        self.assertEqual(pending_codes(player.queue), [Command.INCANTATION])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,7 +2,7 @@
 
 import unittest
 from unittest.mock import Mock
-from zappy_ai import send_and_remove
+from zappy_ai import send_and_remove, Command, pending_codes
 import os
 import sys
 
@@ -28,7 +28,7 @@ class TestSendAndRemove(unittest.TestCase):
         self.player.view = ["food", "linemate"]
         send_and_remove(self.client_socket, self.player, 0, "food")
         self.assertEqual(self.player.view, ["", "linemate"])
-        self.assertEqual(self.player.queue, ["Take food\n"])
+        self.assertEqual(pending_codes(self.player.queue), [Command.TAKE_FOOD])
 
     def test_socket_send_called(self):
         with unittest.mock.patch.object(self.client_socket, 'send') as mock_send:
@@ -50,7 +50,7 @@ class TestSendAndRemove(unittest.TestCase):
     def test_add_to_queue(self):
         self.player.view = ["food", "linemate"]
         send_and_remove(self.client_socket, self.player, 0, "food")
-        self.assertEqual(self.player.queue, ["Take food\n"])
+        self.assertEqual(pending_codes(self.player.queue), [Command.TAKE_FOOD])
 
 if __name__ == "__main__":
     unittest.main()
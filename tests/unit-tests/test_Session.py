@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+
+import unittest
+import socket
+from zappy_ai import Session, LineBuffer, Player, handshake
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestSession(unittest.TestCase):
+
+    def test_feed(self):
+        session = Session()
+        self.assertFalse(session.feed("WELCOME\n"))
+        self.assertFalse(session.feed("4\n"))
+        self.assertTrue(session.feed("30 20\n"))
+        self.assertEqual((session.slots, session.width, session.height), (4, 30, 20))
+
+    def test_team_full_notice_is_ignored(self):
+        session = Session()
+        self.assertFalse(session.feed("This team is full, please wait\n"))
+        self.assertFalse(session.feed("0\n"))
+        self.assertTrue(session.feed("10 10\n"))
+        self.assertEqual(session.slots, 0)
+
+    def test_player_join(self):
+        session = Session()
+        session.feed("1\n")
+        session.feed("8 6\n")
+        player = Player()
+        player.join(session)
+        self.assertIs(player.session, session)
+        self.assertEqual((player.tracker.width, player.tracker.height), (8, 6))
+
+class TestHandshake(unittest.TestCase):
+
+    def setUp(self):
+        self.server, self.client = socket.socketpair()
+        self.buffer = LineBuffer()
+
+    def tearDown(self):
+        self.server.close()
+        self.client.close()
+
+    def test_keeps_game_lines(self):
+        self.server.sendall(b"WELCOME\n2\n10 10\nmessage 1, Level 2 r\n")
+        session = handshake(self.client, self.buffer, "team")
+        self.assertEqual(self.server.recv(1024), b"team\n")
+        self.assertEqual((session.slots, session.width, session.height), (2, 10, 10))
+        self.assertEqual(list(self.buffer.lines()), [b"message 1, Level 2 r\n"])
+
+    def test_wrong_team_name(self):
+        self.server.sendall(b"WELCOME\nWrong team name, please try again\n")
+        self.assertIsNone(handshake(self.client, self.buffer, "team"))
+
+    def test_connection_closed(self):
+        self.server.sendall(b"WELCOME\n")
+        self.server.shutdown(socket.SHUT_WR)
+        self.assertIsNone(handshake(self.client, self.buffer, "team"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+
+import unittest
+import random
+from zappy_sim import Game, Simulation, direction_from, shortest, START_FOOD, RESPAWN_UNITS
+from zappy_ai import FOOD_TIME_UNITS, View
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class Inbox:
+    def __init__(self):
+        self.data = b""
+
+    def send(self, data):
+        self.data += data
+
+    def lines(self):
+        lines = self.data.decode().splitlines()
+        self.data = b""
+        return lines
+
+def empty_game(width=10, height=10, **kwargs):
+    game = Game(width, height, densities=(0,) * 7, seed=1, **kwargs)
+    for tile in game.tiles:
+        tile[:] = [0] * 7
+    return game
+
+def joined(game, team="team1", x=0, y=0, orientation=0):
+    inbox = Inbox()
+    client = game.connect(inbox.send)
+    game.receive(client, team)
+    game.move(client, x, y)
+    client.orientation = orientation
+    inbox.lines()
+    return client, inbox
+
+class TestGeometry(unittest.TestCase):
+
+    def test_shortest(self):
+        self.assertEqual(shortest(9, 10), -1)
+        self.assertEqual(shortest(-4, 10), -4)
+
+    def test_directions(self):
+        self.assertEqual(direction_from(0, 0, 0), 0)
+        self.assertEqual(direction_from(0, -3, 0), 1)
+        self.assertEqual(direction_from(-1, -1, 0), 2)
+        self.assertEqual(direction_from(-2, 0, 0), 3)
+        self.assertEqual(direction_from(0, 2, 0), 5)
+        self.assertEqual(direction_from(3, 0, 0), 7)
+        self.assertEqual(direction_from(3, 0, 1), 1)
+
+class TestGame(unittest.TestCase):
+
+    def test_handshake(self):
+        game = Game(10, 12, teams=["a"], slots=2, seed=3)
+        inbox = Inbox()
+        client = game.connect(inbox.send)
+        game.receive(client, "a")
+        self.assertEqual(inbox.lines(), ["WELCOME", "1", "10 12"])
+        other = game.connect(inbox.send)
+        game.receive(other, "b")
+        self.assertEqual(inbox.lines(), ["WELCOME", "ko"])
+
+    def test_commands_take_their_time(self):
+        game = empty_game()
+        client, inbox = joined(game)
+        game.receive(client, "Forward")
+        game.receive(client, "Right")
+        game.advance(6)
+        self.assertEqual(inbox.lines(), [])
+        game.advance(14)
+        self.assertEqual(inbox.lines(), ["ok", "ok"])
+        self.assertEqual((client.x, client.y, client.orientation), (0, 9, 1))
+
+    def test_look_matches_the_client_parser(self):
+        game = empty_game()
+        client, inbox = joined(game, x=5, y=5)
+        game.tiles[game.tile(5, 5)][0] = 2
+        game.tiles[game.tile(4, 4)][1] = 1
+        game.receive(client, "Look")
+        game.advance(7)
+        view = View.parse(inbox.lines()[0])
+        self.assertEqual(len(view), 4)
+        self.assertEqual(view.count(0, "player"), 1)
+        self.assertEqual(view.count(0, "food"), 2)
+        self.assertEqual(view.count(1, "linemate"), 1)
+
+    def test_broadcast(self):
+        game = empty_game()
+        sender, _ = joined(game, x=2, y=2)
+        listener, inbox = joined(game, x=2, y=5, orientation=0)
+        game.receive(sender, 'Broadcast "Level 1 r"')
+        game.advance(7)
+        self.assertEqual(inbox.lines(), ['message 1, "Level 1 r"'])
+
+    def test_starvation(self):
+        game = empty_game()
+        client, inbox = joined(game)
+        game.advance(FOOD_TIME_UNITS * START_FOOD)
+        self.assertTrue(client.alive)
+        game.advance(FOOD_TIME_UNITS * (START_FOOD + 1))
+        self.assertFalse(client.alive)
+        self.assertEqual(inbox.lines(), ["dead"])
+
+    def test_respawn(self):
+        game = Game(10, 10, seed=1)
+        for tile in game.tiles:
+            tile[0] = 0
+        game.advance(RESPAWN_UNITS)
+        self.assertEqual(sum(tile[0] for tile in game.tiles), 50)
+
+    def test_respawn_settings(self):
+        game = Game(10, 10, seed=1, densities=(0.2,) + (0,) * 6, respawn=50)
+        for tile in game.tiles:
+            tile[0] = 0
+        game.advance(RESPAWN_UNITS)
+        self.assertEqual(sum(tile[0] for tile in game.tiles), 0)
+        game.advance(50)
+        self.assertEqual(sum(tile[0] for tile in game.tiles), 20)
+
+    def test_first_elevation(self):
+        game = empty_game()
+        client, inbox = joined(game)
+        game.tiles[0][1] = 1
+        game.receive(client, "Incantation")
+        self.assertEqual(inbox.lines(), ["Elevation underway"])
+        game.advance(300)
+        self.assertEqual(inbox.lines(), ["Current level: 2"])
+        self.assertEqual(game.tiles[0][1], 0)
+        self.assertEqual(game.reached[2], 300)
+
+    def test_elevation_freezes_participants(self):
+        game = empty_game()
+        game.tiles[0][1:4] = [1, 1, 1]
+        first, first_inbox = joined(game)
+        second, second_inbox = joined(game)
+        first.level = second.level = 2
+        game.receive(first, "Incantation")
+        game.receive(second, "Right")
+        game.advance(299)
+        self.assertEqual(second_inbox.lines(), ["Elevation underway"])
+        game.advance(307)
+        self.assertEqual(second_inbox.lines(), ["Current level: 3", "ok"])
+        self.assertEqual(first_inbox.lines(), ["Elevation underway", "Current level: 3"])
+
+    def test_failed_elevation_answers_participants(self):
+        game = empty_game()
+        game.tiles[0][1:4] = [1, 1, 1]
+        first, first_inbox = joined(game)
+        second, second_inbox = joined(game)
+        first.level = second.level = 2
+        game.receive(first, "Incantation")
+        game.receive(second, "Right")
+        game.tiles[0][3] = 0
+        game.advance(307)
+        self.assertEqual(first_inbox.lines(), ["Elevation underway", "ko"])
+        self.assertEqual(second_inbox.lines(), ["Elevation underway", "ko", "ok"])
+        self.assertEqual(second.level, 2)
+        self.assertFalse(second.frozen)
+
+    def test_elevation_answers_participants_who_left(self):
+        game = empty_game()
+        game.tiles[0][1:4] = [1, 1, 1]
+        first, first_inbox = joined(game)
+        second, second_inbox = joined(game)
+        third, third_inbox = joined(game)
+        first.level = second.level = third.level = 2
+        game.receive(second, "Forward")
+        game.receive(first, "Incantation")
+        game.advance(307)
+        self.assertEqual(first_inbox.lines(), ["Elevation underway", "Current level: 3"])
+        self.assertEqual(second_inbox.lines(), ["Elevation underway", "ok", "ko"])
+        self.assertEqual(second.level, 2)
+
+    def test_frozen_players_take_part_in_one_incantation(self):
+        game = empty_game()
+        game.tiles[0][1:4] = [2, 2, 2]
+        first, first_inbox = joined(game)
+        second, second_inbox = joined(game)
+        first.level = second.level = 2
+        game.receive(first, "Incantation")
+        third, third_inbox = joined(game)
+        third.level = 2
+        game.receive(third, "Incantation")
+        self.assertEqual(third_inbox.lines(), ["ko"])
+        game.advance(300)
+        self.assertEqual(second_inbox.lines(), ["Elevation underway", "Current level: 3"])
+
+    def test_missing_stone(self):
+        game = empty_game()
+        client, inbox = joined(game)
+        game.receive(client, "Incantation")
+        self.assertEqual(inbox.lines(), ["ko"])
+
+    def test_eggs(self):
+        game = empty_game(teams=["team1"], slots=1)
+        client, inbox = joined(game)
+        game.receive(client, "Connect_nbr")
+        game.receive(client, "Fork")
+        game.receive(client, "Connect_nbr")
+        game.advance(42)
+        self.assertEqual(inbox.lines(), ["0", "ok", "1"])
+
+    def test_eject(self):
+        game = empty_game()
+        pusher, inbox = joined(game, x=3, y=3, orientation=1)
+        pushed, pushed_inbox = joined(game, x=3, y=3, orientation=0)
+        game.receive(pusher, "Eject")
+        game.advance(7)
+        self.assertEqual(inbox.lines(), ["ok"])
+        self.assertEqual(pushed_inbox.lines(), ["eject: 3"])
+        self.assertEqual((pushed.x, pushed.y), (4, 3))
+
+    def test_queue_limit(self):
+        game = empty_game()
+        client, inbox = joined(game)
+        for _ in range(12):
+            game.receive(client, "Left")
+        game.advance(7 * 12)
+        self.assertEqual(len(inbox.lines()), 10)
+
+class TestSimulation(unittest.TestCase):
+
+    def play(self, seed):
+        random.seed(seed)
+        game = Game(10, 10, ["team1"], 2, seed=seed)
+        simulation = Simulation(game)
+        simulation.spawn("team1", 3)
+        results = simulation.run(until=3000)
+        return game, simulation, results
+
+    def test_agents_play_without_sockets(self):
+        game, simulation, results = self.play(4)
+        self.assertGreaterEqual(game.now, 3000)
+        self.assertIsNotNone(game.reached[2])
+        self.assertTrue(all(seat.agent.joined for seat in simulation.seats[:2]))
+
+    def test_full_team_waits_for_an_egg(self):
+        random.seed(1)
+        game = Game(10, 10, ["team1"], 1, seed=1)
+        simulation = Simulation(game)
+        simulation.spawn("team1", 2)
+        self.assertEqual(simulation.run(until=50), [None, None])
+        self.assertFalse(simulation.seats[1].agent.joined)
+        game.eggs.append(["team1", 0, 0])
+        simulation.run(until=100)
+        self.assertTrue(simulation.seats[1].agent.joined)
+
+    def test_agents_do_not_starve(self):
+        random.seed(1)
+        game = Game(10, 10, ["team1"], 6, seed=1)
+        simulation = Simulation(game)
+        simulation.spawn("team1", 6)
+        self.assertEqual(simulation.run(until=10000), [None] * 6)
+        self.assertEqual(game.stats["starved"], 0)
+
+    def test_same_seeds_same_game(self):
+        first = self.play(7)[0]
+        second = self.play(7)[0]
+        self.assertEqual(first.reached, second.reached)
+        self.assertEqual([client.level for client in first.clients], [client.level for client in second.clients])
+
+if __name__ == "__main__":
+    unittest.main()
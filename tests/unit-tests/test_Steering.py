@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import Steering, Tracker, Player, Command, broadcast_delta, go_to_need, command_received, command_send, STEER_STEPS, pending_queue, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+F, L, R = Command.FORWARD, Command.LEFT, Command.RIGHT
+
+class TestBroadcastDelta(unittest.TestCase):
+
+    def test_facing_north(self):
+        self.assertEqual(broadcast_delta(0, 1), (0, -1))
+        self.assertEqual(broadcast_delta(0, 3), (-1, 0))
+        self.assertEqual(broadcast_delta(0, 5), (0, 1))
+        self.assertEqual(broadcast_delta(0, 8), (1, -1))
+
+    def test_facing_east(self):
+        self.assertEqual(broadcast_delta(1, 1), (1, 0))
+        self.assertEqual(broadcast_delta(1, 3), (0, -1))
+        self.assertEqual(broadcast_delta(1, 0), (0, 0))
+
+class TestSteering(unittest.TestCase):
+
+    def test_minimal_turns(self):
+        tracker = Tracker()
+        for direction, commands in ((1, [F]), (3, [L, F]), (7, [R, F]), (5, [R, R, F]), (2, [F]), (4, [L, F])):
+            steering = Steering()
+            steering.fix(tracker, direction)
+            self.assertEqual(steering.step(tracker), commands)
+
+    def test_keeps_walking_then_waits(self):
+        tracker = Tracker()
+        steering = Steering()
+        steering.fix(tracker, 1)
+        for _ in range(STEER_STEPS):
+            self.assertEqual(steering.step(tracker), [F])
+        self.assertEqual(steering.step(tracker), [])
+
+    def test_distance_from_two_fixes(self):
+        tracker = Tracker(20, 20)
+        steering = Steering()
+        self.assertIsNone(steering.distance(tracker))
+        steering.fix(tracker, 2)
+        tracker.confirm(Command.FORWARD)
+        tracker.confirm(Command.FORWARD)
+        steering.fix(tracker, 3)
+        self.assertEqual(steering.target, (18, 18))
+        self.assertEqual(steering.distance(tracker), 2)
+        self.assertEqual(steering.step(tracker), [L, F])
+
+    def test_parallel_fixes_give_no_estimate(self):
+        tracker = Tracker()
+        steering = Steering()
+        steering.fix(tracker, 1)
+        tracker.confirm(Command.FORWARD)
+        steering.fix(tracker, 1)
+        self.assertIsNone(steering.target)
+
+    def test_old_fix_is_not_crossed(self):
+        tracker = Tracker()
+        steering = Steering()
+        steering.fix(tracker, 2, 0)
+        tracker.confirm(Command.FORWARD)
+        steering.fix(tracker, 3, 1000)
+        self.assertIsNone(steering.target)
+
+    def test_arrival(self):
+        tracker = Tracker()
+        steering = Steering()
+        steering.fix(tracker, 0)
+        self.assertEqual(steering.distance(tracker), 0)
+        self.assertEqual(steering.step(tracker), [])
+
+class TestGoToNeed(unittest.TestCase):
+
+    def test_steps_without_look(self):
+        player = Player()
+        player.level = 4
+        command_received(player, b'message 5, "Level 4 r"\n')
+        go_to_need(Mock(), player)
+        self.assertEqual(pending_codes(player.queue), [R, R, F])
+        self.assertEqual(player.need_to_go, 5)
+
+    def test_waits_for_pending_moves(self):
+        player = Player()
+        player.need_to_go = 1
+        player.queue = pending_queue([F])
+        go_to_need(Mock(), player)
+        self.assertEqual(pending_codes(player.queue), [F])
+
+    def test_keeps_moving_between_broadcasts(self):
+        player = Player()
+        player.look = True
+        player.need_to_go = 3
+        client_socket = Mock()
+        command_send(client_socket, player)
+        self.assertEqual(pending_codes(player.queue), [L, F])
+        command_received(player, b"ok\n")
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertEqual(pending_codes(player.queue), [F])
+
+    def test_looks_again_once_the_rally_is_given_up(self):
+        player = Player()
+        player.level = 3
+        player.look = True
+        player.nb_r = 1
+        player.need_to_go = 3
+        client_socket = Mock()
+        command_send(client_socket, player)
+        command_received(player, b"ok\n")
+        command_received(player, b"ok\n")
+        command_received(player, b'message 3, "Level 3 c"\n')
+        self.assertIsNone(player.need_to_go)
+        command_send(client_socket, player)
+        self.assertEqual(pending_codes(player.queue), [Command.LOOK])
+
+    def test_level_up_forgets_the_rally(self):
+        player = Player()
+        player.steering.fix(player.tracker, 3)
+        command_received(player, b"Current level: 2\n")
+        self.assertIsNone(player.steering.x)
+
+if __name__ == "__main__":
+    unittest.main()
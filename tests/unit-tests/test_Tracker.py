@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import unittest
+from zappy_ai import Tracker, Player, Command, command_received, pending_queue, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class TestTracker(unittest.TestCase):
+
+    def test_forward_north(self):
+        tracker = Tracker()
+        tracker.confirm(Command.FORWARD)
+        self.assertEqual((tracker.x, tracker.y, tracker.heading), (0, -1, 0))
+
+    def test_turns(self):
+        tracker = Tracker()
+        tracker.confirm(Command.RIGHT)
+        self.assertEqual(tracker.heading, 1)
+        tracker.confirm(Command.LEFT)
+        tracker.confirm(Command.LEFT)
+        self.assertEqual(tracker.heading, 3)
+        tracker.confirm(Command.FORWARD)
+        self.assertEqual((tracker.x, tracker.y), (-1, 0))
+
+    def test_wraps_around_known_map(self):
+        tracker = Tracker(10, 5)
+        tracker.confirm(Command.FORWARD)
+        self.assertEqual((tracker.x, tracker.y), (0, 4))
+        tracker.confirm(Command.LEFT)
+        tracker.confirm(Command.FORWARD)
+        self.assertEqual((tracker.x, tracker.y), (9, 4))
+
+    def test_other_commands_do_not_move(self):
+        tracker = Tracker()
+        tracker.confirm(Command.LOOK)
+        tracker.confirm(Command.TAKE_FOOD)
+        self.assertEqual((tracker.x, tracker.y, tracker.heading), (0, 0, 0))
+
+    def test_ejections(self):
+        tracker = Tracker()
+        tracker.ejected(1)
+        self.assertEqual((tracker.x, tracker.y), (0, 1))
+        tracker.ejected(3)
+        self.assertEqual((tracker.x, tracker.y), (1, 1))
+        tracker.ejected(5)
+        self.assertEqual((tracker.x, tracker.y), (1, 0))
+        tracker.ejected(7)
+        self.assertEqual((tracker.x, tracker.y), (0, 0))
+        self.assertEqual(tracker.heading, 0)
+
+class TestTrackerReplies(unittest.TestCase):
+
+    def test_only_ok_moves(self):
+        player = Player()
+        player.queue = pending_queue([Command.FORWARD, Command.FORWARD])
+        command_received(player, b"ko\n")
+        command_received(player, b"ok\n")
+        self.assertEqual((player.tracker.x, player.tracker.y), (0, -1))
+        self.assertEqual(pending_codes(player.queue), [])
+
+    def test_eject_message_is_not_a_reply(self):
+        player = Player()
+        player.queue = pending_queue([Command.RIGHT])
+        self.assertEqual(command_received(player, b"eject: 5\n"), 0)
+        self.assertEqual(pending_codes(player.queue), [Command.RIGHT])
+        self.assertEqual((player.tracker.x, player.tracker.y), (0, -1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import View, as_view, received_look, check_stones, count_words_at_index, find_keyword_in_list, remove_element, Player
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+LOOK = "[ player food food, linemate, egg sibur, , player player thystame ]\n"
+
+class TestView(unittest.TestCase):
+
+    def setUp(self):
+        self.view = View.parse(LOOK)
+
+    def test_size(self):
+        self.assertEqual(len(self.view), 5)
+
+    def test_count(self):
+        self.assertEqual(self.view.count(0, "food"), 2)
+        self.assertEqual(self.view.count(0, "player"), 1)
+        self.assertEqual(self.view.count(1, "linemate"), 1)
+        self.assertEqual(self.view.count(4, "player"), 2)
+        self.assertEqual(self.view.count(4, "thystame"), 1)
+
+    def test_count_out_of_view(self):
+        self.assertEqual(self.view.count(5, "food"), 0)
+        self.assertEqual(self.view.count(-1, "food"), 0)
+
+    def test_resources_ignore_players_and_eggs(self):
+        self.assertEqual(self.view.resources(0), 2)
+        self.assertEqual(self.view.resources(2), 1)
+        self.assertEqual(self.view.resources(3), 0)
+        self.assertEqual(self.view.resources(4), 1)
+
+    def test_find(self):
+        self.assertEqual(self.view.find("player"), [0, 4])
+        self.assertEqual(self.view.find("mendiane"), [])
+
+    def test_take(self):
+        self.view.take(0, "food")
+        self.assertEqual(self.view.count(0, "food"), 1)
+        self.view.take(3, "food")
+        self.assertEqual(self.view.count(3, "food"), 0)
+
+    def test_as_view(self):
+        self.assertIs(as_view(self.view), self.view)
+        self.assertEqual(as_view(["food player", "sibur"]).count(1, "sibur"), 1)
+        self.assertEqual(len(as_view([])), 0)
+
+class TestHelpersOnView(unittest.TestCase):
+
+    def setUp(self):
+        self.view = View.parse(LOOK)
+
+    def test_find_keyword_in_list(self):
+        self.assertEqual(find_keyword_in_list(self.view, "food"), [0])
+
+    def test_count_words_at_index(self):
+        self.assertEqual(count_words_at_index(self.view, 0), 2)
+
+    def test_remove_element(self):
+        remove_element(self.view, 1, "linemate")
+        self.assertEqual(self.view.count(1, "linemate"), 0)
+
+    def test_check_stones(self):
+        player = Player()
+        player.view = self.view
+        self.assertEqual(check_stones(player, 0), "food")
+        self.assertEqual(check_stones(player, 2), "sibur")
+        player.thystame = player.max_thystame
+        self.assertIsNone(check_stones(player, 4))
+
+    def test_received_look(self):
+        player = Player()
+        data_rec = Mock()
+        data_rec.decode.return_value = LOOK
+        received_look(player, data_rec)
+        self.assertIsInstance(player.view, View)
+        self.assertEqual(player.view.count(0, "food"), 2)
+
+if __name__ == "__main__":
+    unittest.main()
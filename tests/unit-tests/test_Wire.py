@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+
+import unittest
+import os
+import random
+import tempfile
+from zappy_ai import Agent, Wire, WireRecorder, WIRE_HEADER, WIRE_RECORD
+from zappy_sim import Game, Simulation
+from zappy_replay import Replay, ReplayTransport, read_wire, load
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+class Clock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        self.now += 10
+        return self.now
+
+class TestWireRecorder(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "wire.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read(self):
+        with open(self.path, "rb") as file:
+            return file.read()
+
+    def test_records(self):
+        recorder = WireRecorder(self.path, 42, timer=Clock())
+        recorder.transport = ReplayTransport()
+        recorder.write(Wire.RECEIVED, b"ok\n")
+        recorder.write(Wire.DECIDED)
+        recorder.sendall(b"Look\n")
+        recorder.close()
+        self.assertEqual(recorder.transport.output, b"Look\n")
+        self.assertEqual(len(self.read()), WIRE_HEADER.size + 3 * WIRE_RECORD.size + 8)
+        self.assertEqual(read_wire(self.read()), [(42, [
+            (Wire.RECEIVED, 10, b"ok\n"), (Wire.DECIDED, 20, b""), (Wire.SENT, 30, b"Look\n")
+        ])])
+
+    def test_sessions_are_appended(self):
+        for seed in (1, 2):
+            recorder = WireRecorder(self.path, seed)
+            recorder.write(Wire.RECEIVED, b"WELCOME\n")
+            recorder.close()
+        self.assertEqual([seed for seed, _ in load(self.path)], [1, 2])
+
+    def test_cut_record_is_dropped(self):
+        recorder = WireRecorder(self.path, 3)
+        recorder.write(Wire.RECEIVED, b"ok\n")
+        recorder.write(Wire.RECEIVED, b"[player, food]\n")
+        recorder.close()
+        seed, records = read_wire(self.read()[:-4])[0]
+        self.assertEqual([data for _, _, data in records], [b"ok\n"])
+
+class TestAgentRecord(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "wire.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_traffic_is_recorded(self):
+        transport = ReplayTransport()
+        agent = Agent(transport, "team")
+        recorder = WireRecorder(self.path, 7)
+        agent.record(recorder)
+        agent.hello()
+        for line in (b"WELCOME\n", b"1\n", b"10 10\n"):
+            agent.feed(line)
+        agent.decide()
+        recorder.close()
+        kinds = [kind for kind, _, _ in load(self.path)[0][1]]
+        self.assertEqual(kinds, [Wire.SENT] + [Wire.RECEIVED] * 3 + [Wire.DECIDED, Wire.SENT])
+        self.assertTrue(transport.output.startswith(b"team\n"))
+        self.assertEqual(agent.player.random.random(), random.Random(7).random())
+
+class TestReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.directory.name, "game")
+        random.seed(5)
+        game = Game(10, 10, ["team1"], 3, seed=5)
+        simulation = Simulation(game)
+        simulation.spawn("team1", 3, record=self.prefix)
+        simulation.run(until=4000)
+        simulation.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_replay_reproduces_the_game(self):
+        for index in range(3):
+            seed, records = load(f"{self.prefix}.{index}")[0]
+            replay = Replay(seed, records)
+            self.assertIsNone(replay.run())
+            self.assertIsNone(replay.run())
+
+    def test_changed_command_diverges(self):
+        seed, records = load(f"{self.prefix}.0")[0]
+        index = max(i for i, record in enumerate(records) if record[0] == Wire.SENT)
+        kind, stamp, data = records[index]
+        records[index] = (kind, stamp, data[:-1] + b"!")
+        self.assertEqual(Replay(seed, records).run(), index)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+
+import unittest
+from unittest.mock import Mock
+from zappy_ai import WorldMap, Tracker, View, Player, Session, Command, FRESH_TICKS, command_received, moving_level, command_send, pending_queue, pending_codes
+import os
+import sys
+
+script_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+sys.path.insert(0, script_dir)
+
+def joined_player(width=10, height=10):
+    session = Session()
+    session.feed("1\n")
+    session.feed(f"{width} {height}\n")
+    player = Player()
+    player.join(session)
+    return player
+
+class TestConeTile(unittest.TestCase):
+
+    def test_facing_north(self):
+        tracker = Tracker(10, 10)
+        self.assertEqual(tracker.cone_tile(0), (0, 0))
+        self.assertEqual(tracker.cone_tile(1), (9, 9))
+        self.assertEqual(tracker.cone_tile(2), (0, 9))
+        self.assertEqual(tracker.cone_tile(3), (1, 9))
+        self.assertEqual(tracker.cone_tile(6), (0, 8))
+
+    def test_facing_east(self):
+        tracker = Tracker(10, 10)
+        tracker.heading = 1
+        self.assertEqual(tracker.cone_tile(1), (1, 9))
+        self.assertEqual(tracker.cone_tile(3), (1, 1))
+        self.assertEqual(tracker.cone_tile(6), (2, 0))
+
+    def test_predict(self):
+        tracker = Tracker(10, 10)
+        destination = tracker.predict([Command.FORWARD, Command.RIGHT, Command.TAKE_FOOD, Command.FORWARD])
+        self.assertEqual((destination.x, destination.y, destination.heading), (1, 9, 1))
+        self.assertEqual((tracker.x, tracker.y, tracker.heading), (0, 0, 0))
+
+class TestWorldMap(unittest.TestCase):
+
+    def setUp(self):
+        self.world = WorldMap(10, 10)
+        self.tracker = Tracker(10, 10)
+
+    def test_record_and_view(self):
+        self.world.record(self.tracker, View.parse("[player food, linemate, , sibur sibur]"), 5)
+        view = self.world.view(self.tracker, 1)
+        self.assertEqual(view.count(0, "food"), 1)
+        self.assertEqual(view.count(0, "player"), 0)
+        self.assertEqual(view.count(1, "linemate"), 1)
+        self.assertEqual(view.count(3, "sibur"), 2)
+        self.assertEqual(self.world.seen[self.world.tile(1, 9)], 5)
+
+    def test_fresh(self):
+        self.assertFalse(self.world.fresh(self.tracker, 1, 0))
+        self.world.record(self.tracker, View.parse("[, , , ]"), 10)
+        self.assertTrue(self.world.fresh(self.tracker, 1, 10 + FRESH_TICKS))
+        self.assertFalse(self.world.fresh(self.tracker, 1, 11 + FRESH_TICKS))
+        self.assertFalse(self.world.fresh(self.tracker, 2, 10))
+
+    def test_take_and_set(self):
+        self.world.record(self.tracker, View.parse("[food food]"), 0)
+        self.world.update(self.tracker, Command.TAKE_FOOD, "ok\n")
+        self.assertEqual(self.world.view(self.tracker, 0).count(0, "food"), 1)
+        self.world.update(self.tracker, Command.TAKE_FOOD, "ko\n")
+        self.assertEqual(self.world.view(self.tracker, 0).count(0, "food"), 0)
+        self.world.update(self.tracker, Command.SET_PHIRAS, "ok\n")
+        self.assertEqual(self.world.view(self.tracker, 0).count(0, "phiras"), 1)
+
+class TestRecall(unittest.TestCase):
+
+    def test_look_is_recorded(self):
+        player = joined_player()
+        player.queue = pending_queue([Command.LOOK])
+        player.look = True
+        command_received(player, b"[player, food, , ]\n")
+        self.assertEqual(player.world.seen[player.world.tile(9, 9)], player.ticks)
+
+    def test_fresh_destination_skips_look(self):
+        player = joined_player()
+        ahead = Tracker(10, 10)
+        ahead.y = 9
+        player.world.record(ahead, View.parse("[, , , ]"), 0)
+        player.view = View.parse("[player, , food, ]")
+        player.look = True
+        moving_level(Mock(), player)
+        self.assertEqual(pending_codes(player.queue), [Command.FORWARD, Command.TAKE_FOOD])
+        self.assertTrue(player.recall)
+        self.assertTrue(player.look)
+
+    def test_stale_destination_looks(self):
+        player = joined_player()
+        player.view = View.parse("[player, , food, ]")
+        player.look = True
+        moving_level(Mock(), player)
+        self.assertEqual(pending_codes(player.queue), [Command.FORWARD, Command.TAKE_FOOD, Command.LOOK])
+        self.assertFalse(player.recall)
+
+    def test_recall_rebuilds_view(self):
+        player = joined_player()
+        ahead = Tracker(10, 10)
+        ahead.y = 9
+        player.world.record(ahead, View.parse("[food, , , ]"), 0)
+        client_socket = Mock()
+        player.queue = pending_queue([Command.FORWARD])
+        player.look = True
+        player.recall = True
+        command_send(client_socket, player)
+        self.assertEqual(player.view, [])
+        self.assertEqual(pending_codes(player.queue), [Command.FORWARD])
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertFalse(player.recall)
+        self.assertEqual(pending_codes(player.queue), [Command.TAKE_FOOD])
+
+    def test_recall_waits_for_pending_takes(self):
+        player = joined_player()
+        ahead = Tracker(10, 10)
+        ahead.y = 9
+        player.world.record(ahead, View.parse("[food, , , ]"), 0)
+        client_socket = Mock()
+        player.queue = pending_queue([Command.FORWARD, Command.TAKE_FOOD])
+        player.look = True
+        player.recall = True
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertTrue(player.recall)
+        self.assertEqual(pending_codes(player.queue), [Command.TAKE_FOOD])
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertFalse(player.recall)
+        self.assertNotIn(Command.TAKE_FOOD, pending_codes(player.queue))
+
+    def test_recall_looks_before_evolving(self):
+        player = joined_player()
+        player.queue = pending_queue([Command.LOOK])
+        player.look = True
+        command_received(player, b"[player player linemate, , , ]\n")
+        self.assertEqual(player.tile_players, 2)
+        ahead = Tracker(10, 10)
+        ahead.y = 9
+        player.world.record(ahead, View.parse("[linemate, , , ]"), 0)
+        client_socket = Mock()
+        player.queue = pending_queue([Command.FORWARD])
+        player.look = True
+        player.recall = True
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertFalse(player.recall)
+        self.assertEqual(pending_codes(player.queue), [Command.LOOK])
+
+    def test_recall_keeps_the_players_of_the_last_look(self):
+        player = joined_player()
+        player.queue = pending_queue([Command.LOOK])
+        player.look = True
+        command_received(player, b"[player player, , , ]\n")
+        ahead = Tracker(10, 10)
+        ahead.y = 9
+        player.world.record(ahead, View.parse("[food, , , ]"), 0)
+        client_socket = Mock()
+        player.queue = pending_queue([Command.FORWARD])
+        player.look = True
+        player.recall = True
+        command_received(player, b"ok\n")
+        command_send(client_socket, player)
+        self.assertEqual(player.view.count(0, "player"), 2)
+        self.assertEqual(pending_codes(player.queue), [Command.TAKE_FOOD])
+
+if __name__ == "__main__":
+    unittest.main()